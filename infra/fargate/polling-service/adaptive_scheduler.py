@@ -0,0 +1,94 @@
+"""
+Adaptive poll interval for the live polling service.
+
+Polls fast while matchup data is changing, backs off exponentially while it
+isn't, and uses the NFL game schedule to cap the back-off during games and
+to wake up in time for the next kickoff outside them.
+"""
+
+import logging
+import math
+import os
+from datetime import datetime, timezone
+
+from ff_utils.schedule import GameSchedule
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptivePollScheduler:
+    def __init__(self, schedule=None, min_interval=10.0, live_max_interval=30.0,
+                 idle_max_interval=300.0, backoff_factor=2.0):
+        """
+        Args:
+            schedule: GameSchedule used to tell live windows from idle time
+            min_interval: Interval while data is changing (seconds)
+            live_max_interval: Back-off cap inside a game window
+            idle_max_interval: Back-off cap outside game windows
+            backoff_factor: Multiplier applied per unchanged cycle
+        """
+        self.schedule = schedule or GameSchedule.from_env()
+        self.min_interval = min_interval
+        self.live_max_interval = live_max_interval
+        self.idle_max_interval = idle_max_interval
+        self.backoff_factor = backoff_factor
+        self.unchanged_cycles = 0
+        self.last_decision = {'interval': min_interval, 'reason': 'startup', 'live': None, 'unchanged_cycles': 0}
+
+    @classmethod
+    def from_env(cls):
+        """Build a scheduler from POLL_MIN_INTERVAL, POLL_LIVE_MAX_INTERVAL and POLL_IDLE_MAX_INTERVAL"""
+        return cls(
+            min_interval=float(os.environ.get('POLL_MIN_INTERVAL', '10')),
+            live_max_interval=float(os.environ.get('POLL_LIVE_MAX_INTERVAL', '30')),
+            idle_max_interval=float(os.environ.get('POLL_IDLE_MAX_INTERVAL', '300')),
+        )
+
+    @property
+    def interval(self):
+        return self.last_decision['interval']
+
+    def backoff_interval(self, cap):
+        """
+        min_interval grown by backoff_factor per unchanged cycle, up to cap.
+
+        Cycles past the one that reaches cap no longer raise the exponent, so a
+        long quiet stretch can't overflow the float.
+        """
+        if self.min_interval <= 0 or self.backoff_factor <= 1 or self.min_interval >= cap:
+            return min(self.min_interval, cap)
+        steps_to_cap = math.ceil(math.log(cap / self.min_interval) / math.log(self.backoff_factor))
+        return min(self.min_interval * self.backoff_factor ** min(self.unchanged_cycles, steps_to_cap), cap)
+
+    def next_interval(self, changed, now=None):
+        """Record the outcome of a cycle and return seconds to wait before the next one"""
+        now = now or datetime.now(timezone.utc)
+        live = self.schedule.is_live(now)
+
+        if changed:
+            self.unchanged_cycles = 0
+            interval = self.min_interval
+            reason = 'data changed'
+        else:
+            self.unchanged_cycles += 1
+            cap = self.live_max_interval if live else self.idle_max_interval
+            interval = self.backoff_interval(cap)
+            reason = f"no change for {self.unchanged_cycles} cycle(s), {'game window' if live else 'idle'} back-off"
+            if not live:
+                until_kickoff = self.schedule.seconds_until_next_window(now)
+                if until_kickoff < interval:
+                    interval = max(self.min_interval, until_kickoff)
+                    reason = 'waking for next game window'
+
+        decision = {
+            'interval': interval,
+            'reason': reason,
+            'live': live,
+            'unchanged_cycles': self.unchanged_cycles,
+        }
+        if interval != self.last_decision['interval'] or live != self.last_decision['live']:
+            logger.info(f"Poll interval {self.last_decision['interval']:.0f}s -> {interval:.0f}s ({reason})")
+        else:
+            logger.debug(f"Poll interval {interval:.0f}s ({reason})")
+        self.last_decision = decision
+        return interval
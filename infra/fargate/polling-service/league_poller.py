@@ -0,0 +1,375 @@
+"""
+Per-league polling state for the live polling service.
+
+Each LeaguePoller owns one league's change detection, checkpoint, adaptive
+schedule and writer pipeline. The PollingService drives any number of them
+from a single task, sharing the players cache, HTTP session and I/O pool.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+
+from ff_standings import matchup_digests, changed_teams
+from ff_standings.concurrency import submit_or_run
+from ff_utils.lease import lease_id
+
+from adaptive_scheduler import AdaptivePollScheduler
+
+logger = logging.getLogger(__name__)
+
+
+class LeaguePoller:
+    def __init__(self, league_id, backend, standings_service, sleeper, scheduler=None, metrics=None):
+        """
+        Args:
+            league_id: Sleeper league ID
+            backend: Storage backend holding this league's tables
+            standings_service: StandingsService over backend
+            sleeper: SleeperClient shared by all leagues
+            scheduler: AdaptivePollScheduler (defaults to one built from the environment)
+            metrics: Optional PollingMetrics for latency histograms and cycle counters
+        """
+        self.league_id = league_id
+        self.backend = backend
+        self.standings_service = standings_service
+        self.sleeper = sleeper
+        self.scheduler = scheduler or AdaptivePollScheduler.from_env()
+        self.metrics = metrics
+        self.checkpoint_id = f'polling_checkpoint#{league_id}'
+        
+        # Single-runner lease (wall-clock epoch seconds, shared with other tasks)
+        self.lease_id = lease_id(league_id)
+        self.lease_expires_at = 0.0  # expiry of our lease; 0 while another runner (or nobody) has it
+        self.lease_renew_at = 0.0
+        self.lease_retry_at = 0.0    # when a standby next tries to take the lease over
+        
+        # Scheduling, driven by PollingService
+        self.next_due = 0.0
+        self.busy = False
+        self.last_success = None  # monotonic time of the last cycle that fetched successfully
+        self.write_failing_since = None  # monotonic time of the first failed write since the last good one
+        self.consecutive_errors = 0
+        
+        # Change detection against the last successfully written snapshot
+        self.team_digests = None  # roster_id -> digest of that team's last processed matchup
+        self.digest_week = None   # (season, week) the digests belong to
+        self.digest_players_version = None  # players data version the digests were computed with
+        
+        # Pipelined writes: one writer thread, newest pending snapshot wins
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'ff-polling-writer-{league_id[-6:]}')
+        self._pipeline_lock = threading.Lock()
+        self._write_in_flight = False
+        self._pending_snapshot = None
+        self._latest_snapshot = None  # (week, players version, digests) of the last snapshot handed to the writer
+        self.dropped_snapshots = 0
+        self._accepting = True  # False once shutdown starts draining
+
+    def _observe(self, name, started, **labels):
+        if self.metrics is not None:
+            self.metrics.observe(name, time.perf_counter() - started, **labels)
+
+    def _count(self, name, **labels):
+        if self.metrics is not None:
+            self.metrics.inc(name, league=self.league_id, **labels)
+
+    def holds_lease(self, now=None):
+        """True while this task's lease on the league is unexpired"""
+        return (time.time() if now is None else now) < self.lease_expires_at
+
+    @property
+    def players_version(self):
+        return self.standings_service.data_cache.players_version
+
+    def fetch_matchups(self, week):
+        """Fetch a week's matchup data from Sleeper API"""
+        if not week:
+            logger.warning(f"[{self.league_id}] No current week available, skipping matchup fetch")
+            return None
+        
+        try:
+            started = time.perf_counter()
+            try:
+                matchups = self.sleeper.get_matchups(self.league_id, week)
+            finally:
+                self._observe('ff_sleeper_request_duration_seconds', started, endpoint='matchups')
+            
+            logger.info(f"[{self.league_id}] Fetched {len(matchups)} matchups for week {week}")
+            return matchups
+        
+        except requests.RequestException as e:
+            logger.error(f"[{self.league_id}] Failed to fetch matchups for week {week}: {e}")
+            return None
+
+    def detect_changed_teams(self, digests, week_key, players_version):
+        """
+        Compare per-team digests with the last successfully written snapshot.
+        
+        Returns the set of roster ids whose points, starters or player scores
+        changed, or None when every team must be treated as changed (first
+        cycle, a new week or new players data).
+        """
+        if self.digest_week != week_key or self.digest_players_version != players_version:
+            return None
+        return changed_teams(self.team_digests, digests)
+
+    def reset_change_detection(self):
+        """Forget the last written snapshot (another runner may have written since)"""
+        self.team_digests = None
+        self.digest_week = None
+        self.digest_players_version = None
+        self._latest_snapshot = None
+
+    def save_checkpoint(self):
+        """Persist week, per-team digests and players data version for warm restarts"""
+        try:
+            self.backend.put_item('polling_state', {
+                'id': self.checkpoint_id,
+                'league_id': self.league_id,
+                'season': self.digest_week[0],
+                'week': self.digest_week[1],
+                'team_digests': self.team_digests,
+                'players_version': self.digest_players_version,
+                'updated_at': datetime.now(timezone.utc).isoformat()
+            })
+        except Exception as e:
+            logger.warning(f"[{self.league_id}] Failed to save polling checkpoint: {e}")
+
+    def restore_checkpoint(self, season, week):
+        """
+        Resume change detection from the persisted checkpoint.
+        
+        The checkpoint is only used when it matches the current week and the
+        loaded players data, so a restart mid-game doesn't rewrite everything.
+        """
+        try:
+            checkpoint = self.backend.get_item('polling_state', {'id': self.checkpoint_id})
+        except Exception as e:
+            logger.warning(f"[{self.league_id}] Failed to load polling checkpoint: {e}")
+            return False
+        if not checkpoint or not checkpoint.get('team_digests'):
+            logger.info(f"[{self.league_id}] No polling checkpoint found, first cycle will update all standings")
+            return False
+        
+        week_key = (str(checkpoint.get('season')), int(checkpoint.get('week', 0)))
+        if week_key != (season, week):
+            logger.info(f"[{self.league_id}] Ignoring polling checkpoint for {week_key[0]} week {week_key[1]} "
+                        f"(current week changed)")
+            return False
+        if checkpoint.get('players_version') != self.players_version:
+            logger.info(f"[{self.league_id}] Ignoring polling checkpoint (players data changed)")
+            return False
+        
+        self.team_digests = dict(checkpoint['team_digests'])
+        self.digest_week = week_key
+        self.digest_players_version = self.players_version
+        self._latest_snapshot = (week_key, self.digest_players_version, self.team_digests)
+        logger.info(f"[{self.league_id}] Resumed from polling checkpoint saved at {checkpoint.get('updated_at')} "
+                    f"({len(self.team_digests)} teams)")
+        return True
+
+    def store_matchup_data(self, matchups, season, week):
+        """Store matchup data in DynamoDB; returns whether it was stored"""
+        try:
+            self.backend.put_item('league_data', {
+                'data_type': 'matchups',
+                'id': f'{season}_{week}',
+                'season': season,
+                'week': week,
+                'data': matchups,
+                'last_updated': datetime.now(timezone.utc).isoformat(),
+                'source': 'live-polling'
+            })
+            
+            logger.info(f"[{self.league_id}] Stored matchup data for week {week}")
+            return True
+        
+        except Exception as e:
+            logger.error(f"[{self.league_id}] Failed to store matchup data: {e}")
+            return False
+
+    def write_update(self, matchups, season, week, fetched_at):
+        """Store one matchup snapshot and its standings (runs on the writer thread)"""
+        started = time.perf_counter()
+        written = False
+        try:
+            written = self._write_update(matchups, season, week, fetched_at)
+        finally:
+            self._observe('ff_polling_cycle_duration_seconds', started, league=self.league_id, phase='write')
+            self._record_write(written)
+
+    def _record_write(self, written):
+        """Track consecutive write failures, which fetch success alone would hide from /health"""
+        if written:
+            self.write_failing_since = None
+            return
+        self._count('ff_polling_write_errors_total')
+        if self.write_failing_since is None:
+            self.write_failing_since = time.monotonic()
+
+    def _write_update(self, matchups, season, week, fetched_at):
+        """Returns whether the snapshot's standings and matchups were stored (or needed no writes)"""
+        digests = matchup_digests(matchups)
+        players_version = self.players_version
+        changed_team_ids = self.detect_changed_teams(digests, (season, week), players_version)
+        if changed_team_ids is None:
+            logger.info(f"[{self.league_id}] No previous digests for this week, updating all standings...")
+        elif not changed_team_ids:
+            logger.debug(f"[{self.league_id}] Snapshot matches stored standings, nothing to write")
+            return True
+        else:
+            logger.info(f"[{self.league_id}] Matchup data changed for {len(changed_team_ids)} team(s), "
+                        f"updating standings...")
+        
+        # Store updated matchup data alongside the standings writes
+        store_future = submit_or_run(self.standings_service.executor, self.store_matchup_data, matchups, season, week)
+        
+        # Calculate and store standings directly (no Lambda call!)
+        try:
+            weekly_results = self.standings_service.calculate_and_store(
+                matchups,
+                season,
+                week,
+                include_player_details=True,  # Include full roster details
+                changed_team_ids=changed_team_ids
+            )
+            logger.info(f"[{self.league_id}] Updated standings for {len(weekly_results)} teams "
+                        f"(data age {time.time() - fetched_at:.1f}s)")
+            self.team_digests = digests
+            self.digest_week = (season, week)
+            self.digest_players_version = players_version
+        except Exception as e:
+            logger.error(f"[{self.league_id}] Failed to calculate standings: {e}")
+            # Force a full update with the next snapshot rather than trusting partial writes
+            self.team_digests = None
+            self.digest_week = None
+            self._latest_snapshot = None
+        stored = store_future.result()
+        
+        if self.team_digests is None:
+            return False
+        self.save_checkpoint()
+        return stored
+
+    def _drain_writes(self, snapshot):
+        """Writer loop: write snapshot, then keep taking the newest pending one"""
+        while snapshot is not None:
+            try:
+                self.write_update(*snapshot)
+            except Exception as e:
+                logger.error(f"[{self.league_id}] Error writing polling update: {e}")
+            with self._pipeline_lock:
+                snapshot, self._pending_snapshot = self._pending_snapshot, None
+                if snapshot is None:
+                    self._write_in_flight = False
+
+    def submit_update(self, matchups, season, week, fetched_at):
+        """
+        Hand a changed snapshot to the writer without waiting for it.
+        
+        At most one snapshot is written at a time and one waits behind it;
+        a newer snapshot replaces the waiting one, so stale cycles are
+        dropped instead of queued.
+        """
+        snapshot = (matchups, season, week, fetched_at)
+        with self._pipeline_lock:
+            if not self._accepting:
+                logger.info(f"[{self.league_id}] Shutting down, not writing snapshot fetched after the stop signal")
+                return
+            if self._write_in_flight:
+                if self._pending_snapshot is not None:
+                    self.dropped_snapshots += 1
+                    self._count('ff_polling_dropped_snapshots_total')
+                    logger.info(f"[{self.league_id}] Dropping stale snapshot, writer busy "
+                                f"({self.dropped_snapshots} dropped so far)")
+                self._pending_snapshot = snapshot
+                return
+            self._write_in_flight = True
+        self._writer.submit(self._drain_writes, snapshot)
+
+    def stop_accepting(self):
+        """Refuse new snapshots; ones already queued are still written"""
+        with self._pipeline_lock:
+            self._accepting = False
+
+    def discard_pending(self):
+        """Drop the snapshot waiting behind the in-flight write; returns whether there was one"""
+        with self._pipeline_lock:
+            snapshot, self._pending_snapshot = self._pending_snapshot, None
+        return snapshot is not None
+
+    def wait_for_writes(self, timeout=None):
+        """Block until the writer is idle; returns False if timeout expired first"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._pipeline_lock:
+                if not self._write_in_flight:
+                    return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+
+    def poll(self, season, week):
+        """
+        Fetch one snapshot and queue it for writing if it changed.
+        
+        Returns True if matchup data changed. Writes happen on the writer
+        thread, so the next fetch stays on schedule while they are in flight.
+        """
+        started = time.perf_counter()
+        try:
+            changed = self._poll(season, week)
+        except Exception:
+            self.consecutive_errors += 1
+            self._count('ff_polling_cycles_total', outcome='error')
+            raise
+        finally:
+            self._observe('ff_polling_cycle_duration_seconds', started, league=self.league_id, phase='fetch')
+        if changed is None:
+            self.consecutive_errors += 1
+            self._count('ff_polling_cycles_total', outcome='error')
+            return False
+        self.consecutive_errors = 0
+        self.last_success = time.monotonic()
+        self._count('ff_polling_cycles_total', outcome='changed' if changed else 'unchanged')
+        return changed
+
+    def _poll(self, season, week):
+        """Returns None when the fetch failed, otherwise whether data changed"""
+        fetched_at = time.time()
+        matchups = self.fetch_matchups(week)
+        if matchups is None:
+            return None
+        if not matchups:
+            return False
+        
+        # Per-team digests so only affected standings rows get written
+        snapshot_key = ((season, week), self.players_version, matchup_digests(matchups))
+        if snapshot_key == self._latest_snapshot:
+            logger.debug(f"[{self.league_id}] No changes in matchup data")
+            return False
+        
+        self._latest_snapshot = snapshot_key
+        self.submit_update(matchups, season, week, fetched_at)
+        return True
+
+    def close(self, timeout=None):
+        """
+        Wait up to timeout for queued writes, then stop the writer thread.
+        
+        Returns True if every write finished. Otherwise the waiting snapshot is
+        dropped and the in-flight one is abandoned; its checkpoint is never
+        saved, so the next runner rewrites that week instead of trusting it.
+        """
+        self.stop_accepting()
+        flushed = self.wait_for_writes(timeout)
+        if not flushed and self.discard_pending():
+            logger.warning(f"[{self.league_id}] Shutdown budget exhausted, dropped a queued snapshot")
+        self._writer.shutdown(wait=flushed, cancel_futures=True)
+        if flushed:
+            self.standings_service.close()
+        return flushed
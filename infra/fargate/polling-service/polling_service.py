@@ -4,7 +4,9 @@ Live Polling Service for Fantasy Football vs Everyone
 
 This service runs in ECS Fargate and polls the Sleeper API every 10 seconds
 during active game periods. It fetches live matchup data and calculates
-standings directly using the shared ff_standings library.
+standings directly using the shared ff_standings library. One task can poll
+several leagues (POLLING_LEAGUES), sharing the players cache, Sleeper
+connection pool and DynamoDB I/O pool between them.
 """
 
 import time
@@ -12,15 +14,20 @@ import json
 import os
 import logging
 import signal
+import socket
 import sys
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-import requests
-import boto3
-from decimal import Decimal
 
 # Import shared standings library
-from ff_standings import StandingsService
-from ff_standings.storage import StandingsStorage
+from ff_standings import StandingsService, DataCache, create_backend_from_env, metrics_from_env
+from ff_utils.nfl_state import get_nfl_state_provider
+from ff_utils.sleeper import get_sleeper_client, ResponseRecorder
+
+from league_poller import LeaguePoller
+from status_server import PollingMetrics, StatusServer
 
 # Configure logging
 logging.basicConfig(
@@ -29,222 +36,493 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+# Per-league tables (environment variable of the default name); polling_state is shared,
+# its leases and checkpoints are keyed by league
+LEAGUE_TABLES = {
+    'league_data': 'LEAGUE_DATA_TABLE',
+    'weekly_standings': 'WEEKLY_STANDINGS_TABLE',
+    'overall_standings': 'OVERALL_STANDINGS_TABLE',
+}
+
+
+def load_league_configs():
+    """
+    Leagues to poll, from POLLING_LEAGUES or the single SLEEPER_LEAGUE_ID.
+    
+    POLLING_LEAGUES is a JSON list of league IDs or of objects like
+    {"league_id": "...", "tables": {"league_data": "...", "weekly_standings": "...",
+    "overall_standings": "..."}}. None of those tables has a league key, so
+    at most one league may use the *_TABLE environment variables; every
+    other league must name all three of its own tables, and no two leagues
+    may share a table.
+    """
+    configured = os.environ.get('POLLING_LEAGUES')
+    if not configured:
+        return [{'league_id': os.environ.get('SLEEPER_LEAGUE_ID', '1251986365806034944')}]
+    
+    leagues = []
+    for entry in json.loads(configured):
+        league = {'league_id': entry} if isinstance(entry, str) else dict(entry)
+        league['league_id'] = str(league['league_id'])
+        leagues.append(league)
+    
+    shared = [league['league_id'] for league in leagues if not league.get('tables')]
+    if len(shared) > 1:
+        raise ValueError(f"Leagues {', '.join(shared)} would share the same standings tables; "
+                         f"give each extra league its own 'tables'")
+    
+    owners = {}
+    for league in leagues:
+        tables = league.get('tables')
+        if tables:
+            missing = [table for table in LEAGUE_TABLES if not tables.get(table)]
+            if missing:
+                raise ValueError(f"League {league['league_id']} 'tables' is missing {', '.join(missing)}; "
+                                 f"it would share those tables with the default league")
+        else:
+            tables = {table: os.environ.get(env_name, table) for table, env_name in LEAGUE_TABLES.items()}
+        for table in LEAGUE_TABLES:
+            owner = owners.setdefault(tables[table], league['league_id'])
+            if owner != league['league_id']:
+                raise ValueError(f"Leagues {owner} and {league['league_id']} both use table '{tables[table]}'")
+    return leagues
+
 class PollingService:
     def __init__(self):
         """Initialize the polling service with AWS clients and environment variables"""
-        self.league_id = os.environ.get('SLEEPER_LEAGUE_ID', '1251986365806034944')
-        self.poll_interval = 10  # seconds
         self.running = True
+        self._stop_event = threading.Event()
+        self._wakeup = threading.Event()  # Set on shutdown and whenever a league finishes a cycle
         
-        # AWS clients
-        self.dynamodb = boto3.resource('dynamodb')
+        # Concurrent DynamoDB I/O shared by all leagues (1 = sequential)
+        self.io_workers = int(os.environ.get('STANDINGS_IO_WORKERS', '8'))
+        self.io_executor = (
+            ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix='ff-standings-io')
+            if self.io_workers > 1 else None
+        )
         
-        # DynamoDB tables
-        self.league_data_table = self.dynamodb.Table(os.environ['LEAGUE_DATA_TABLE'])
-        self.polling_state_table = self.dynamodb.Table(os.environ['POLLING_STATE_TABLE'])
-        self.weekly_standings_table = self.dynamodb.Table(os.environ['WEEKLY_STANDINGS_TABLE'])
-        self.overall_standings_table = self.dynamodb.Table(os.environ['OVERALL_STANDINGS_TABLE'])
+        # Leagues fetched at the same time (bounds Sleeper and pool load)
+        league_configs = load_league_configs()
+        self.max_concurrent_leagues = max(1, min(
+            int(os.environ.get('POLL_MAX_CONCURRENT_LEAGUES', '4')), len(league_configs)
+        ))
+        self.fetch_executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrent_leagues, thread_name_prefix='ff-polling-fetch'
+        )
         
-        # Initialize shared standings service with persistent caching
-        dynamodb_tables = {
-            'league_data': self.league_data_table,
-            'weekly_standings': self.weekly_standings_table,
-            'overall_standings': self.overall_standings_table
-        }
-        self.standings_service = StandingsService(dynamodb_tables, enable_persistent_cache=True)
+        # One keep-alive, retrying HTTP connection pool to Sleeper for every league
+        # (SLEEPER_POOL_SIZE should be at least POLL_MAX_CONCURRENT_LEAGUES + 1)
+        self.sleeper = get_sleeper_client()
         
-        # Initialize storage helper for float-to-decimal conversion
-        self.storage_helper = StandingsStorage(self.weekly_standings_table, self.overall_standings_table)
+        # SLEEPER_RECORD_PATH captures every Sleeper response for sleeper_replay.py
+        self.recorder = None
+        if os.environ.get('SLEEPER_RECORD_PATH'):
+            self.recorder = self.sleeper.recorder = ResponseRecorder(os.environ['SLEEPER_RECORD_PATH'])
+        
+        # Storage backend (DynamoDB by default; STORAGE_BACKEND=memory/sqlite for local runs)
+        # holds the control-plane state and the shared players data
+        self.backend = create_backend_from_env(max_pool_connections=self.io_workers + 2)
+        
+        # Shared TTL-cached NFL state (refreshes at most every NFL_STATE_TTL_SECONDS)
+        self.nfl_state_provider = get_nfl_state_provider()
+        
+        # Players data is league-independent, so every league reads it from one cache
+        self.players_cache = DataCache(enable_persistent_cache=True, backend=self.backend)
+        
+        # Prometheus metrics and health served on STATUS_PORT (the Dockerfile healthcheck hits /health)
+        self.metrics = PollingMetrics()
+        self.started_at = time.monotonic()
+        
+        self.pollers = [self._create_poller(league) for league in league_configs]
+        for backend in {id(b): b for b in [self.backend] + [p.backend for p in self.pollers]}.values():
+            self._add_storage_observer(backend)
+        self.metrics.add_collector(self._collect_stats)
+        self.health_max_age = float(os.environ.get(
+            'HEALTH_MAX_CYCLE_AGE', str(2 * max(p.scheduler.idle_max_interval for p in self.pollers) + 60)
+        ))
+        self.status_server = StatusServer(self.metrics, self.health_check, int(os.environ.get('STATUS_PORT', '8080')))
+        self.poll_interval = min(poller.scheduler.interval for poller in self.pollers)  # seconds
         
         # State tracking
         self.current_week = None
         self.current_season = None
-        self.last_matchup_hash = None
+        
+        # Upper bound for backing off after consecutive failed cycles
+        self.error_max_backoff = float(os.environ.get('ERROR_MAX_BACKOFF', '300'))
+        self._loop_errors = 0
+        
+        # Heartbeat doubles as the enabled-flag check; written at most every HEARTBEAT_INTERVAL seconds
+        self.heartbeat_interval = float(os.environ.get('HEARTBEAT_INTERVAL', '30'))
+        self._last_heartbeat = float('-inf')
+        self.polling_enabled = True  # Keep polling if the state table can't be reached
+        
+        # One runner per league: leases in the polling state table, renewed with the heartbeat.
+        # A standby retries when the holder's lease expires, so it takes over within one lease period.
+        self.lease_seconds = float(os.environ.get('POLLING_LEASE_SECONDS', '90'))
+        self.lease_renew_interval = min(self.heartbeat_interval, self.lease_seconds / 3)
+        self.lease_holder = f'{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        
+        # Seconds from the stop signal to exit: in-flight cycles get half, then writes are flushed.
+        # Keep it below the container stopTimeout so ECS never kills a drain midway.
+        self.shutdown_budget = float(os.environ.get('SHUTDOWN_BUDGET_SECONDS', '25'))
+        self._stop_requested_at = None
         
         # Setup signal handlers for graceful shutdown
         signal.signal(signal.SIGTERM, self.signal_handler)
         signal.signal(signal.SIGINT, self.signal_handler)
         
-        logger.info(f"Polling service initialized for league {self.league_id}")
+        logger.info(f"Polling service initialized for league(s) {', '.join(p.league_id for p in self.pollers)}")
 
+    def _create_poller(self, league):
+        """Build a LeaguePoller over its own view of the shared backend (same connection pool or store)"""
+        # A separate view keeps this league's standings metrics off the control-plane backend
+        backend = self.backend.view(league.get('tables'))
+        standings_service = StandingsService(
+            backend=backend,
+            enable_persistent_cache=True,
+            nfl_state_provider=self.nfl_state_provider.get_state,
+            executor=self.io_executor,
+            metrics=metrics_from_env(),  # STANDINGS_METRICS=log|emf|off
+            players_cache=self.players_cache
+        )
+        return LeaguePoller(league['league_id'], backend, standings_service, self.sleeper, metrics=self.metrics)
+
+    def _add_storage_observer(self, backend):
+        """Feed DynamoDB latencies to /metrics alongside any standings metrics observer"""
+        standings_observer = backend.observer
+        
+        def observe(operation, table, capacity_units=0.0, latency_ms=0.0):
+            if standings_observer is not None:
+                standings_observer(operation, table, capacity_units, latency_ms)
+            self.metrics.observe_storage_call(operation, table, capacity_units, latency_ms)
+        
+        backend.observer = observe
+
+    def _collect_stats(self):
+        """Scrape-time values for /metrics: cache hit ratio inputs, write skips, cycle age"""
+        for result in ('hits', 'misses'):
+            yield ('ff_standings_cache_lookups_total', 'counter', 'Players and team name cache lookups',
+                   {'cache': 'players', 'result': result}, self.players_cache.cache_stats[result])
+        now = time.monotonic()
+        for poller in self.pollers:
+            data_cache = poller.standings_service.data_cache
+            for result in ('hits', 'misses'):
+                yield ('ff_standings_cache_lookups_total', 'counter', 'Players and team name cache lookups',
+                       {'cache': 'team_names', 'league': poller.league_id, 'result': result},
+                       data_cache.cache_stats[result])
+            for result, count in poller.standings_service.storage.write_counts.items():
+                yield ('ff_standings_weekly_rows_total', 'counter', 'Weekly standings rows written or skipped as unchanged',
+                       {'league': poller.league_id, 'result': result}, count)
+            yield ('ff_polling_last_success_age_seconds', 'gauge', 'Seconds since the last successful polling cycle',
+                   {'league': poller.league_id}, round(now - (poller.last_success or self.started_at), 3))
+            yield ('ff_polling_write_failing_seconds', 'gauge', 'Seconds writes have been failing (0 after a good write)',
+                   {'league': poller.league_id}, round(now - (poller.write_failing_since or now), 3))
+            yield ('ff_polling_interval_seconds', 'gauge', 'Current adaptive poll interval',
+                   {'league': poller.league_id}, poller.scheduler.interval)
+            yield ('ff_polling_lease_held', 'gauge', 'Whether this task holds the league polling lease',
+                   {'league': poller.league_id}, int(poller.holds_lease()))
+        
+        sleeper_stats = self.sleeper.stats()
+        for group, bucket in sleeper_stats['buckets'].items():
+            labels = {'endpoint': group}
+            yield ('ff_sleeper_rate_limit_tokens', 'gauge', 'Tokens left in the Sleeper rate limit bucket', labels, round(bucket['tokens'], 3))
+            yield ('ff_sleeper_rate_limit_requests_total', 'counter', 'Requests admitted by the Sleeper rate limiter', labels, bucket['acquired'])
+            yield ('ff_sleeper_rate_limit_throttled_total', 'counter', 'Requests that waited for a rate limit token', labels, bucket['throttled'])
+            yield ('ff_sleeper_rate_limit_wait_seconds_total', 'counter', 'Time spent waiting for rate limit tokens', labels, round(bucket['wait_seconds'], 3))
+        breaker = sleeper_stats['breaker']
+        for state in ('closed', 'open', 'half_open'):
+            yield ('ff_sleeper_circuit_state', 'gauge', 'Sleeper circuit breaker state (1 = current)',
+                   {'state': state}, int(breaker['state'] == state))
+        yield ('ff_sleeper_circuit_opened_total', 'counter', 'Times the Sleeper circuit breaker opened', {}, breaker['times_opened'])
+        yield ('ff_sleeper_circuit_rejected_total', 'counter', 'Calls rejected while the circuit was open', {}, breaker['rejected'])
+
+    def health_check(self):
+        """
+        Healthy while every league this task holds the lease for has completed
+        a cycle within health_max_age seconds and has not had its writes
+        failing for longer than that (a pure standby is healthy).
+        """
+        now = time.monotonic()
+        leased = [poller for poller in self.pollers if poller.holds_lease()]
+        write_failing = {
+            poller.league_id: now - poller.write_failing_since
+            for poller in leased if poller.write_failing_since is not None
+        }
+        ages = {
+            poller.league_id: max(now - (poller.last_success or self.started_at), write_failing.get(poller.league_id, 0.0))
+            for poller in leased
+        }
+        oldest = max(ages.values(), default=0.0)
+        healthy = oldest <= self.health_max_age
+        return healthy, {
+            'status': 'ok' if healthy else 'stale',
+            'last_success_age_seconds': round(oldest, 1),
+            'max_age_seconds': self.health_max_age,
+            'leagues': {league_id: round(age, 1) for league_id, age in ages.items()},
+            'write_failing_seconds': {league_id: round(age, 1) for league_id, age in write_failing.items()},
+            'standby': [poller.league_id for poller in self.pollers if not poller.holds_lease()],
+        }
 
     def signal_handler(self, signum, frame):
         """Handle shutdown signals gracefully"""
         logger.info(f"Received signal {signum}, shutting down gracefully...")
+        if self._stop_requested_at is None:
+            self._stop_requested_at = time.monotonic()
         self.running = False
+        self._stop_event.set()
+        self._wakeup.set()
 
     def get_nfl_state(self):
         """Fetch current NFL state to determine active week"""
         try:
-            response = requests.get('https://api.sleeper.app/v1/state/nfl', timeout=10)
-            response.raise_for_status()
-            nfl_state = response.json()
+            nfl_state = self.nfl_state_provider.get_state()
             
             self.current_season = str(nfl_state.get('season', '2025'))
             self.current_week = nfl_state.get('week', 1)
             
-            logger.info(f"NFL State - Season: {self.current_season}, Week: {self.current_week}")
+            logger.debug(f"NFL State - Season: {self.current_season}, Week: {self.current_week}")
             return nfl_state
             
-        except requests.RequestException as e:
+        except Exception as e:
             logger.error(f"Failed to fetch NFL state: {e}")
             return None
 
-    def fetch_current_matchups(self):
-        """Fetch current week's matchup data from Sleeper API"""
-        if not self.current_week:
-            logger.warning("No current week available, skipping matchup fetch")
-            return None
-            
+    def update_polling_state(self, status='running', force=False, extra=None):
+        """
+        Write the heartbeat and read back the enabled flag in one round trip.
+        
+        Uses update_item (never overwrites 'enabled') with the new item returned,
+        rate-limited to one write per heartbeat_interval unless force is set.
+        extra holds additional attributes to set. Returns the last known enabled flag.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_heartbeat < self.heartbeat_interval:
+            return self.polling_enabled
+        
+        fastest = min(self.pollers, key=lambda poller: poller.scheduler.interval)
         try:
-            url = f'https://api.sleeper.app/v1/league/{self.league_id}/matchups/{self.current_week}'
-            response = requests.get(url, timeout=15)
-            response.raise_for_status()
-            matchups = response.json()
-            
-            logger.info(f"Fetched {len(matchups)} matchups for week {self.current_week}")
-            return matchups
-            
-        except requests.RequestException as e:
-            logger.error(f"Failed to fetch matchups for week {self.current_week}: {e}")
-            return None
+            item = self.backend.update_item('polling_state', {'id': 'polling_status'}, {
+                'status': status,
+                'last_heartbeat': datetime.now(timezone.utc).isoformat(),
+                'current_week': self.current_week,
+                'current_season': self.current_season,
+                'poll_interval': fastest.scheduler.last_decision['interval'],
+                'poll_reason': fastest.scheduler.last_decision['reason'],
+                'leagues': [poller.league_id for poller in self.pollers],
+                **(extra or {})
+            })
+            self._last_heartbeat = now
+            self.polling_enabled = bool(item.get('enabled', False))
+        except Exception as e:
+            logger.warning(f"Failed to update polling state: {e}")
+        return self.polling_enabled
 
-    def calculate_matchup_hash(self, matchups):
-        """Calculate a hash of matchup data to detect changes"""
-        if not matchups:
-            return None
-            
-        # Create a simple hash based on roster IDs and points
-        hash_data = []
-        for matchup in matchups:
-            roster_id = matchup.get('roster_id')
-            points = matchup.get('points', 0)
-            hash_data.append(f"{roster_id}:{points}")
-        
-        return hash("|".join(sorted(hash_data)))
+    def should_continue_polling(self):
+        """Check the enabled flag returned by the last heartbeat"""
+        return self.polling_enabled and self.running
 
-    def store_matchup_data(self, matchups):
-        """Store matchup data in DynamoDB"""
-        try:
-            self.league_data_table.put_item(Item=self.storage_helper.convert_floats_to_decimal({
-                'data_type': 'matchups',
-                'id': f'{self.current_season}_{self.current_week}',
-                'season': self.current_season,
-                'week': self.current_week,
-                'data': matchups,
-                'last_updated': datetime.now(timezone.utc).isoformat(),
-                'source': 'live-polling'
-            }))
-            
-            logger.info(f"Stored matchup data for week {self.current_week}")
+    def maintain_leases(self):
+        """
+        Take, renew or retry each league's single-runner lease when due.
+        
+        A league is only polled while its lease is held. On takeover the
+        previous runner's checkpoint is restored so its unchanged standings
+        aren't rewritten. Returns seconds until the next lease action is due.
+        """
+        now = time.time()
+        for poller in self.pollers:
+            holding = poller.holds_lease(now)
+            if now < (poller.lease_renew_at if holding else poller.lease_retry_at):
+                continue
+            try:
+                acquired, lease = self.backend.acquire_lease(
+                    'polling_state', {'id': poller.lease_id}, self.lease_holder, self.lease_seconds, now
+                )
+            except Exception as e:
+                # Keep working until our current lease runs out, then stand by
+                logger.warning(f"[{poller.league_id}] Failed to renew polling lease: {e}")
+                poller.lease_renew_at = poller.lease_retry_at = now + min(5.0, self.lease_renew_interval)
+                continue
             
-        except Exception as e:
-            logger.error(f"Failed to store matchup data: {e}")
+            if acquired:
+                if not holding:
+                    logger.info(f"[{poller.league_id}] Acquired polling lease as {self.lease_holder}")
+                    poller.reset_change_detection()
+                    poller.restore_checkpoint(self.current_season, self.current_week)
+                poller.lease_expires_at = now + self.lease_seconds
+                poller.lease_renew_at = now + self.lease_renew_interval
+            else:
+                if holding:
+                    logger.warning(f"[{poller.league_id}] Lost polling lease to {lease.get('holder')}")
+                else:
+                    logger.info(f"[{poller.league_id}] Standing by, lease held by {lease.get('holder')}")
+                poller.lease_expires_at = 0.0
+                # Retry right when the holder's lease would expire without a renewal
+                poller.lease_retry_at = max(float(lease.get('expires_at', 0)), now + 1.0)
+        
+        due = [poller.lease_renew_at if poller.holds_lease(now) else poller.lease_retry_at for poller in self.pollers]
+        return max(0.0, min(due) - time.time())
 
+    def release_leases(self, keep=()):
+        """Hand leases back on shutdown (except leagues in keep) so a standby can take over"""
+        for poller in self.pollers:
+            if not poller.holds_lease() or poller.league_id in keep:
+                continue
+            try:
+                self.backend.release_lease('polling_state', {'id': poller.lease_id}, self.lease_holder)
+                poller.lease_expires_at = 0.0
+                logger.info(f"[{poller.league_id}] Released polling lease")
+            except Exception as e:
+                logger.warning(f"[{poller.league_id}] Failed to release polling lease: {e}")
 
-    def update_polling_state(self, status='running'):
-        """Update polling state heartbeat in DynamoDB without overwriting enabled flag"""
+    def poll_league(self, poller, season, week):
+        """Run one cycle for a league and schedule its next one (runs on the fetch pool)"""
         try:
-            # Use update_item instead of put_item to avoid overwriting the 'enabled' field
-            self.polling_state_table.update_item(
-                Key={'id': 'polling_status'},
-                UpdateExpression='SET #status = :status, last_heartbeat = :heartbeat, current_week = :week, current_season = :season',
-                ExpressionAttributeNames={
-                    '#status': 'status'
-                },
-                ExpressionAttributeValues={
-                    ':status': status,
-                    ':heartbeat': datetime.now(timezone.utc).isoformat(),
-                    ':week': self.current_week,
-                    ':season': self.current_season
-                }
-            )
+            changed = poller.poll(season, week)
+            interval = poller.scheduler.next_interval(changed)
         except Exception as e:
-            logger.warning(f"Failed to update polling state: {e}")
+            logger.error(f"[{poller.league_id}] Error in polling cycle: {e}")
+            interval = poller.scheduler.interval
+        if poller.consecutive_errors:
+            interval = max(interval, self.error_backoff(poller.consecutive_errors))
+        poller.next_due = time.monotonic() + interval
+        poller.busy = False
+        # Re-evaluate the schedule as soon as a league finishes
+        self._wakeup.set()
 
-    def should_continue_polling(self):
-        """Check if polling should continue by checking DynamoDB state"""
-        try:
-            response = self.polling_state_table.get_item(Key={'id': 'polling_status'})
-            item = response.get('Item', {})
-            return item.get('enabled', False) and self.running
-        except Exception as e:
-            logger.warning(f"Failed to check polling state: {e}")
-            return self.running
+    def error_backoff(self, consecutive_errors):
+        """
+        Delay after repeated failures: exponential up to ERROR_MAX_BACKOFF, and
+        never before the Sleeper circuit breaker would let a trial call through.
+        """
+        min_interval = min(poller.scheduler.min_interval for poller in self.pollers)
+        backoff = min(min_interval * 2 ** consecutive_errors, self.error_max_backoff)
+        return max(backoff, self.sleeper.breaker.retry_in())
 
     def run_polling_cycle(self):
-        """Execute one polling cycle"""
-        # Update NFL state periodically (every few cycles)
-        if not hasattr(self, '_last_nfl_check') or \
-           (datetime.now().timestamp() - self._last_nfl_check) > 300:  # 5 minutes
-            self.get_nfl_state()
-            self._last_nfl_check = datetime.now().timestamp()
-
-        # Fetch current matchups
-        matchups = self.fetch_current_matchups()
+        """
+        Start a cycle for every league that is due and not already running.
         
-        if matchups:
-            # Calculate hash to detect changes
-            new_hash = self.calculate_matchup_hash(matchups)
-            
-            if new_hash != self.last_matchup_hash:
-                logger.info("Matchup data changed, updating standings...")
-                
-                # Store updated matchup data
-                self.store_matchup_data(matchups)
-                
-                # Calculate and store standings directly (no Lambda call!)
-                try:
-                    weekly_results = self.standings_service.calculate_and_store(
-                        matchups, 
-                        self.current_season, 
-                        self.current_week,
-                        include_player_details=True  # Include full roster details
-                    )
-                    logger.info(f"Updated standings for {len(weekly_results)} teams")
-                except Exception as e:
-                    logger.error(f"Failed to calculate standings: {e}")
-                
-                # Update hash
-                self.last_matchup_hash = new_hash
-                
-            else:
-                logger.debug("No changes in matchup data")
+        Returns seconds until the next league is due.
+        """
+        # Cleared before checking so a league finishing from here on wakes the loop
+        self._wakeup.clear()
+        
+        # Update NFL state (served from the shared cache between refreshes)
+        self.get_nfl_state()
+        
+        lease_wait = self.maintain_leases()
+        
+        now = time.monotonic()
+        leased = [poller for poller in self.pollers if poller.holds_lease()]
+        for poller in leased:
+            if not poller.busy and poller.next_due <= now:
+                poller.busy = True
+                self.fetch_executor.submit(self.poll_league, poller, self.current_season, self.current_week)
         
         # Update polling state heartbeat
-        self.update_polling_state('running')
+        self.update_polling_state('running' if leased else 'standby')
+        
+        idle = [poller.next_due for poller in leased if not poller.busy]
+        self.poll_interval = min(poller.scheduler.interval for poller in self.pollers)
+        poll_wait = max(0.0, min(idle) - time.monotonic()) if idle else self.poll_interval
+        return min(poll_wait, lease_wait)
 
     def run(self):
         """Main polling loop"""
         logger.info("Starting polling service...")
+        try:
+            self.status_server.start()
+        except OSError as e:
+            logger.warning(f"Status server unavailable: {e}")
         
         # Initial setup
         self.get_nfl_state()
-        self.standings_service.load_cache()  # Load players and team names once
-        self.update_polling_state('starting')
+        for poller in self.pollers:
+            poller.standings_service.load_cache()  # Players load once; team names per league
+        self.update_polling_state('starting', force=True)
+        
+        # Stagger leagues across the shortest interval so Sleeper sees an even request rate
+        start = time.monotonic()
+        for i, poller in enumerate(self.pollers):
+            poller.next_due = start + i * poller.scheduler.min_interval / len(self.pollers)
         
         while self.should_continue_polling():
             try:
-                start_time = time.time()
-                
-                # Run polling cycle
-                self.run_polling_cycle()
-                
-                # Calculate sleep time to maintain consistent interval
-                elapsed_time = time.time() - start_time
-                sleep_time = max(0, self.poll_interval - elapsed_time)
+                sleep_time = self.run_polling_cycle()
+                self._loop_errors = 0
                 
                 if sleep_time > 0:
-                    logger.debug(f"Sleeping for {sleep_time:.2f} seconds")
-                    time.sleep(sleep_time)
+                    logger.debug(f"Sleeping for up to {sleep_time:.2f} seconds")
+                    self._wakeup.wait(sleep_time)
                     
             except Exception as e:
-                logger.error(f"Error in polling cycle: {e}")
-                # Sleep on error to avoid rapid failure loops
-                time.sleep(self.poll_interval)
+                self._loop_errors += 1
+                backoff = self.error_backoff(self._loop_errors)
+                logger.error(f"Error in polling cycle ({self._loop_errors} in a row), retrying in {backoff:.0f}s: {e}")
+                # Back off exponentially to avoid rapid failure loops
+                self._stop_event.wait(backoff)
+        
+        return self.drain()
+
+    def drain(self):
+        """
+        Shut down within shutdown_budget seconds of the stop signal.
         
-        logger.info("Polling service stopped")
-        self.update_polling_state('stopped')
+        In-flight fetch cycles get half of the budget to finish and are then
+        abandoned (their snapshots are not written). Queued writes are flushed
+        until the deadline; a league whose writes can't finish keeps its lease
+        and old checkpoint, so the next runner rewrites the week. Flushed
+        leagues get a final checkpoint and release their lease. Returns the
+        shutdown report, which is also stored on the polling status item.
+        """
+        started = self._stop_requested_at or time.monotonic()
+        deadline = started + self.shutdown_budget
+        logger.info(f"Draining, {max(0.0, deadline - time.monotonic()):.1f}s of shutdown budget left")
+        
+        # Let running cycles finish (poll_league sets _wakeup when one does)
+        cycle_deadline = time.monotonic() + max(0.0, deadline - time.monotonic()) / 2
+        while True:
+            self._wakeup.clear()
+            remaining = cycle_deadline - time.monotonic()
+            if not any(poller.busy for poller in self.pollers) or remaining <= 0:
+                break
+            self._wakeup.wait(remaining)
+        abandoned_cycles = [poller.league_id for poller in self.pollers if poller.busy]
+        for poller in self.pollers:
+            poller.stop_accepting()
+        self.fetch_executor.shutdown(wait=False, cancel_futures=True)
+        
+        # Flush queued writes, then checkpoint what was written
+        unflushed = [
+            poller.league_id for poller in self.pollers
+            if not poller.close(max(0.0, deadline - time.monotonic()))
+        ]
+        for poller in self.pollers:
+            if poller.league_id not in unflushed and poller.team_digests is not None and poller.holds_lease():
+                poller.save_checkpoint()
+        self.release_leases(keep=unflushed)
+        if self.io_executor is not None:
+            self.io_executor.shutdown(wait=not unflushed, cancel_futures=True)
+        self.sleeper.close()
+        if self.recorder is not None:
+            self.recorder.close()
+        
+        report = {
+            'duration_seconds': round(time.monotonic() - started, 2),
+            'budget_seconds': self.shutdown_budget,
+            'abandoned_cycles': abandoned_cycles,
+            'unflushed_leagues': unflushed,
+            'dropped_snapshots': sum(poller.dropped_snapshots for poller in self.pollers),
+            'completed_at': datetime.now(timezone.utc).isoformat()
+        }
+        self.update_polling_state('stopped', force=True, extra={'last_shutdown': report})
+        self.status_server.stop()
+        log = logger.warning if abandoned_cycles or unflushed else logger.info
+        log(f"Polling service stopped in {report['duration_seconds']:.2f}s (budget {self.shutdown_budget:.0f}s), "
+            f"abandoned cycles: {abandoned_cycles or 'none'}, unflushed writes: {unflushed or 'none'}")
+        return report
 
 def main():
     """Main entry point"""
@@ -252,7 +530,11 @@ def main():
     
     try:
         service = PollingService()
-        service.run()
+        report = service.run()
+        if report['abandoned_cycles'] or report['unflushed_leagues']:
+            # Abandoned threads would hold the interpreter open until their requests time out
+            logging.shutdown()
+            os._exit(0)
     except KeyboardInterrupt:
         logger.info("Received keyboard interrupt, shutting down...")
     except Exception as e:
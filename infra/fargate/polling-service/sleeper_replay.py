@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Record and replay Sleeper traffic for offline polling benchmarks.
+
+Recording: run the polling service with SLEEPER_RECORD_PATH=/path/game.jsonl
+and every Sleeper response it sees (/state/nfl, /league/.../matchups/...)
+is appended to that file with its timestamp.
+
+Replay: serve a recording from a local fake Sleeper server and run the
+real PollingService against it with an in-memory (or SQLite) backend:
+
+    python3 sleeper_replay.py game.jsonl --speed 10
+    python3 sleeper_replay.py game.jsonl --speed max --json
+
+At 1x/10x the recording plays back on a scaled clock and the poll
+intervals are scaled to match. At max, each matchups request advances
+that league to its next recorded response and the service polls as fast
+as it can. Prints cycle latency percentiles, storage write counts and CPU.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+WRITE_OPERATIONS = ('put_item', 'batch_write_item', 'update_item')
+
+# Tables every extra league of a multi-league replay gets to itself (see load_league_configs)
+PER_LEAGUE_TABLES = ('league_data', 'weekly_standings', 'overall_standings')
+
+
+class Recording:
+    """Recorded responses grouped by path, in time order"""
+
+    def __init__(self, entries):
+        self.by_path = {}
+        for entry in sorted(entries, key=lambda e: e['t']):
+            self.by_path.setdefault(entry['path'], []).append(entry)
+        times = [entry['t'] for entry in entries]
+        self.start = min(times)
+        self.end = max(times)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        if not entries:
+            raise ValueError(f"No responses recorded in {path}")
+        return cls(entries)
+
+    @property
+    def league_ids(self):
+        return sorted({path.split('/')[2] for path in self.by_path if '/matchups/' in path})
+
+    @property
+    def matchup_responses(self):
+        return sum(len(entries) for path, entries in self.by_path.items() if '/matchups/' in path)
+
+
+class ReplayClock:
+    """
+    Chooses which recorded response to serve.
+
+    With a numeric speed, recorded time advances speed times faster than
+    wall time and each path serves its latest response at or before it.
+    With speed None (max), each matchups request steps that path to its
+    next response, and other paths follow the slowest matchups cursor.
+    """
+
+    def __init__(self, recording, speed):
+        self.recording = recording
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._cursors = {path: 0 for path in recording.by_path if '/matchups/' in path}
+
+    def now(self):
+        if self.speed is None:
+            with self._lock:
+                return min(
+                    self.recording.by_path[path][min(cursor, len(self.recording.by_path[path]) - 1)]['t']
+                    for path, cursor in self._cursors.items()
+                ) if self._cursors else self.recording.end
+        return self.recording.start + (time.monotonic() - self._started) * self.speed
+
+    def finished(self):
+        if self.speed is None:
+            with self._lock:
+                return all(cursor >= len(self.recording.by_path[path]) for path, cursor in self._cursors.items())
+        return self.now() > self.recording.end
+
+    def response_for(self, path):
+        entries = self.recording.by_path.get(path)
+        if not entries:
+            return None
+        if self.speed is None and path in self._cursors:
+            with self._lock:
+                index = self._cursors[path]
+                self._cursors[path] = index + 1
+            return entries[min(index, len(entries) - 1)]
+        now = self.now()
+        current = entries[0]
+        for entry in entries:
+            if entry['t'] > now:
+                break
+            current = entry
+        return current
+
+
+class FakeSleeperServer:
+    """Local HTTP server answering Sleeper API paths from a ReplayClock"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.requests = 0
+        clock_ref = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+            disable_nagle_algorithm = True  # Don't add delayed-ACK stalls to the measured latency
+
+            def do_GET(self):
+                clock_ref.requests += 1
+                entry = clock_ref.clock.response_for(self.path)
+                status = entry['status'] if entry else 404
+                body = (entry['body'] if entry else 'null').encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self._server.server_address[1]}'
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, name='fake-sleeper', daemon=True).start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def sample_values(samples, name, **labels):
+    """Raw observations of one histogram whose labels include the given ones"""
+    values = []
+    for (metric, metric_labels), observations in samples.items():
+        if metric == name and all(dict(metric_labels).get(k) == v for k, v in labels.items()):
+            values.extend(observations)
+    return values
+
+
+def percentiles(values):
+    if not values:
+        return {'count': 0}
+    ordered = sorted(values)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return {
+        'count': len(ordered),
+        'p50_ms': round(pick(0.50), 2),
+        'p90_ms': round(pick(0.90), 2),
+        'p99_ms': round(pick(0.99), 2),
+        'max_ms': round(ordered[-1] * 1000, 2),
+    }
+
+
+def configure_environment(server_url, recording, speed, backend):
+    """Point the service at the fake server and a local backend, with intervals scaled to speed"""
+    scale = 1.0 / speed if speed else 0.0
+    leagues = recording.league_ids
+    os.environ.update({
+        'SLEEPER_BASE_URL': server_url,
+        'STORAGE_BACKEND': backend,
+        'STANDINGS_METRICS': 'off',
+        'STATUS_PORT': '0',
+        'POLL_MIN_INTERVAL': str(max(10 * scale, 0.001)),
+        'POLL_LIVE_MAX_INTERVAL': str(max(30 * scale, 0.001)),
+        'POLL_IDLE_MAX_INTERVAL': str(max(30 * scale, 0.001)),  # Treat the whole replay as a game window
+        'NFL_STATE_TTL_SECONDS': str(max(int(300 * scale), 0)),
+        'HEARTBEAT_INTERVAL': str(30 * scale),
+        # No client-side throttling against the local server
+        'SLEEPER_RATE_LIMITS': json.dumps({group: {'rate': 1e6, 'burst': 1e6}
+                                           for group in ('total', 'matchups', 'league', 'state', 'players')}),
+    })
+    if backend == 'sqlite':
+        # Fresh database per replay, so no checkpoint from an earlier run skips writes
+        os.environ['SQLITE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='ff-replay-'), 'ff-replay.db')
+    if len(leagues) == 1:
+        os.environ['SLEEPER_LEAGUE_ID'] = leagues[0]
+        os.environ.pop('POLLING_LEAGUES', None)
+    else:
+        # Extra leagues get their own copy of every per-league table
+        os.environ['POLLING_LEAGUES'] = json.dumps(
+            [leagues[0]] + [{'league_id': league_id,
+                             'tables': {table: f'{table}_{league_id}' for table in PER_LEAGUE_TABLES}}
+                            for league_id in leagues[1:]]
+        )
+
+
+def seed_backend(service):
+    """Minimal reference data and an enabled polling flag"""
+    service.backend.put_item('league_data', {
+        'data_type': 'players',
+        'id': 'nfl_players',
+        'data': {},
+        'last_updated': 'replay'
+    })
+    service.backend.update_item('polling_state', {'id': 'polling_status'}, {'enabled': True})
+
+
+def replay(recording_path, speed, backend='memory'):
+    recording = Recording.load(recording_path)
+    clock = ReplayClock(recording, speed)
+    server = FakeSleeperServer(clock)
+    server.start()
+    configure_environment(server.url, recording, speed, backend)
+
+    # Imported after the environment is set: the shared Sleeper client reads it on creation
+    from polling_service import PollingService
+
+    service = PollingService()
+    service.metrics.keep_samples()
+    seed_backend(service)
+
+    def stop_when_finished():
+        while not clock.finished() and service.running:
+            time.sleep(0.01)
+        service.signal_handler('replay-finished', None)
+
+    threading.Thread(target=stop_when_finished, name='replay-watch', daemon=True).start()
+    wall_started = time.perf_counter()
+    cpu_started = time.process_time()
+    service.run()
+    wall = time.perf_counter() - wall_started
+    cpu = time.process_time() - cpu_started
+    server.stop()
+
+    samples = service.metrics.samples
+    storage_counts = {}
+    for labels, count in service.metrics.counts('ff_dynamodb_request_duration_seconds').items():
+        operation = dict(labels)['operation']
+        storage_counts[operation] = storage_counts.get(operation, 0) + count
+    cycles = {}
+    for labels, value in service.metrics.counter_values('ff_polling_cycles_total').items():
+        outcome = dict(labels)['outcome']
+        cycles[outcome] = cycles.get(outcome, 0) + value
+
+    return {
+        'recording': recording_path,
+        'speed': f'{speed}x' if speed else 'max',
+        'leagues': recording.league_ids,
+        'recorded_matchup_responses': recording.matchup_responses,
+        'recorded_seconds': round(recording.end - recording.start, 1),
+        'wall_seconds': round(wall, 2),
+        'cpu_seconds': round(cpu, 2),
+        'cpu_percent': round(100 * cpu / wall, 1) if wall else 0.0,
+        'sleeper_requests': server.requests,
+        'cycles': cycles,
+        'dropped_snapshots': sum(poller.dropped_snapshots for poller in service.pollers),
+        'fetch_cycle': percentiles(sample_values(samples, 'ff_polling_cycle_duration_seconds', phase='fetch')),
+        'write_cycle': percentiles(sample_values(samples, 'ff_polling_cycle_duration_seconds', phase='write')),
+        'sleeper_latency': percentiles(sample_values(samples, 'ff_sleeper_request_duration_seconds')),
+        'storage_calls': storage_counts,
+        'storage_writes': sum(storage_counts.get(operation, 0) for operation in WRITE_OPERATIONS),
+    }
+
+
+def print_report(report):
+    print(f"Replay of {report['recording']} at {report['speed']} "
+          f"({len(report['leagues'])} league(s), {report['recorded_matchup_responses']} recorded matchup responses "
+          f"over {report['recorded_seconds']}s)")
+    print(f"  wall {report['wall_seconds']}s, cpu {report['cpu_seconds']}s ({report['cpu_percent']}%)")
+    print(f"  cycles {report['cycles']}, dropped snapshots {report['dropped_snapshots']}, "
+          f"sleeper requests {report['sleeper_requests']}")
+    for name in ('fetch_cycle', 'write_cycle', 'sleeper_latency'):
+        stats = report[name]
+        if stats['count']:
+            print(f"  {name:16} n={stats['count']:<5} p50={stats['p50_ms']}ms p90={stats['p90_ms']}ms "
+                  f"p99={stats['p99_ms']}ms max={stats['max_ms']}ms")
+    print(f"  storage writes {report['storage_writes']} {report['storage_calls']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay recorded Sleeper traffic against the polling service')
+    parser.add_argument('recording', help='JSONL file written with SLEEPER_RECORD_PATH')
+    parser.add_argument('--speed', default='1', help="Playback speed multiplier, or 'max'")
+    parser.add_argument('--backend', default='memory', choices=('memory', 'sqlite'), help='Local storage backend')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    parser.add_argument('--verbose', action='store_true', help='Show the service log')
+    args = parser.parse_args()
+
+    # Configured before the service module is imported so its INFO logging stays quiet
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    speed = None if args.speed == 'max' else float(args.speed)
+    report = replay(args.recording, speed, args.backend)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
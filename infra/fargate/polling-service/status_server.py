@@ -0,0 +1,187 @@
+"""
+Embedded health and Prometheus metrics endpoint for the live polling service.
+
+Serves GET /health (JSON with the age of each league's last successful
+cycle; 503 once any league is stale) and GET /metrics (Prometheus text
+exposition format) from a daemon thread, using only the standard library.
+"""
+
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Seconds; Sleeper and DynamoDB calls are tens to hundreds of ms, cycles up to a few seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HISTOGRAMS = {
+    'ff_polling_cycle_duration_seconds': 'Duration of polling cycle phases (fetch, write)',
+    'ff_sleeper_request_duration_seconds': 'Sleeper API request latency',
+    'ff_dynamodb_request_duration_seconds': 'DynamoDB request latency',
+}
+
+COUNTERS = {
+    'ff_polling_cycles_total': 'Polling cycles by outcome (changed, unchanged, error)',
+    'ff_polling_dropped_snapshots_total': 'Changed snapshots replaced by a newer one before being written',
+    'ff_polling_write_errors_total': 'Snapshots whose standings or matchup writes failed',
+}
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    rendered = ','.join(f'{name}="{str(value)}"' for name, value in labels)
+    return '{' + rendered + '}'
+
+
+class PollingMetrics:
+    """
+    Thread-safe histograms and counters plus scrape-time collectors.
+
+    Collectors are callables returning (name, type, help, labels dict, value)
+    tuples, for values that already live elsewhere (cache and write stats).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+        self._counters = {}    # (name, labels) -> value
+        self._collectors = []
+        self.samples = None    # (name, labels) -> raw observations, once keep_samples() is called
+
+    def keep_samples(self):
+        """Also keep raw histogram observations (for offline replays and percentiles)"""
+        with self._lock:
+            if self.samples is None:
+                self.samples = {}
+
+    def observe(self, name, seconds, **labels):
+        """Record one histogram observation"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            entry = self._histograms.get(key)
+            if entry is None:
+                entry = self._histograms[key] = [0] * len(LATENCY_BUCKETS) + [0.0, 0]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    entry[i] += 1
+            entry[-2] += seconds
+            entry[-1] += 1
+            if self.samples is not None:
+                self.samples.setdefault(key, []).append(seconds)
+
+    def inc(self, name, amount=1, **labels):
+        """Increment a counter"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def counts(self, name):
+        """Observation counts for one histogram, keyed by label dict items"""
+        with self._lock:
+            return {labels: entry[-1] for (metric, labels), entry in self._histograms.items() if metric == name}
+
+    def counter_values(self, name):
+        """Values of one counter, keyed by label dict items"""
+        with self._lock:
+            return {labels: value for (metric, labels), value in self._counters.items() if metric == name}
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def observe_storage_call(self, operation, table, capacity_units=0.0, latency_ms=0.0):
+        """Backend observer hook"""
+        self.observe('ff_dynamodb_request_duration_seconds', latency_ms / 1000, operation=operation, table=table)
+
+    def render(self):
+        """Prometheus text exposition of everything recorded so far"""
+        with self._lock:
+            histograms = {key: list(entry) for key, entry in self._histograms.items()}
+            counters = dict(self._counters)
+
+        lines = []
+        for name, help_text in HISTOGRAMS.items():
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+            for (metric, labels), entry in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                for bound, count in zip(LATENCY_BUCKETS, entry):
+                    lines.append(f'{name}_bucket{_format_labels(labels + (("le", bound),))} {count}')
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {entry[-1]}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {entry[-2]}')
+                lines.append(f'{name}_count{_format_labels(labels)} {entry[-1]}')
+        for name, help_text in COUNTERS.items():
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{name}{_format_labels(labels)} {value}')
+
+        collected = {}
+        for collector in self._collectors:
+            try:
+                for name, metric_type, help_text, labels, value in collector():
+                    collected.setdefault((name, metric_type, help_text), []).append((labels, value))
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+        for (name, metric_type, help_text), samples in collected.items():
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {metric_type}']
+            for labels, value in samples:
+                lines.append(f'{name}{_format_labels(tuple(sorted(labels.items())))} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+class StatusServer:
+    def __init__(self, metrics, health_check, port=8080):
+        """
+        Args:
+            metrics: PollingMetrics rendered at /metrics
+            health_check: Callable returning (healthy, details dict) for /health
+            port: Port to listen on
+        """
+        self.metrics = metrics
+        self.health_check = health_check
+        self.port = port
+        self._server = None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/health':
+                    healthy, details = server.health_check()
+                    self._respond(200 if healthy else 503, 'application/json', json.dumps(details))
+                elif self.path == '/metrics':
+                    self._respond(200, 'text/plain; version=0.0.4', server.metrics.render())
+                else:
+                    self._respond(404, 'text/plain', 'not found\n')
+
+            def _respond(self, status, content_type, body):
+                payload = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                # Healthchecks every 30s would otherwise flood the service log
+                logger.debug(f"{self.address_string()} {format % args}")
+
+        return Handler
+
+    def start(self):
+        """Start serving on a daemon thread"""
+        self._server = ThreadingHTTPServer(('0.0.0.0', self.port), self._handler())
+        self._server.daemon_threads = True
+        thread = threading.Thread(target=self._server.serve_forever, name='ff-status-server', daemon=True)
+        thread.start()
+        logger.info(f"Status server listening on port {self.port} (/health, /metrics)")
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
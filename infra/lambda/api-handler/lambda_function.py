@@ -3,17 +3,22 @@ import boto3
 import os
 import requests
 import logging
+from datetime import datetime, timezone
 
 # Import shared utilities
 from ff_utils.dynamodb import convert_floats_to_decimal, DecimalEncoder, get_cors_headers
 from ff_utils.auth import validate_admin_key
+from ff_utils.nfl_state import get_nfl_state
+from ff_utils.sleeper import get_sleeper_client
+from ff_utils.polling_task import (
+    TASK_STARTED, TASK_STARTING, start_polling_task, stop_polling_tasks, next_transition
+)
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 dynamodb = boto3.resource('dynamodb')
-ecs = boto3.client('ecs')
 lambda_client = boto3.client('lambda')
 
 def lambda_handler(event, context):
@@ -83,7 +88,7 @@ def lambda_handler(event, context):
                     'headers': get_cors_headers(),
                     'body': json.dumps({'error': 'Admin access required'})
                 }
-            return handle_sync_historical(context)
+            return handle_sync_historical(context, query_params.get('mode'), query_params.get('all_seasons') == 'true')
         
         # Fetch players endpoint (admin only)
         elif 'players' in path and http_method == 'GET':
@@ -166,11 +171,9 @@ def handle_overall_standings(table, query_params):
     }
 
 def handle_nfl_state():
-    """Get current NFL state from Sleeper API"""
+    """Get current NFL state (cached across warm invocations)"""
     try:
-        response = requests.get('https://api.sleeper.app/v1/state/nfl', timeout=10)
-        response.raise_for_status()
-        nfl_state = response.json()
+        nfl_state = get_nfl_state()
         
         return {
             'statusCode': 200,
@@ -182,7 +185,7 @@ def handle_nfl_state():
                 'display_week': nfl_state.get('display_week')
             })
         }
-    except requests.RequestException as e:
+    except Exception as e:
         logger.error(f"Failed to fetch NFL state: {e}")
         return {
             'statusCode': 500,
@@ -205,7 +208,9 @@ def handle_polling_status(table):
             'headers': get_cors_headers(),
             'body': json.dumps({
                 'enabled': enabled,
-                'last_updated': item.get('last_updated', '')
+                'last_updated': item.get('last_updated', ''),
+                'schedule_reason': item.get('schedule_reason'),
+                'manual_until': int(item['manual_until']) if item.get('manual_until') else None
             })
         }
     except Exception as e:
@@ -220,83 +225,44 @@ def handle_polling_toggle(table, context=None):
     """Start or stop the polling Fargate service with rollback on failure"""
     try:
         # Get current status
-        response = table.get_item(Key={'id': 'polling_status'})
+        response = table.get_item(Key={'id': 'polling_status'}, ConsistentRead=True)
         current_item = response.get('Item', {})
         current_enabled = current_item.get('enabled', False)
         
         # Toggle the status
         new_enabled = not current_enabled
-        cluster_arn = os.environ['ECS_CLUSTER_ARN']
+        now = datetime.now(timezone.utc)
+        # The scheduler leaves a manual toggle alone until it would next flip polling itself
+        manual_until = int(next_transition(now).timestamp())
         
         if new_enabled:
             # Starting polling service - try ECS operation first, then update DynamoDB
-            subnet_ids = os.environ['SUBNET_IDS'].split(',')
-            security_group_id = os.environ['SECURITY_GROUP_ID']
-            task_definition_arn = os.environ['POLLING_TASK_DEFINITION_ARN']
-            
             try:
-                ecs_response = ecs.run_task(
-                    cluster=cluster_arn,
-                    taskDefinition=task_definition_arn,
-                    launchType='FARGATE',
-                    networkConfiguration={
-                        'awsvpcConfiguration': {
-                            'subnets': subnet_ids,
-                            'securityGroups': [security_group_id],
-                            'assignPublicIp': 'ENABLED'
-                        }
-                    },
-                    tags=[
-                        {'key': 'Service', 'value': 'ff-polling'},
-                        {'key': 'ManagedBy', 'value': 'api-handler'}
-                    ]
-                )
-                
-                # Check if task actually started successfully
-                if ecs_response.get('failures'):
-                    failure_reasons = [f['reason'] for f in ecs_response['failures']]
-                    raise Exception(f"ECS task failed to start: {', '.join(failure_reasons)}")
-                
-                # Success - update DynamoDB state
-                table.put_item(Item={
-                    'id': 'polling_status',
-                    'enabled': new_enabled,
-                    'last_updated': getattr(context, 'aws_request_id', 'manual') if context else 'manual',
-                    'task_arn': ecs_response['tasks'][0]['taskArn'] if ecs_response.get('tasks') else None
-                })
-                
-                message = 'Polling service started successfully'
-                
+                task_arn, outcome = start_polling_task(table, 'api-handler')
             except Exception as ecs_error:
                 # ECS failed - don't update DynamoDB, re-raise error
                 logger.error(f"ECS run_task failed: {ecs_error}")
                 raise Exception(f"Failed to start polling service: {str(ecs_error)}")
+            
+            # Success - update DynamoDB state (update_item keeps the service's heartbeat fields)
+            set_polling_enabled(table, True, context, manual_until, task_arn)
+            if outcome == TASK_STARTED:
+                message = 'Polling service started successfully'
+            elif outcome == TASK_STARTING:
+                message = 'Polling service start already in progress'
+            else:
+                message = 'Polling service already running'
                 
         else:
             # Stopping polling service - update DynamoDB first, then try to stop tasks
-            table.put_item(Item={
-                'id': 'polling_status',
-                'enabled': new_enabled,
-                'last_updated': getattr(context, 'aws_request_id', 'manual') if context else 'manual'
-            })
+            set_polling_enabled(table, False, context, manual_until)
             
             try:
-                tasks = ecs.list_tasks(
-                    cluster=cluster_arn,
-                    family='ff-polling-service',
-                    desiredStatus='RUNNING'
-                )
-                
-                if len(tasks['taskArns']) == 0:
+                stopped = stop_polling_tasks('Manual stop via API')
+                if stopped == 0:
                     message = 'No polling tasks were running'
                 else:
-                    for task_arn in tasks['taskArns']:
-                        ecs.stop_task(
-                            cluster=cluster_arn,
-                            task=task_arn,
-                            reason='Manual stop via API'
-                        )
-                    message = f'Stopped {len(tasks["taskArns"])} polling task(s)'
+                    message = f'Stopped {stopped} polling task(s)'
                     
             except Exception as stop_error:
                 # Stop failed, but DynamoDB is already updated (which is okay for stopping)
@@ -308,7 +274,8 @@ def handle_polling_toggle(table, context=None):
             'headers': get_cors_headers(),
             'body': json.dumps({
                 'enabled': new_enabled,
-                'message': message
+                'message': message,
+                'manual_until': datetime.fromtimestamp(manual_until, timezone.utc).isoformat()
             })
         }
         
@@ -320,6 +287,19 @@ def handle_polling_toggle(table, context=None):
             'body': json.dumps({'error': 'Failed to toggle polling'})
         }
 
+def set_polling_enabled(table, enabled, context, manual_until, task_arn=None):
+    """Record a manual toggle on the polling status item"""
+    update = 'SET enabled = :enabled, last_updated = :updated, manual_until = :until'
+    values = {
+        ':enabled': enabled,
+        ':updated': getattr(context, 'aws_request_id', 'manual') if context else 'manual',
+        ':until': manual_until
+    }
+    if task_arn:
+        update += ', task_arn = :task'
+        values[':task'] = task_arn
+    table.update_item(Key={'id': 'polling_status'}, UpdateExpression=update, ExpressionAttributeValues=values)
+
 def handle_calculate_playoffs(context=None):
     """Invoke Monte Carlo Lambda function for playoff simulation"""
     try:
@@ -351,8 +331,20 @@ def handle_calculate_playoffs(context=None):
             'body': json.dumps({'error': 'Failed to start Monte Carlo simulation'})
         }
 
-def handle_sync_historical(context=None):
-    """Trigger historical data backfill"""
+def handle_sync_historical(context=None, mode=None, all_seasons=False):
+    """
+    Trigger historical data backfill.
+    
+    ?mode=fanout spreads seasons and weeks over separate invocations;
+    ?all_seasons=true also backfills the league's past seasons.
+    """
+    if mode not in (None, 'single', 'fanout'):
+        return {
+            'statusCode': 400,
+            'headers': get_cors_headers(),
+            'body': json.dumps({'error': 'mode must be single or fanout'})
+        }
+    
     try:
         function_name = os.environ['HISTORICAL_BACKFILL_FUNCTION']
         
@@ -362,7 +354,9 @@ def handle_sync_historical(context=None):
             InvocationType='Event',  # Async
             Payload=json.dumps({
                 'source': 'api-manual-trigger',
-                'trigger_time': getattr(context, 'aws_request_id', 'manual') if context else 'manual'
+                'trigger_time': getattr(context, 'aws_request_id', 'manual') if context else 'manual',
+                'mode': mode or 'single',
+                'all_seasons': all_seasons
             })
         )
         
@@ -370,7 +364,9 @@ def handle_sync_historical(context=None):
             'statusCode': 200,
             'headers': get_cors_headers(),
             'body': json.dumps({
-                'message': 'Historical data sync started'
+                'message': 'Historical data sync started',
+                'mode': mode or 'single',
+                'all_seasons': all_seasons
             })
         }
         
@@ -402,15 +398,11 @@ def handle_fetch_players():
     try:
         # Get current season from NFL state
         logger.info("Fetching NFL state...")
-        nfl_state_response = requests.get('https://api.sleeper.app/v1/state/nfl', timeout=30)
-        nfl_state_response.raise_for_status()
-        season = nfl_state_response.json().get('season', '2025')
+        season = get_nfl_state().get('season', '2025')
         
         # Fetch players data from Sleeper API
         logger.info("Fetching players data from Sleeper API...")
-        response = requests.get('https://api.sleeper.app/v1/players/nfl', timeout=30)
-        response.raise_for_status()
-        players_data = response.json()
+        players_data = get_sleeper_client().get_players()
         
         # Store in DynamoDB league data table using chunked approach
         league_data_table = dynamodb.Table(os.environ['LEAGUE_DATA_TABLE'])
@@ -451,6 +443,7 @@ def handle_fetch_players():
             'data': filtered_players_dict,
             'player_count': len(filtered_players_dict),
             'storage_strategy': 'filtered_v1',
+            'last_updated': datetime.now(timezone.utc).isoformat(),  # players data version
             'filtering_info': {
                 'original_count': len(players_data),
                 'filtered_count': len(filtered_players_dict),
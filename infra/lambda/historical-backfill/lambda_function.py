@@ -3,27 +3,72 @@ import boto3
 import os
 import requests
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime
 from decimal import Decimal
 
+from botocore.exceptions import ClientError
+
 # Import shared libraries
-from ff_standings import StandingsService
-from ff_utils.dynamodb import convert_floats_to_decimal
+from ff_standings import StandingsService, DataCache, metrics_from_env, stable_digest
+from ff_standings.metrics import stage
+from ff_utils.dynamodb import convert_floats_to_decimal, content_hash, load_content_hashes, save_content_hashes
+from ff_utils.nfl_state import get_nfl_state_provider
+from ff_utils.sleeper import get_sleeper_client
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 dynamodb = boto3.resource('dynamodb')
+lambda_client = boto3.client('lambda')
+
+# Weeks fetched from Sleeper at once (1 processes them one after another);
+# the Sleeper client's rate limiter still applies across threads
+BACKFILL_CONCURRENCY = int(os.environ.get('BACKFILL_CONCURRENCY', '4'))
+
+# Weeks written and checkpointed together
+CHECKPOINT_WEEKS = int(os.environ.get('BACKFILL_CHECKPOINT_WEEKS', '4'))
+
+# Fan-out mode: weeks handled by each worker invocation
+FANOUT_WEEKS_PER_WORKER = int(os.environ.get('BACKFILL_FANOUT_WEEKS_PER_WORKER', '1'))
+
+# With less time than this left, checkpoint and continue in a fresh invocation
+TIME_MARGIN_SECONDS = int(os.environ.get('BACKFILL_TIME_MARGIN_SECONDS', '45'))
+
+# Seasons backfilled at once with all_seasons; bounds how many seasons' matchups are in memory
+SEASON_CONCURRENCY = int(os.environ.get('BACKFILL_SEASON_CONCURRENCY', '2'))
+
+# Regular season plus playoffs, for past leagues whose settings lack last_scored_leg
+DEFAULT_SEASON_WEEKS = 17
 
 def lambda_handler(event, context):
     """
     Historical data backfill Lambda:
     1. Fetch current NFL state to determine completed weeks
-    2. For each completed week, fetch matchup data from Sleeper
-    3. Store league data (users, rosters, players) if not already cached
-    4. Calculate and store standings directly using shared library
+    2. Store league data (users, rosters, players) if not already cached
+    3. Fetch matchup data for all completed weeks, BACKFILL_CONCURRENCY at a time
+    4. Skip weeks whose matchups digest matches the (league, season) checkpoint
+    5. Batch-write the remaining weeks' matchups and standings in chunks,
+       checkpointing after each, then aggregate overall standings once
+    
+    With 'all_seasons' in the event, past seasons found by following the
+    league's previous_league_id chain are backfilled too, BACKFILL_SEASON_CONCURRENCY
+    seasons at a time, each through the same pipeline with its own checkpoint.
+    
+    Event 'mode':
+    - 'single' (default): everything in this invocation; when time runs
+      short it checkpoints and continues in a new invocation
+    - 'fanout': each past season runs in its own invocation and the current
+      season's changed weeks go to worker invocations (BACKFILL_FANOUT_WEEKS_PER_WORKER
+      weeks each); the last worker to finish aggregates overall standings
+    - 'worker': one fan-out worker (internal)
     """
     
+    event = event or {}
+    mode = event.get('mode', 'single')
+    executor = ThreadPoolExecutor(max_workers=BACKFILL_CONCURRENCY, thread_name_prefix='ff-backfill')
     try:
         # Initialize environment variables
         league_id = os.environ['SLEEPER_LEAGUE_ID']
@@ -31,71 +76,78 @@ def lambda_handler(event, context):
         weekly_standings_table = dynamodb.Table(os.environ['WEEKLY_STANDINGS_TABLE'])
         overall_standings_table = dynamodb.Table(os.environ['OVERALL_STANDINGS_TABLE'])
         
-        # Initialize shared standings service (no persistent cache for Lambda)
+        # Initialize shared standings service (no persistent cache for Lambda), reads on the backfill pool
         dynamodb_tables = {
             'league_data': league_data_table,
             'weekly_standings': weekly_standings_table,
             'overall_standings': overall_standings_table
         }
-        standings_service = StandingsService(dynamodb_tables, enable_persistent_cache=False)
+        standings_service = StandingsService(
+            dynamodb_tables,
+            enable_persistent_cache=False,
+            nfl_state_provider=get_nfl_state_provider().get_state,
+            metrics=metrics_from_env(default='emf'),
+            executor=executor
+        )
         
-        logger.info(f"Starting historical backfill for league {league_id}")
+        if mode == 'worker':
+            with metrics_operation(standings_service, 'backfill_worker', season=event['season'], weeks=len(event['weeks'])):
+                return run_worker(event, league_id, league_data_table, standings_service, executor)
         
-        # Step 1: Get current NFL state to determine completed weeks
-        nfl_state = get_nfl_state()
-        current_week = nfl_state.get('week', 1)
-        season = nfl_state.get('season', '2025')
+        if event.get('league_id'):
+            # One past season, handed over by a season fan-out
+            targets = [past_season_target(fetch_sleeper_data(f"/league/{event['league_id']}"))]
+        else:
+            logger.info(f"Starting historical backfill for league {league_id} ({mode})")
+            
+            # Step 1: Get current NFL state to determine completed weeks
+            nfl_state = get_nfl_state()
+            current_week = nfl_state.get('week', 1)
+            season = nfl_state.get('season', '2025')
+            
+            logger.info(f"NFL State - Season: {season}, Current Week: {current_week}")
+            
+            # Step 2: Cache league reference data (users, rosters, players)
+            league_info = cache_league_data(league_id, league_data_table, season, executor)
+            
+            # Step 3: Process each completed week (weeks 1 through current_week - 1)
+            targets = [{
+                'league_id': league_id,
+                'season': season,
+                'weeks': list(range(1, current_week)),  # Don't include current week if in progress
+                'current': True
+            }]
+            if event.get('all_seasons'):
+                targets += previous_seasons(league_info)
         
-        logger.info(f"NFL State - Season: {season}, Current Week: {current_week}")
+        def run_season(target):
+            # One metrics record per season pipeline, even while several run at once
+            with metrics_operation(standings_service, 'backfill_season', season=target['season'],
+                                   league_id=target['league_id']):
+                return backfill_season(target, mode, context, league_data_table, standings_service, executor)
         
-        # Step 2: Cache league reference data (users, rosters, players)
-        cache_league_data(league_id, league_data_table, season)
+        if mode == 'fanout' and len(targets) > 1:
+            summaries = [fan_out_season(context, target) for target in targets[1:]]
+            summaries.insert(0, run_season(targets[0]))
+        else:
+            # Each season pipeline fans its fetches out on the shared pool, so seasons get their own threads
+            with ThreadPoolExecutor(max_workers=SEASON_CONCURRENCY, thread_name_prefix='ff-backfill-season') as season_executor:
+                summaries = list(season_executor.map(run_season, targets))
         
-        # Step 3: Process each completed week (weeks 1 through current_week - 1)
-        completed_weeks = list(range(1, current_week))  # Don't include current week if in progress
+        if any(summary['status'] == 'partial' for summary in summaries):
+            continue_backfill(context, event)
         
-        if not completed_weeks:
-            logger.info("No completed weeks to backfill")
-            return {
-                'statusCode': 200,
-                'body': json.dumps({
-                    'message': 'No completed weeks to backfill',
-                    'current_week': current_week
-                })
+        finished = all(summary['status'] in ('complete', 'up_to_date', 'no_weeks') for summary in summaries)
+        if len(summaries) == 1:
+            body = summaries[0]
+        else:
+            body = {
+                'message': f'Historical backfill {"completed" if finished else "in progress"} for {len(summaries)} seasons',
+                'seasons': summaries
             }
-        
-        logger.info(f"Backfilling weeks: {completed_weeks}")
-        
-        # Process each week
-        for week in completed_weeks:
-            logger.info(f"Processing week {week}")
-            
-            # Fetch and store matchup data for this week
-            matchups = fetch_week_matchups(league_id, week)
-            store_week_matchups(league_data_table, season, week, matchups)
-            
-            # Calculate and store standings directly using shared library
-            try:
-                weekly_results = standings_service.calculate_and_store(
-                    matchups,
-                    season, 
-                    week,
-                    include_player_details=True  # Include full player details for historical processing
-                )
-                logger.info(f"Processed {len(weekly_results)} teams for week {week}")
-            except Exception as e:
-                logger.error(f"Failed to calculate standings for week {week}: {e}")
-                raise
-            
-            logger.info(f"Completed week {week}")
-        
         return {
-            'statusCode': 200,
-            'body': json.dumps({
-                'message': f'Historical backfill completed for {len(completed_weeks)} weeks',
-                'weeks_processed': completed_weeks,
-                'season': season
-            })
+            'statusCode': 200 if finished else 202,
+            'body': json.dumps(body)
         }
         
     except Exception as e:
@@ -107,54 +159,291 @@ def lambda_handler(event, context):
                 'details': str(e)
             })
         }
+    finally:
+        executor.shutdown(wait=False)
+
+def metrics_operation(standings_service, name, **properties):
+    """Flush one metrics record (an EMF line by default) when the block ends; no-op with metrics off"""
+    if standings_service.metrics is None:
+        return nullcontext()
+    return standings_service.metrics.operation(name, **properties)
+
+def backfill_season(target, mode, context, table, standings_service, executor):
+    """
+    Backfill one season: fetch its completed weeks, skip those matching the
+    checkpoint and write the rest in checkpointed chunks, then aggregate the
+    season's overall standings once.
+    
+    Returns:
+        Summary dict with a status of 'complete', 'up_to_date', 'no_weeks',
+        'partial' (ran out of time) or 'fanned_out'
+    """
+    league_id = target['league_id']
+    season = target['season']
+    completed_weeks = target['weeks']
+    summary = {'season': season, 'league_id': league_id}
+    
+    if not completed_weeks:
+        logger.info(f"No completed weeks to backfill for season {season}")
+        return dict(summary, status='no_weeks', message='No completed weeks to backfill')
+    
+    # Fetch all weeks concurrently and compare them with the checkpoint
+    weeks_matchups = fetch_weeks_matchups(league_id, completed_weeks, executor)
+    digests = {week: stable_digest(matchups) for week, matchups in weeks_matchups.items()}
+    if target['current']:
+        team_names = None
+        # Weekly rows carry team names, so new names invalidate every stored week
+        reference_digest = stable_digest(standings_service.data_cache.get_team_names())
+    else:
+        # Past rosters belonged to that season's users: names are resolved in memory, never stored
+        users_future = executor.submit(fetch_sleeper_data, f'/league/{league_id}/users')
+        rosters_future = executor.submit(fetch_sleeper_data, f'/league/{league_id}/rosters')
+        team_names = DataCache.build_team_names(rosters_future.result(), users_future.result())
+        reference_digest = stable_digest(team_names)
+    overall_digest = stable_digest({'reference': reference_digest, 'weeks': digests})
+    
+    checkpoint = load_checkpoint(table, league_id, season)
+    if checkpoint.get('reference_digest') != reference_digest:
+        checkpoint['weeks'] = {}
+        checkpoint['reference_digest'] = reference_digest
+    pending_weeks = [week for week in completed_weeks if checkpoint['weeks'].get(str(week)) != digests[week]]
+    skipped_weeks = [week for week in completed_weeks if week not in pending_weeks]
+    
+    if not pending_weeks and checkpoint.get('overall_digest') == overall_digest:
+        logger.info(f"Season {season} weeks {completed_weeks} match the checkpoint, nothing to backfill")
+        return dict(summary, status='up_to_date', message='Historical data already up to date',
+                    weeks_processed=[], weeks_skipped=completed_weeks)
+    
+    logger.info(f"Backfilling season {season} weeks: {pending_weeks} (unchanged: {len(skipped_weeks)})")
+    
+    if mode == 'fanout' and pending_weeks and target['current']:
+        return dict(summary, **fan_out(context, table, checkpoint, pending_weeks, overall_digest))
+    
+    # Writing here supersedes any unfinished fan-out run: its workers' completions are refused
+    checkpoint.pop('run_id', None)
+    checkpoint.pop('pending', None)
+    
+    # Calculate every week in memory, write only the changed ones
+    results_by_week = standings_service.calculate_many(weeks_matchups, include_player_details=True, team_names=team_names)
+    
+    written_weeks = []
+    for chunk in chunked(pending_weeks, CHECKPOINT_WEEKS):
+        if written_weeks and context.get_remaining_time_in_millis() / 1000 < TIME_MARGIN_SECONDS:
+            logger.info(f"Running out of time after season {season} weeks {written_weeks}")
+            return dict(summary, status='partial', message='Backfill continuing in a new invocation',
+                        weeks_processed=written_weeks,
+                        weeks_pending=[week for week in pending_weeks if week not in written_weeks])
+        store_weeks_matchups(table, season, {week: weeks_matchups[week] for week in chunk})
+        chunk_results = {week: results_by_week[week] for week in chunk if week in results_by_week}
+        if chunk_results:
+            with stage(standings_service.metrics, 'weekly_write'):
+                standings_service.storage.store_weekly_standings_batch(chunk_results, season)
+        checkpoint['weeks'].update({str(week): digests[week] for week in chunk})
+        save_checkpoint(table, checkpoint)
+        written_weeks += chunk
+    
+    standings_service.storage.update_overall_standings_from_results(season, results_by_week)
+    checkpoint['overall_digest'] = overall_digest
+    save_checkpoint(table, checkpoint)
+    
+    return dict(summary, status='complete',
+                message=f'Historical backfill completed for {len(pending_weeks)} weeks',
+                weeks_processed=pending_weeks, weeks_skipped=skipped_weeks)
+
+def run_worker(event, league_id, table, standings_service, executor):
+    """
+    Fan-out worker: fetch, store and calculate the given weeks, then mark them
+    done. The worker that clears the run's last pending week aggregates
+    overall standings from the stored weekly rows.
+    """
+    season = event['season']
+    weeks = event['weeks']
+    logger.info(f"Backfill worker for season {season}, weeks {weeks} (run {event['run_id']})")
+    
+    weeks_matchups = fetch_weeks_matchups(league_id, weeks, executor)
+    store_weeks_matchups(table, season, weeks_matchups)
+    results_by_week = standings_service.calculate_many(weeks_matchups, include_player_details=True)
+    if results_by_week:
+        with stage(standings_service.metrics, 'weekly_write'):
+            standings_service.storage.store_weekly_standings_batch(results_by_week, season)
+    
+    digests = {week: stable_digest(matchups) for week, matchups in weeks_matchups.items()}
+    remaining = complete_weeks(table, league_id, season, event['run_id'], digests)
+    if remaining is None:
+        message = 'Superseded by a newer backfill run'
+    elif remaining:
+        message = f'{len(remaining)} weeks still pending'
+    else:
+        # Last worker in: join
+        standings_service.storage.update_overall_standings(season)
+        table.update_item(
+            Key=checkpoint_key(league_id, season),
+            UpdateExpression='SET overall_digest = :digest, updated_at = :now',
+            ConditionExpression='run_id = :run_id',
+            ExpressionAttributeValues={
+                ':digest': event['overall_digest'],
+                ':now': datetime.utcnow().isoformat(),
+                ':run_id': event['run_id']
+            }
+        )
+        message = 'Last worker, overall standings updated'
+    logger.info(message)
+    return {
+        'statusCode': 200,
+        'body': json.dumps({'message': message, 'weeks_processed': weeks, 'season': season})
+    }
+
+def fan_out(context, table, checkpoint, pending_weeks, overall_digest):
+    """Record the run's pending weeks, then invoke one worker per group of weeks"""
+    run_id = context.aws_request_id
+    checkpoint['run_id'] = run_id
+    checkpoint['pending'] = {str(week) for week in pending_weeks}
+    checkpoint.pop('overall_digest', None)
+    save_checkpoint(table, checkpoint)
+    
+    groups = chunked(pending_weeks, FANOUT_WEEKS_PER_WORKER)
+    for weeks in groups:
+        lambda_client.invoke(
+            FunctionName=context.function_name,
+            InvocationType='Event',
+            Payload=json.dumps({
+                'mode': 'worker',
+                'season': checkpoint['season'],
+                'weeks': weeks,
+                'run_id': run_id,
+                'overall_digest': overall_digest
+            })
+        )
+    logger.info(f"Fanned out weeks {pending_weeks} to {len(groups)} workers (run {run_id})")
+    return {
+        'status': 'fanned_out',
+        'message': f'Backfill fanned out to {len(groups)} workers',
+        'weeks_pending': pending_weeks,
+        'run_id': run_id
+    }
+
+def fan_out_season(context, target):
+    """Backfill a past season in its own invocation"""
+    lambda_client.invoke(
+        FunctionName=context.function_name,
+        InvocationType='Event',
+        Payload=json.dumps({'mode': 'single', 'league_id': target['league_id'], 'source': 'season-fanout'})
+    )
+    logger.info(f"Season {target['season']} (league {target['league_id']}) handed to its own invocation")
+    return {
+        'season': target['season'],
+        'league_id': target['league_id'],
+        'status': 'fanned_out',
+        'message': 'Season backfill started in its own invocation'
+    }
+
+def continue_backfill(context, event):
+    """Hand the rest of the run to a new invocation, which resumes from the checkpoints"""
+    lambda_client.invoke(
+        FunctionName=context.function_name,
+        InvocationType='Event',
+        Payload=json.dumps(dict(event, mode='single', source='backfill-continuation'))
+    )
+    logger.info("Continuing the backfill in a new invocation")
+
+def previous_seasons(league_info):
+    """Past seasons of the league, newest first, following Sleeper's previous_league_id chain"""
+    targets = []
+    seen = {league_info.get('league_id')}
+    previous_id = league_info.get('previous_league_id')
+    while previous_id and previous_id != '0' and previous_id not in seen:
+        seen.add(previous_id)
+        previous_info = fetch_sleeper_data(f'/league/{previous_id}')
+        if not previous_info:
+            break
+        targets.append(past_season_target(previous_info))
+        previous_id = previous_info.get('previous_league_id')
+    logger.info(f"Found {len(targets)} past seasons: {[target['season'] for target in targets]}")
+    return targets
+
+def past_season_target(league_info):
+    """Season, league id and scored weeks of a finished season's league"""
+    settings = league_info.get('settings') or {}
+    last_week = int(settings.get('last_scored_leg') or DEFAULT_SEASON_WEEKS)
+    return {
+        'league_id': league_info['league_id'],
+        'season': str(league_info['season']),
+        'weeks': list(range(1, last_week + 1)),
+        'current': False
+    }
 
 def get_nfl_state():
-    """Fetch current NFL state from Sleeper API"""
+    """Fetch current NFL state via the shared cached provider"""
     try:
-        response = requests.get('https://api.sleeper.app/v1/state/nfl', timeout=10)
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
+        return get_nfl_state_provider().get_state()
+    except Exception as e:
         logger.error(f"Failed to fetch NFL state: {e}")
         raise
 
-def cache_league_data(league_id, table, season):
-    """Cache users, rosters, and players data in DynamoDB"""
-    
-    # Cache users
-    logger.info("Caching users data...")
-    users = fetch_sleeper_data(f'https://api.sleeper.app/v1/league/{league_id}/users')
-    for user in users:
-        table.put_item(Item=convert_floats_to_decimal({
-            'data_type': 'users',
-            'id': user['user_id'],
-            'season': season,
-            'data': user
-        }))
-    logger.info(f"Cached {len(users)} users")
-    
-    # Cache rosters
-    logger.info("Caching rosters data...")
-    rosters = fetch_sleeper_data(f'https://api.sleeper.app/v1/league/{league_id}/rosters')
-    for roster in rosters:
-        table.put_item(Item=convert_floats_to_decimal({
-            'data_type': 'rosters',
-            'id': str(roster['roster_id']),
-            'season': season,
-            'data': roster
-        }))
-    logger.info(f"Cached {len(rosters)} rosters")
-    
-    # Cache league info
-    logger.info("Caching league info...")
-    league_info = fetch_sleeper_data(f'https://api.sleeper.app/v1/league/{league_id}')
-    table.put_item(Item=convert_floats_to_decimal({
-        'data_type': 'league_info',
-        'id': 'league',
-        'season': season,
-        'data': league_info
-    }))
-    logger.info("Cached league info")
+def cache_league_data(league_id, table, season, executor):
+    """
+    Cache users, rosters, and players data in DynamoDB; returns the league info.
+    
+    Users, rosters and league info are fetched concurrently, and only items
+    whose content hash differs from the league's hash index are rewritten,
+    in one batch.
+    """
+    
+    logger.info("Caching league reference data...")
+    users_future = executor.submit(fetch_sleeper_data, f'/league/{league_id}/users')
+    rosters_future = executor.submit(fetch_sleeper_data, f'/league/{league_id}/rosters')
+    league_future = executor.submit(fetch_sleeper_data, f'/league/{league_id}')
+    users = users_future.result()
+    rosters = rosters_future.result()
+    league_info = league_future.result()
+    
+    stored_hashes = load_content_hashes(table, league_id)
+    current_hashes = {
+        'users': {user['user_id']: content_hash(user) for user in users},
+        'rosters': {str(roster['roster_id']): content_hash(roster) for roster in rosters},
+        'league_info': {'league': content_hash(league_info)}
+    }
+    changed = {
+        kind: {item_id for item_id, digest in hashes.items() if stored_hashes.get(kind, {}).get(item_id) != digest}
+        for kind, hashes in current_hashes.items()
+    }
+    
+    with table.batch_writer() as batch:
+        # Cache users
+        for user in users:
+            if user['user_id'] in changed['users']:
+                batch.put_item(Item=convert_floats_to_decimal({
+                    'data_type': 'users',
+                    'id': user['user_id'],
+                    'season': season,
+                    'data': user
+                }))
+        
+        # Cache rosters
+        for roster in rosters:
+            if str(roster['roster_id']) in changed['rosters']:
+                batch.put_item(Item=convert_floats_to_decimal({
+                    'data_type': 'rosters',
+                    'id': str(roster['roster_id']),
+                    'season': season,
+                    'data': roster
+                }))
+        
+        # Cache league info
+        if changed['league_info']:
+            batch.put_item(Item=convert_floats_to_decimal({
+                'data_type': 'league_info',
+                'id': 'league',
+                'season': season,
+                'data': league_info
+            }))
+    
+    if any(changed.values()):
+        save_content_hashes(table, league_id, current_hashes, datetime.utcnow().isoformat())
+    logger.info(
+        f"Cached {len(changed['users'])} of {len(users)} users, {len(changed['rosters'])} of {len(rosters)} rosters, "
+        f"league info {'updated' if changed['league_info'] else 'unchanged'}"
+    )
     
     # Cache players using ff-standings DataCache (delegate to shared logic)
     try:
@@ -173,38 +462,97 @@ def cache_league_data(league_id, table, season):
     except Exception as e:
         logger.warning(f"Failed to check players data: {e}")
         # Continue without players data for now
+    
+    return league_info
 
-def fetch_sleeper_data(url):
-    """Fetch data from Sleeper API with error handling"""
+def fetch_sleeper_data(path):
+    """Fetch data from Sleeper API with error handling (pooled, retried client)"""
     try:
-        response = requests.get(url, timeout=15)
-        response.raise_for_status()
-        return response.json()
+        return get_sleeper_client().get(path)
     except requests.RequestException as e:
-        logger.error(f"Failed to fetch {url}: {e}")
+        logger.error(f"Failed to fetch {path}: {e}")
         raise
 
 def fetch_week_matchups(league_id, week):
     """Fetch matchup data for a specific week"""
-    url = f'https://api.sleeper.app/v1/league/{league_id}/matchups/{week}'
-    return fetch_sleeper_data(url)
+    return fetch_sleeper_data(f'/league/{league_id}/matchups/{week}')
+
+def fetch_weeks_matchups(league_id, weeks, executor):
+    """Fetch matchup data for several weeks on the executor, keyed by week"""
+    def fetch(week):
+        logger.info(f"Fetching week {week}")
+        return fetch_week_matchups(league_id, week)
+    
+    return dict(zip(weeks, executor.map(fetch, weeks)))
 
-def store_week_matchups(table, season, week, matchups):
-    """Store weekly matchup data in DynamoDB"""
+def store_weeks_matchups(table, season, weeks_matchups):
+    """Store matchup data for several weeks in DynamoDB with batched writes"""
     try:
-        # Store matchups data for this week
-        table.put_item(Item=convert_floats_to_decimal({
-            'data_type': 'matchups',
-            'id': f'{season}_{week}',
-            'season': season,
-            'week': week,
-            'data': matchups
-        }))
-        logger.info(f"Stored matchups for week {week}")
+        with table.batch_writer() as batch:
+            for week, matchups in weeks_matchups.items():
+                batch.put_item(Item=convert_floats_to_decimal({
+                    'data_type': 'matchups',
+                    'id': f'{season}_{week}',
+                    'season': season,
+                    'week': week,
+                    'data': matchups
+                }))
+        logger.info(f"Stored matchups for weeks {sorted(weeks_matchups)}")
     except Exception as e:
-        logger.error(f"Failed to store week {week} matchups: {e}")
+        logger.error(f"Failed to store matchups for weeks {sorted(weeks_matchups)}: {e}")
         raise
 
+def chunked(items, size):
+    return [items[i:i + size] for i in range(0, len(items), max(1, size))]
+
+def checkpoint_key(league_id, season):
+    return {'data_type': 'backfill_checkpoint', 'id': f'{league_id}#{season}'}
+
+def load_checkpoint(table, league_id, season):
+    """
+    Backfill checkpoint for (league, season): completed weeks with the digest
+    of the matchups they were written from, the team-names digest they were
+    calculated with, and the digest the overall standings were last built from
+    """
+    item = table.get_item(Key=checkpoint_key(league_id, season), ConsistentRead=True).get('Item')
+    checkpoint = dict(item) if item else dict(checkpoint_key(league_id, season), season=season)
+    checkpoint['weeks'] = dict(checkpoint.get('weeks') or {})
+    return checkpoint
+
+def save_checkpoint(table, checkpoint):
+    checkpoint['updated_at'] = datetime.utcnow().isoformat()
+    table.put_item(Item=checkpoint)
+
+def complete_weeks(table, league_id, season, run_id, digests):
+    """
+    Record a fan-out worker's weeks in the checkpoint and remove them from the
+    run's pending set, in one atomic update.
+    
+    Returns:
+        Weeks still pending (empty for the last worker), or None if a newer run replaced this one
+    """
+    names = {}
+    values = {':run_id': run_id, ':done': {str(week) for week in digests}, ':now': datetime.utcnow().isoformat()}
+    assignments = ['updated_at = :now']
+    for i, (week, digest) in enumerate(sorted(digests.items())):
+        names[f'#w{i}'] = str(week)
+        values[f':d{i}'] = digest
+        assignments.append(f'weeks.#w{i} = :d{i}')
+    try:
+        response = table.update_item(
+            Key=checkpoint_key(league_id, season),
+            UpdateExpression=f"SET {', '.join(assignments)} DELETE pending :done",
+            ConditionExpression='run_id = :run_id',
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+            ReturnValues='ALL_NEW'
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        return None
+    return sorted(int(week) for week in response['Attributes'].get('pending', set()))
+
 
 def decimal_default(obj):
     """JSON serializer for DynamoDB Decimal types"""
@@ -11,13 +11,13 @@ import os
 import logging
 from datetime import datetime, timezone
 from collections import defaultdict
-import requests
 import boto3
 from decimal import Decimal
 import numpy as np
 
 # Import shared utilities
 from ff_utils.dynamodb import DecimalEncoder
+from ff_utils.nfl_state import get_nfl_state_provider
 
 # Configure logging
 logger = logging.getLogger()
@@ -73,10 +73,7 @@ class MonteCarloService:
     def get_nfl_state(self):
         """Get current NFL state (season and week)"""
         try:
-            response = requests.get('https://api.sleeper.app/v1/state/nfl', timeout=10)
-            response.raise_for_status()
-            
-            nfl_state = response.json()
+            nfl_state = get_nfl_state_provider().get_state()
             season = nfl_state.get('season', '2025')
             week = nfl_state.get('week', 1)
             
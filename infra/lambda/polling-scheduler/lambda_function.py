@@ -0,0 +1,128 @@
+import json
+import boto3
+import os
+import logging
+from datetime import datetime, timezone
+
+from ff_utils.schedule import GameSchedule
+from ff_utils.nfl_state import get_nfl_state
+from ff_utils.polling_task import (
+    POLLING_STATUS_KEY, TASK_STARTED, TASK_STARTING, polling_window, list_polling_tasks, start_polling_task,
+    stop_polling_tasks
+)
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = boto3.resource('dynamodb')
+
+# Time the task gets to drain and exit on its own after polling is disabled, before stop_task
+DRAIN_SECONDS = int(os.environ.get('POLLING_DRAIN_SECONDS', '180'))
+
+# Sleeper season types in which scores change
+IN_SEASON = ('regular', 'post')
+
+
+def lambda_handler(event, context):
+    """
+    Start and stop the polling task around NFL game windows.
+
+    Runs every few minutes on an EventBridge schedule. Inside a game window
+    (widened by POLLING_START_LEAD_MINUTES / POLLING_STOP_GRACE_MINUTES) it
+    enables polling and starts the task if none is running; outside it, it
+    disables polling so the task drains and exits, and stops the task if it
+    is still up after POLLING_DRAIN_SECONDS. A manual toggle via the API
+    takes precedence until its manual_until time.
+    """
+    polling_table = dynamodb.Table(os.environ['POLLING_STATE_TABLE'])
+    now = datetime.now(timezone.utc)
+
+    try:
+        item = polling_table.get_item(Key=POLLING_STATUS_KEY, ConsistentRead=True).get('Item', {})
+
+        manual_until = item.get('manual_until')
+        if manual_until and now.timestamp() < float(manual_until):
+            until = datetime.fromtimestamp(float(manual_until), timezone.utc)
+            return respond('none', f"manual override until {until.isoformat()}")
+
+        window, reason = scheduled_window(now)
+        tasks = list_polling_tasks()
+
+        if window:
+            if not item.get('enabled', False):
+                set_enabled(polling_table, True, reason, now)
+            if tasks:
+                return respond('none', f"{reason}, task already running", window)
+            task_arn, outcome = start_polling_task(polling_table, 'polling-scheduler')
+            if outcome == TASK_STARTED:
+                return respond('started', reason, window, task_arn)
+            if outcome == TASK_STARTING:
+                return respond('none', f"{reason}, task start in progress by another caller", window)
+            return respond('none', f"{reason}, task already running", window, task_arn)
+
+        if item.get('enabled', False):
+            # Let the task notice on its next heartbeat, flush its writes and exit
+            set_enabled(polling_table, False, reason, now)
+            return respond('disabled', reason)
+        if tasks:
+            stop_requested_at = item.get('stop_requested_at')
+            if stop_requested_at is None or now.timestamp() - float(stop_requested_at) >= DRAIN_SECONDS:
+                stopped = stop_polling_tasks('Outside NFL game window', tasks)
+                return respond('stopped', f"{reason}, stopped {stopped} task(s)")
+            return respond('none', f"{reason}, waiting for task to drain")
+        return respond('none', reason)
+
+    except Exception as e:
+        logger.error(f"Polling scheduler error: {str(e)}")
+        return {
+            'statusCode': 500,
+            'body': json.dumps({'error': str(e)})
+        }
+
+
+def scheduled_window(now):
+    """
+    Return ((start, end), reason) of the polling window containing now, or (None, reason).
+
+    Outside the regular season and playoffs there is no window at all.
+    """
+    try:
+        season_type = get_nfl_state().get('season_type')
+        if season_type and season_type not in IN_SEASON:
+            return None, f"no games ({season_type} season)"
+    except Exception as e:
+        # Fall back to the weekly schedule alone
+        logger.warning(f"Failed to fetch NFL state, using game windows only: {e}")
+
+    schedule = GameSchedule.from_env()
+    window = polling_window(now, schedule)
+    if window:
+        return window, f"game window {window[0].isoformat()} - {window[1].isoformat()}"
+    return None, f"outside game windows, next starts {schedule.next_window_start(now).isoformat()}"
+
+
+def set_enabled(table, enabled, reason, now):
+    """Flip the enabled flag without touching the polling service's heartbeat fields"""
+    update = 'SET enabled = :enabled, last_updated = :now, schedule_reason = :reason'
+    values = {':enabled': enabled, ':now': now.isoformat(), ':reason': reason}
+    if enabled:
+        update += ' REMOVE stop_requested_at'
+    else:
+        update += ', stop_requested_at = :requested'
+        values[':requested'] = int(now.timestamp())
+    table.update_item(Key=POLLING_STATUS_KEY, UpdateExpression=update, ExpressionAttributeValues=values)
+    logger.info(f"Polling {'enabled' if enabled else 'disabled'}: {reason}")
+
+
+def respond(action, reason, window=None, task_arn=None):
+    logger.info(f"Scheduler action: {action} ({reason})")
+    body = {'action': action, 'reason': reason}
+    if window:
+        body['window'] = [window[0].isoformat(), window[1].isoformat()]
+    if task_arn:
+        body['task_arn'] = task_arn
+    return {
+        'statusCode': 200,
+        'body': json.dumps(body)
+    }
@@ -1,140 +1,353 @@
 import json
 import boto3
-import requests
 import os
 import time
 import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from ff_utils.sleeper import get_sleeper_client
+from ff_utils.lease import lease_id, acquire_lease, transfer_lease
+from ff_utils.dynamodb import convert_floats_to_decimal, content_hash, load_content_hashes, save_content_hashes
+
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 dynamodb = boto3.resource('dynamodb')
 lambda_client = boto3.client('lambda')
+sqs = boto3.client('sqs')
+
+# Covers one invocation plus the hand-off to the next, so a broken chain frees the league quickly
+LEASE_SECONDS = 60
+
+# Seconds between polls, counted from the start of each cycle
+POLL_INTERVAL_SECONDS = int(os.environ.get('POLL_INTERVAL_SECONDS', '10'))
+
+# 'chain' (one cycle per invocation) or 'loop' (many cycles per invocation, see run_polling_loop)
+POLL_MODE = os.environ.get('POLL_MODE', 'chain')
+
+# Loop mode: time a cycle may take, kept free before the invocation timeout
+CYCLE_BUDGET_SECONDS = int(os.environ.get('CYCLE_BUDGET_SECONDS', '20'))
+
+# Loop mode: time kept for invoking the successor
+HANDOFF_RESERVE_SECONDS = 3
+
+# Loop mode: consecutive failed cycles before the loop gives up
+MAX_CONSECUTIVE_ERRORS = 3
+
+# Sleeper calls run side by side on the shared keep-alive session
+fetch_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='sleeper-fetch')
+
+# Content hashes of the users/rosters last written, kept across warm invocations
+_stored_hashes = {}
 
 def lambda_handler(event, context):
     """
     Fetch data from Sleeper API and store in DynamoDB.
     Self-invoke if polling is still enabled.
+    
+    The chain holds the league's polling lease, so it stops if the Fargate
+    polling service or another chain already polls the league. Each hop gets
+    a fresh lease_holder and takes the lease over from its predecessor
+    (previous_holder) with transfer_lease, so a duplicate SQS delivery or
+    async retry of the same hop stops instead of forking the chain.
+    
+    With POLL_QUEUE_URL set (an SQS queue that triggers this function), the
+    next cycle is scheduled as a delayed SQS message instead of waiting inside
+    this billed invocation.
+    
+    With POLL_MODE=loop, one invocation instead runs as many cycles as fit in
+    its remaining time and then hands off to a single successor (see
+    run_polling_loop).
     """
     
     league_id = os.environ['SLEEPER_LEAGUE_ID']
     polling_table = dynamodb.Table(os.environ['POLLING_STATE_TABLE'])
     league_data_table = dynamodb.Table(os.environ['LEAGUE_DATA_TABLE'])
+    payload = chain_payload(event)
+    
+    if POLL_MODE == 'loop':
+        return run_polling_loop(league_id, polling_table, league_data_table, payload, context)
     
+    started = time.monotonic()
     try:
-        # Check if polling is still enabled
-        polling_status = polling_table.get_item(Key={'id': 'polling_status'})
-        if not polling_status.get('Item', {}).get('enabled', False):
-            logger.info("Polling is disabled, stopping chain")
-            return {
-                'statusCode': 200,
-                'body': json.dumps({'message': 'Polling stopped'})
+        lease_holder = payload.get('lease_holder') or f'lambda-chain-{context.aws_request_id}'
+        keep_polling, body = claim_cycle(league_id, polling_table, lease_holder, payload.get('previous_holder'))
+        if keep_polling:
+            body = poll_once(league_id, polling_table, league_data_table)
+            successor = {
+                'lease_holder': f'lambda-chain-{uuid.uuid4().hex[:12]}',
+                'previous_holder': lease_holder
             }
+            schedule_next_cycle(context, successor, time.monotonic() - started)
+        return {
+            'statusCode': 200,
+            'body': json.dumps(body)
+        }
+    
+    except Exception as e:
+        logger.error(f"Error fetching Sleeper data: {str(e)}")
+        return {
+            'statusCode': 500,
+            'body': json.dumps({'error': str(e)})
+        }
+
+def run_polling_loop(league_id, polling_table, league_data_table, payload, context):
+    """
+    Run polling cycles every POLL_INTERVAL_SECONDS inside this invocation.
+    
+    The Sleeper session, content-hash cache and AWS clients are shared by all
+    cycles. Once the time left (context.get_remaining_time_in_millis()) no
+    longer covers another cycle plus CYCLE_BUDGET_SECONDS, the loop invokes
+    exactly one successor and returns. The successor takes the lease over
+    from this invocation's holder with transfer_lease, so a duplicate
+    delivery of the hand-off stops instead of polling twice.
+    
+    Stops when polling is disabled, the lease is lost, or after
+    MAX_CONSECUTIVE_ERRORS failed cycles in a row.
+    """
+    lease_holder = payload.get('lease_holder') or f'lambda-loop-{context.aws_request_id}'
+    previous_holder = payload.get('previous_holder')
+    cycles = 0
+    errors = 0
+    handed_off = False
+    body = {}
+    
+    while True:
+        cycle_started = time.monotonic()
+        try:
+            keep_polling, body = claim_cycle(league_id, polling_table, lease_holder, previous_holder)
+            if not keep_polling:
+                break
+            # The lease is ours from here on, even if this cycle's fetch fails
+            previous_holder = None
+            body = poll_once(league_id, polling_table, league_data_table)
+            cycles += 1
+            errors = 0
+        except Exception as e:
+            errors += 1
+            logger.error(f"Error fetching Sleeper data ({errors} in a row): {str(e)}")
+            body = {'error': str(e)}
+            if errors >= MAX_CONSECUTIVE_ERRORS:
+                break
         
-        logger.info(f"Fetching data for league {league_id}")
-        
-        # Fetch league data from Sleeper API
-        base_url = "https://api.sleeper.app/v1"
-        
-        # Get current week (simplified - in production we'd get this from league info)
-        current_week = 1  # TODO: Get from league data or calculate
-        
-        # Fetch league info
-        league_response = requests.get(f"{base_url}/league/{league_id}")
-        league_data = league_response.json()
-        
-        # Fetch users
-        users_response = requests.get(f"{base_url}/league/{league_id}/users")
-        users_data = users_response.json()
-        
-        # Fetch rosters
-        rosters_response = requests.get(f"{base_url}/league/{league_id}/rosters")
-        rosters_data = rosters_response.json()
-        
-        # Fetch matchups for current week
-        matchups_response = requests.get(f"{base_url}/league/{league_id}/matchups/{current_week}")
-        matchups_data = matchups_response.json()
-        
-        # Store data in DynamoDB
-        current_time = datetime.utcnow().isoformat()
-        
+        wait = max(0, POLL_INTERVAL_SECONDS - (time.monotonic() - cycle_started))
+        remaining = context.get_remaining_time_in_millis() / 1000
+        if remaining - wait < CYCLE_BUDGET_SECONDS:
+            # No room for another cycle: wait out the interval if time allows, then hand off
+            time.sleep(max(0, min(wait, remaining - HANDOFF_RESERVE_SECONDS)))
+            hand_off(context, lease_holder, payload.get('cycles', 0) + cycles)
+            handed_off = True
+            break
+        time.sleep(wait)
+    
+    logger.info(f"Ran {cycles} polling cycles in this invocation ({'handed off' if handed_off else 'stopped'})")
+    return {
+        'statusCode': 500 if 'error' in body and not handed_off else 200,
+        'body': json.dumps(dict(body, cycles=cycles, handed_off=handed_off))
+    }
+
+def hand_off(context, lease_holder, total_cycles):
+    """Invoke the single successor, which takes the lease over from lease_holder"""
+    successor = {
+        'lease_holder': f'lambda-loop-{uuid.uuid4().hex[:12]}',
+        'previous_holder': lease_holder,
+        'cycles': total_cycles
+    }
+    lambda_client.invoke(
+        FunctionName=context.function_name,
+        InvocationType='Event',
+        Payload=json.dumps(successor)
+    )
+    logger.info(f"Handed off to {successor['lease_holder']} after {total_cycles} cycles in total")
+
+def claim_cycle(league_id, polling_table, lease_holder, previous_holder=None):
+    """
+    Check the enabled flag and take (or renew) the league lease before a cycle.
+    
+    With previous_holder, the lease is taken over from it with transfer_lease;
+    once that succeeded, later cycles must renew without previous_holder.
+    
+    Returns:
+        (keep_polling, response body when stopping)
+    """
+    # Check if polling is still enabled
+    polling_status = polling_table.get_item(Key={'id': 'polling_status'})
+    if not polling_status.get('Item', {}).get('enabled', False):
+        logger.info("Polling is disabled, stopping chain")
+        return False, {'message': 'Polling stopped'}
+    
+    # One poller per league: keep the lease this chain started with (or was handed), or stop
+    if previous_holder:
+        acquired, lease = transfer_lease(polling_table, lease_id(league_id), previous_holder, lease_holder, LEASE_SECONDS)
+    else:
+        acquired, lease = acquire_lease(polling_table, lease_id(league_id), lease_holder, LEASE_SECONDS)
+    if not acquired:
+        logger.info(f"League {league_id} is already polled by {lease.get('holder')}, stopping chain")
+        return False, {'message': 'Another poller holds the lease'}
+    return True, {}
+
+def poll_once(league_id, polling_table, league_data_table):
+    """
+    One polling cycle under the lease: fetch, store and trigger the standings calculation.
+    
+    Returns:
+        Response body
+    """
+    started = time.monotonic()
+    
+    logger.info(f"Fetching data for league {league_id}")
+    
+    # Fetch league data from Sleeper API (pooled keep-alive client, reused across warm invocations)
+    sleeper = get_sleeper_client()
+    
+    # Get current week (simplified - in production we'd get this from league info)
+    current_week = 1  # TODO: Get from league data or calculate
+    
+    # League info, users, rosters and matchups concurrently
+    league_future = fetch_executor.submit(sleeper.get_league, league_id)
+    users_future = fetch_executor.submit(sleeper.get_league_users, league_id)
+    rosters_future = fetch_executor.submit(sleeper.get_league_rosters, league_id)
+    matchups_future = fetch_executor.submit(sleeper.get_matchups, league_id, current_week)
+    league_data = league_future.result()
+    users_data = users_future.result()
+    rosters_data = rosters_future.result()
+    matchups_data = matchups_future.result()
+    fetch_seconds = time.monotonic() - started
+    
+    # Store data in DynamoDB
+    current_time = datetime.utcnow().isoformat()
+    
+    # Skip users and rosters whose content matches what was last written
+    stored_hashes = load_stored_hashes(league_data_table, league_id)
+    current_hashes = {
+        'users': {user['user_id']: content_hash(user) for user in users_data},
+        'rosters': {str(roster['roster_id']): content_hash(roster) for roster in rosters_data}
+    }
+    changed_users = [
+        user for user in users_data
+        if stored_hashes['users'].get(user['user_id']) != current_hashes['users'][user['user_id']]
+    ]
+    changed_rosters = [
+        roster for roster in rosters_data
+        if stored_hashes['rosters'].get(str(roster['roster_id'])) != current_hashes['rosters'][str(roster['roster_id'])]
+    ]
+    
+    # One batch writer groups the items into 25-item BatchWriteItem calls (retrying unprocessed items)
+    with league_data_table.batch_writer() as batch:
         # Store league info
-        league_data_table.put_item(Item={
+        batch.put_item(Item=convert_floats_to_decimal({
             'data_type': 'league_info',
             'id': league_id,
             'data': league_data,
             'updated_at': current_time
-        })
+        }))
         
         # Store users
-        for user in users_data:
-            league_data_table.put_item(Item={
+        for user in changed_users:
+            batch.put_item(Item=convert_floats_to_decimal({
                 'data_type': 'users',
                 'id': user['user_id'],
                 'data': user,
                 'updated_at': current_time
-            })
+            }))
         
         # Store rosters
-        for roster in rosters_data:
-            league_data_table.put_item(Item={
+        for roster in changed_rosters:
+            batch.put_item(Item=convert_floats_to_decimal({
                 'data_type': 'rosters',
                 'id': str(roster['roster_id']),
                 'data': roster,
                 'updated_at': current_time
-            })
+            }))
         
         # Store matchups
         for matchup in matchups_data:
-            league_data_table.put_item(Item={
+            batch.put_item(Item=convert_floats_to_decimal({
                 'data_type': f'matchups_week_{current_week}',
                 'id': str(matchup['roster_id']),
                 'data': matchup,
                 'week': current_week,
                 'updated_at': current_time
-            })
-        
-        # Update polling status with last poll time
-        polling_table.update_item(
-            Key={'id': 'polling_status'},
-            UpdateExpression='SET last_poll = :time',
-            ExpressionAttributeValues={':time': current_time}
-        )
-        
-        logger.info(f"Successfully stored data for {len(users_data)} users, {len(rosters_data)} rosters, {len(matchups_data)} matchups")
-        
-        # Trigger standings calculation
-        lambda_client.invoke(
-            FunctionName=os.environ['CALCULATE_STANDINGS_FUNCTION'],
-            InvocationType='Event'
-        )
-        
-        # Wait 10 seconds then self-invoke if still polling
-        time.sleep(10)
-        
-        # Check polling status again
-        polling_status = polling_table.get_item(Key={'id': 'polling_status'})
-        if polling_status.get('Item', {}).get('enabled', False):
-            lambda_client.invoke(
-                FunctionName=context.function_name,
-                InvocationType='Event'
-            )
-        
-        return {
-            'statusCode': 200,
-            'body': json.dumps({
-                'message': 'Data fetched successfully',
-                'users_count': len(users_data),
-                'rosters_count': len(rosters_data),
-                'matchups_count': len(matchups_data)
-            })
+            }))
+    
+    # Hashes are saved only after the batch succeeded, so a failed write is retried next cycle
+    if changed_users or changed_rosters:
+        save_stored_hashes(league_data_table, league_id, current_hashes, current_time)
+    
+    # Update polling status with last poll time
+    polling_table.update_item(
+        Key={'id': 'polling_status'},
+        UpdateExpression='SET last_poll = :time',
+        ExpressionAttributeValues={':time': current_time}
+    )
+    
+    logger.info(f"Stored data for {len(users_data)} users ({len(changed_users)} changed), "
+                f"{len(rosters_data)} rosters ({len(changed_rosters)} changed), {len(matchups_data)} matchups "
+                f"in {time.monotonic() - started:.2f}s (fetch {fetch_seconds:.2f}s)")
+    
+    # Trigger standings calculation
+    lambda_client.invoke(
+        FunctionName=os.environ['CALCULATE_STANDINGS_FUNCTION'],
+        InvocationType='Event'
+    )
+    
+    return {
+        'message': 'Data fetched successfully',
+        'users_count': len(users_data),
+        'rosters_count': len(rosters_data),
+        'matchups_count': len(matchups_data),
+        'users_written': len(changed_users),
+        'rosters_written': len(changed_rosters)
+    }
+
+def chain_payload(event):
+    """Chain state from a direct self-invoke, or from the SQS message that scheduled this cycle"""
+    event = event or {}
+    records = event.get('Records')
+    if records:
+        return json.loads(records[0].get('body') or '{}')
+    return event
+
+def load_stored_hashes(table, league_id):
+    """Hashes of the stored users/rosters: kept from the last cycle when warm, else one read of the hash index"""
+    if league_id not in _stored_hashes:
+        stored = load_content_hashes(table, league_id)
+        _stored_hashes[league_id] = {
+            'users': stored.get('users', {}),
+            'rosters': stored.get('rosters', {})
         }
+    return _stored_hashes[league_id]
+
+def save_stored_hashes(table, league_id, hashes, current_time):
+    save_content_hashes(table, league_id, hashes, current_time)
+    _stored_hashes[league_id] = hashes
+
+def schedule_next_cycle(context, payload, elapsed):
+    """
+    Start the next cycle POLL_INTERVAL_SECONDS after this one started.
     
-    except Exception as e:
-        logger.error(f"Error fetching Sleeper data: {str(e)}")
-        return {
-            'statusCode': 500,
-            'body': json.dumps({'error': str(e)})
-        }
\ No newline at end of file
+    With POLL_QUEUE_URL, send a delayed SQS message (nothing billed while
+    waiting); otherwise sleep for what is left of the interval and
+    self-invoke if polling is still enabled.
+    """
+    delay = max(0, int(round(POLL_INTERVAL_SECONDS - elapsed)))
+    queue_url = os.environ.get('POLL_QUEUE_URL')
+    if queue_url:
+        # The next cycle re-checks the enabled flag and lease before doing any work
+        sqs.send_message(QueueUrl=queue_url, MessageBody=json.dumps(payload), DelaySeconds=min(delay, 900))
+        return
+    
+    time.sleep(delay)
+    
+    # Check polling status again
+    polling_table = dynamodb.Table(os.environ['POLLING_STATE_TABLE'])
+    polling_status = polling_table.get_item(Key={'id': 'polling_status'})
+    if polling_status.get('Item', {}).get('enabled', False):
+        lambda_client.invoke(
+            FunctionName=context.function_name,
+            InvocationType='Event',
+            Payload=json.dumps(payload)
+        )
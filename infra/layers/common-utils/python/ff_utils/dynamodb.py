@@ -3,6 +3,7 @@ DynamoDB utilities for Fantasy Football application.
 Shared functions for DynamoDB data type conversion and operations.
 """
 
+import hashlib
 import json
 from decimal import Decimal
 
@@ -56,4 +57,62 @@ def get_cors_headers():
         'Access-Control-Allow-Origin': '*',
         'Access-Control-Allow-Headers': 'Content-Type,X-Admin-Key',
         'Access-Control-Allow-Methods': 'GET, POST, OPTIONS'
-    }
\ No newline at end of file
+    }
+
+
+def content_hash(obj):
+    """
+    Stable SHA-256 of a JSON-serializable value, independent of key order.
+    
+    Used to skip rewriting items whose content hasn't changed since the last
+    write.
+    
+    Args:
+        obj: Value to hash (dicts, lists, numbers, strings; Decimals allowed)
+        
+    Returns:
+        Hex digest string
+    """
+    payload = json.dumps(obj, sort_keys=True, separators=(',', ':'), cls=DecimalEncoder)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def load_content_hashes(table, league_id):
+    """
+    Content hashes of the reference data last written for a league.
+    
+    Args:
+        table: boto3 Table for the league data table
+        league_id: Sleeper league ID
+        
+    Returns:
+        Dict of kind ('users', 'rosters', 'league_info') -> {item id: hash};
+        kinds never recorded are missing
+    """
+    item = table.get_item(Key={'data_type': 'content_hashes', 'id': league_id}).get('Item', {})
+    return {kind: dict(value) for kind, value in item.items() if isinstance(value, dict)}
+
+
+def save_content_hashes(table, league_id, hashes, updated_at):
+    """
+    Record content hashes for the given kinds, keeping other kinds' entries.
+    
+    Call only after the items themselves were written, so a failed write is
+    retried next time.
+    
+    Args:
+        table: boto3 Table for the league data table
+        league_id: Sleeper league ID
+        hashes: Dict of kind -> {item id: hash}
+        updated_at: ISO timestamp recorded on the index item
+    """
+    names = {f'#k{i}': kind for i, kind in enumerate(hashes)}
+    values = {f':v{i}': value for i, value in enumerate(hashes.values())}
+    values[':now'] = updated_at
+    assignments = ', '.join(f'#k{i} = :v{i}' for i in range(len(hashes)))
+    table.update_item(
+        Key={'data_type': 'content_hashes', 'id': league_id},
+        UpdateExpression=f'SET {assignments}, updated_at = :now',
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues=values
+    )
@@ -0,0 +1,109 @@
+"""
+Lease utilities for Fantasy Football application.
+Single-runner leases in the polling state table, shared by the Fargate
+polling service and Lambda polling chains.
+"""
+
+import time
+from decimal import Decimal
+
+from botocore.exceptions import ClientError
+
+
+def lease_id(league_id):
+    """Polling state item id of a league's polling lease"""
+    return f'polling_lease#{league_id}'
+
+
+def acquire_lease(table, item_id, holder, duration):
+    """
+    Take or renew a lease with a conditional write.
+
+    Succeeds when the lease is free, expired or already held by holder. Uses
+    the same item layout as the ff_standings storage backends (holder,
+    expires_at, renewed_at, lease_seconds; epoch seconds).
+
+    Args:
+        table: boto3 Table for the polling state table
+        item_id: Lease item id, e.g. lease_id(league_id)
+        holder: Unique id of the caller
+        duration: Lease length in seconds
+
+    Returns:
+        (acquired, lease item); when not acquired, the current holder's item
+    """
+    now = Decimal(str(time.time()))
+    duration = Decimal(str(duration))
+    try:
+        response = table.update_item(
+            Key={'id': item_id},
+            UpdateExpression='SET #holder = :holder, #expires_at = :expires_at, '
+                             '#renewed_at = :now, #lease_seconds = :duration',
+            ConditionExpression='attribute_not_exists(#holder) OR #holder = :holder OR #expires_at < :now',
+            ExpressionAttributeNames={
+                '#holder': 'holder',
+                '#expires_at': 'expires_at',
+                '#renewed_at': 'renewed_at',
+                '#lease_seconds': 'lease_seconds'
+            },
+            ExpressionAttributeValues={
+                ':holder': holder,
+                ':expires_at': now + duration,
+                ':now': now,
+                ':duration': duration
+            },
+            ReturnValues='ALL_NEW'
+        )
+        return True, response.get('Attributes', {})
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        return False, table.get_item(Key={'id': item_id}).get('Item', {})
+
+
+def transfer_lease(table, item_id, previous_holder, holder, duration):
+    """
+    Take over a lease handed on by its previous holder.
+
+    Unlike acquire_lease, a caller that already holds the lease is refused:
+    a duplicate delivery of the same hand-off finds the lease moved on and
+    stops, so one hand-off yields exactly one successor.
+
+    Args:
+        table: boto3 Table for the polling state table
+        item_id: Lease item id, e.g. lease_id(league_id)
+        previous_holder: Holder that handed the lease on
+        holder: Unique id of the successor
+        duration: Lease length in seconds
+
+    Returns:
+        (acquired, lease item); when not acquired, the current holder's item
+    """
+    now = Decimal(str(time.time()))
+    duration = Decimal(str(duration))
+    try:
+        response = table.update_item(
+            Key={'id': item_id},
+            UpdateExpression='SET #holder = :holder, #expires_at = :expires_at, '
+                             '#renewed_at = :now, #lease_seconds = :duration',
+            ConditionExpression='attribute_not_exists(#holder) OR #holder = :previous OR #expires_at < :now',
+            ExpressionAttributeNames={
+                '#holder': 'holder',
+                '#expires_at': 'expires_at',
+                '#renewed_at': 'renewed_at',
+                '#lease_seconds': 'lease_seconds'
+            },
+            ExpressionAttributeValues={
+                ':holder': holder,
+                ':previous': previous_holder,
+                ':expires_at': now + duration,
+                ':now': now,
+                ':duration': duration
+            },
+            ReturnValues='ALL_NEW'
+        )
+        return True, response.get('Attributes', {})
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        return False, table.get_item(Key={'id': item_id}).get('Item', {})
@@ -0,0 +1,129 @@
+"""
+NFL state utilities for Fantasy Football application.
+Shared, cached access to Sleeper's /state/nfl endpoint.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from .sleeper import get_sleeper_client
+
+logger = logging.getLogger(__name__)
+
+
+def _fetch_nfl_state(timeout):
+    return get_sleeper_client().get_nfl_state(timeout)
+
+
+class NFLStateProvider:
+    """
+    TTL-cached NFL state with single-flight refresh and last-known-good fallback.
+
+    Concurrent callers that find the cache stale share one in-flight request
+    instead of each hitting Sleeper. If a refresh fails, the last good state is
+    served (and retried after error_ttl_seconds); an error is only raised when
+    no state has ever been fetched.
+
+    Args:
+        ttl_seconds: How long a fetched state is considered fresh
+        error_ttl_seconds: How long to serve stale state before retrying after a failure
+        fetcher: Callable taking a timeout and returning the state dict (defaults to Sleeper)
+        timeout: Request timeout in seconds
+    """
+
+    def __init__(self, ttl_seconds=300, error_ttl_seconds=30, fetcher=None, timeout=10):
+        self.ttl_seconds = ttl_seconds
+        self.error_ttl_seconds = error_ttl_seconds
+        self.fetcher = fetcher or _fetch_nfl_state
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._state = None
+        self._expires_at = 0.0
+        self._last_error = None
+        self._inflight = None
+
+    def get_state(self, force_refresh=False):
+        """
+        Return the current NFL state dict (season, week, season_type, ...).
+
+        Raises:
+            Exception: The fetch error, if no state has ever been fetched
+        """
+        with self._lock:
+            if not force_refresh and self._state is not None and time.monotonic() < self._expires_at:
+                return dict(self._state)
+            if self._inflight is None:
+                self._inflight = threading.Event()
+                is_leader = True
+            else:
+                is_leader = False
+            inflight = self._inflight
+
+        if not is_leader:
+            inflight.wait(self.timeout + 1)
+            return self._current_or_raise()
+
+        try:
+            state = self.fetcher(self.timeout)
+            with self._lock:
+                self._state = state
+                self._expires_at = time.monotonic() + self.ttl_seconds
+                self._last_error = None
+            logger.info(f"Refreshed NFL state - Season: {state.get('season')}, Week: {state.get('week')}")
+        except Exception as e:
+            with self._lock:
+                self._last_error = e
+                has_fallback = self._state is not None
+                if has_fallback:
+                    self._expires_at = time.monotonic() + self.error_ttl_seconds
+            if has_fallback:
+                logger.warning(f"Failed to refresh NFL state, serving last known good: {e}")
+            else:
+                logger.error(f"Failed to fetch NFL state: {e}")
+        finally:
+            with self._lock:
+                self._inflight = None
+            inflight.set()
+
+        return self._current_or_raise()
+
+    def _current_or_raise(self):
+        with self._lock:
+            if self._state is not None:
+                return dict(self._state)
+            error = self._last_error
+        raise error or RuntimeError("NFL state unavailable")
+
+    def get_season_and_week(self):
+        """Return (season, week) with the app's usual defaults filled in"""
+        state = self.get_state()
+        return str(state.get('season', '2025')), state.get('week', 1)
+
+    def invalidate(self):
+        """Force the next call to refresh from Sleeper"""
+        with self._lock:
+            self._expires_at = 0.0
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_nfl_state_provider():
+    """
+    Process-wide provider, reused across warm Lambda invocations.
+
+    TTL can be tuned with the NFL_STATE_TTL_SECONDS environment variable.
+    """
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = NFLStateProvider(ttl_seconds=int(os.environ.get('NFL_STATE_TTL_SECONDS', '300')))
+        return _provider
+
+
+def get_nfl_state(force_refresh=False):
+    """Convenience wrapper around the shared provider's get_state()"""
+    return get_nfl_state_provider().get_state(force_refresh)
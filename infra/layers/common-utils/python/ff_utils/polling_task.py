@@ -0,0 +1,187 @@
+"""
+Polling task utilities for Fantasy Football application.
+Start and stop the Fargate polling service without launching duplicates.
+"""
+
+import logging
+import os
+import time
+from datetime import timedelta
+
+import boto3
+from botocore.exceptions import ClientError
+
+from .schedule import GameSchedule
+
+logger = logging.getLogger(__name__)
+
+POLLING_TASK_FAMILY = 'ff-polling-service'
+POLLING_STATUS_KEY = {'id': 'polling_status'}
+
+# start_polling_task outcomes
+TASK_STARTED = 'started'  # this call launched the task
+TASK_RUNNING = 'running'  # a task was already running or on its way up
+TASK_STARTING = 'starting'  # another caller holds the start claim and is launching one
+
+# How long a start claim blocks other callers: covers list_tasks -> run_task
+# until the new task shows up in list_tasks (as PROVISIONING/PENDING)
+START_CLAIM_SECONDS = 120
+
+# Start polling this long before a game window, keep going this long after it
+START_LEAD = timedelta(minutes=int(os.environ.get('POLLING_START_LEAD_MINUTES', '15')))
+STOP_GRACE = timedelta(minutes=int(os.environ.get('POLLING_STOP_GRACE_MINUTES', '30')))
+
+_ecs = None
+
+
+def get_ecs_client():
+    global _ecs
+    if _ecs is None:
+        _ecs = boto3.client('ecs')
+    return _ecs
+
+
+def polling_window(now, schedule=None):
+    """
+    (start, end) of the polling window containing now, or None.
+
+    A polling window is a GameSchedule window (NFL_GAME_WINDOWS) starting
+    POLLING_START_LEAD_MINUTES early and ending POLLING_STOP_GRACE_MINUTES late.
+    """
+    schedule = schedule or GameSchedule.from_env()
+    for probe in (now, now + START_LEAD, now - STOP_GRACE):
+        window = schedule.current_window(probe)
+        if window:
+            start, end = window[0] - START_LEAD, window[1] + STOP_GRACE
+            if start <= now < end:
+                return start, end
+    return None
+
+
+def next_transition(now, schedule=None):
+    """When the schedule next wants polling flipped: the end of the current window or the next start"""
+    schedule = schedule or GameSchedule.from_env()
+    window = polling_window(now, schedule)
+    if window:
+        return window[1]
+    return schedule.next_window_start(now) - START_LEAD
+
+
+def list_polling_tasks(cluster_arn=None, ecs=None):
+    """
+    ARNs of polling tasks that are running or on their way up.
+
+    desiredStatus RUNNING includes PROVISIONING and PENDING tasks, so a task
+    started a moment ago is already counted.
+    """
+    ecs = ecs or get_ecs_client()
+    response = ecs.list_tasks(
+        cluster=cluster_arn or os.environ['ECS_CLUSTER_ARN'],
+        family=POLLING_TASK_FAMILY,
+        desiredStatus='RUNNING'
+    )
+    return response['taskArns']
+
+
+def claim_start(table, holder, hold_seconds=START_CLAIM_SECONDS):
+    """
+    Take the short-lived start claim on the polling status item.
+
+    Only one caller (scheduler or admin toggle) can hold it at a time, which
+    closes the gap between checking for running tasks and run_task.
+
+    Args:
+        table: boto3 Table for the polling state table
+        holder: Who is starting the task, for logs and the status item
+        hold_seconds: How long the claim blocks other starters
+
+    Returns:
+        True if the claim was taken, False if someone else holds it
+    """
+    now = int(time.time())
+    try:
+        table.update_item(
+            Key=POLLING_STATUS_KEY,
+            UpdateExpression='SET start_claimed_until = :until, start_claimed_by = :holder',
+            ConditionExpression='attribute_not_exists(start_claimed_until) OR start_claimed_until < :now',
+            ExpressionAttributeValues={':until': now + hold_seconds, ':holder': holder, ':now': now}
+        )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return False
+        raise
+
+
+def start_polling_task(table, started_by, ecs=None):
+    """
+    Start the polling task unless one is already running or being started.
+
+    Args:
+        table: boto3 Table for the polling state table
+        started_by: Caller name, recorded as the ECS startedBy and a task tag
+        ecs: Optional ECS client
+
+    Returns:
+        (task_arn, outcome): TASK_STARTED with the new task, TASK_RUNNING
+        with an existing one, or TASK_STARTING with None while another
+        caller holds the start claim (its task may still fail to start)
+
+    Raises:
+        Exception: If ECS reports failures starting the task
+    """
+    ecs = ecs or get_ecs_client()
+    cluster_arn = os.environ['ECS_CLUSTER_ARN']
+
+    running = list_polling_tasks(cluster_arn, ecs)
+    if running:
+        logger.info(f"Polling task already running: {running[0]}")
+        return running[0], TASK_RUNNING
+    if not claim_start(table, started_by):
+        logger.info("Another caller is starting the polling task, not starting a second one")
+        return None, TASK_STARTING
+    # Re-check under the claim: a task started just before we took it is visible by now
+    running = list_polling_tasks(cluster_arn, ecs)
+    if running:
+        return running[0], TASK_RUNNING
+
+    response = ecs.run_task(
+        cluster=cluster_arn,
+        taskDefinition=os.environ['POLLING_TASK_DEFINITION_ARN'],
+        launchType='FARGATE',
+        startedBy=started_by[:36],
+        networkConfiguration={
+            'awsvpcConfiguration': {
+                'subnets': os.environ['SUBNET_IDS'].split(','),
+                'securityGroups': [os.environ['SECURITY_GROUP_ID']],
+                'assignPublicIp': 'ENABLED'
+            }
+        },
+        tags=[
+            {'key': 'Service', 'value': 'ff-polling'},
+            {'key': 'ManagedBy', 'value': started_by}
+        ]
+    )
+    if response.get('failures'):
+        failure_reasons = [f['reason'] for f in response['failures']]
+        raise Exception(f"ECS task failed to start: {', '.join(failure_reasons)}")
+
+    task_arn = response['tasks'][0]['taskArn'] if response.get('tasks') else None
+    logger.info(f"Started polling task {task_arn} ({started_by})")
+    return task_arn, TASK_STARTED
+
+
+def stop_polling_tasks(reason, task_arns=None, ecs=None):
+    """
+    Stop polling tasks (all running ones unless task_arns is given).
+
+    Returns:
+        Number of tasks asked to stop
+    """
+    ecs = ecs or get_ecs_client()
+    cluster_arn = os.environ['ECS_CLUSTER_ARN']
+    if task_arns is None:
+        task_arns = list_polling_tasks(cluster_arn, ecs)
+    for task_arn in task_arns:
+        ecs.stop_task(cluster=cluster_arn, task=task_arn, reason=reason)
+    return len(task_arns)
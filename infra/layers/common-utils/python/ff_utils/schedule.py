@@ -0,0 +1,80 @@
+"""
+NFL game window utilities for Fantasy Football application.
+Shared knowledge of when scores can change, for polling decisions.
+"""
+
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+WEEKDAYS = {'MON': 0, 'TUE': 1, 'WED': 2, 'THU': 3, 'FRI': 4, 'SAT': 5, 'SUN': 6}
+
+# (day, kickoff window start in US/Eastern, hours until the last game is final)
+DEFAULT_GAME_WINDOWS = [
+    {'day': 'THU', 'start': '20:00', 'hours': 4.5},
+    {'day': 'SUN', 'start': '09:00', 'hours': 15.5},  # International, early, late and SNF
+    {'day': 'MON', 'start': '19:00', 'hours': 5.5},   # Covers Monday doubleheaders
+]
+
+
+class GameSchedule:
+    """
+    Weekly recurring NFL game windows.
+
+    Windows are configured in Eastern time and may run past midnight. Set the
+    NFL_GAME_WINDOWS environment variable to a JSON list of
+    {"day": "SAT", "start": "16:30", "hours": 8} entries to override the
+    defaults (e.g. for late-season Saturday or holiday games).
+
+    Args:
+        windows: List of window dicts (defaults to DEFAULT_GAME_WINDOWS)
+        tz_name: Time zone the windows are expressed in
+    """
+
+    def __init__(self, windows=None, tz_name='America/New_York'):
+        self.tz = ZoneInfo(tz_name)
+        self.windows = []
+        for window in windows or DEFAULT_GAME_WINDOWS:
+            hour, minute = (int(part) for part in window['start'].split(':'))
+            self.windows.append((WEEKDAYS[window['day'].upper()[:3]], hour, minute, timedelta(hours=float(window['hours']))))
+
+    @classmethod
+    def from_env(cls):
+        """Build a schedule from NFL_GAME_WINDOWS, falling back to the defaults"""
+        configured = os.environ.get('NFL_GAME_WINDOWS')
+        return cls(json.loads(configured) if configured else None)
+
+    def _occurrences(self, now):
+        """Window (start, end) pairs for last week through next week, around now"""
+        local_now = now.astimezone(self.tz)
+        week_start = (local_now - timedelta(days=local_now.weekday())).date()
+        for week_offset in (-7, 0, 7):
+            for weekday, hour, minute, duration in self.windows:
+                day = week_start + timedelta(days=week_offset + weekday)
+                start = datetime(day.year, day.month, day.day, hour, minute, tzinfo=self.tz)
+                yield start, start + duration
+
+    def current_window(self, now=None):
+        """Return (start, end) of the window containing now, or None"""
+        now = now or datetime.now(timezone.utc)
+        for start, end in self._occurrences(now):
+            if start <= now < end:
+                return start, end
+        return None
+
+    def is_live(self, now=None):
+        """True while games can be in progress"""
+        return self.current_window(now) is not None
+
+    def next_window_start(self, now=None):
+        """Start of the next window after now"""
+        now = now or datetime.now(timezone.utc)
+        return min(start for start, _ in self._occurrences(now) if start > now)
+
+    def seconds_until_next_window(self, now=None):
+        """0 while a window is live, otherwise seconds until the next one starts"""
+        now = now or datetime.now(timezone.utc)
+        if self.is_live(now):
+            return 0.0
+        return (self.next_window_start(now) - now).total_seconds()
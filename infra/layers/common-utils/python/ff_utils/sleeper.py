@@ -0,0 +1,232 @@
+"""
+Sleeper API client for Fantasy Football application.
+Pooled keep-alive HTTP session with retries, rate limiting and a circuit
+breaker, shared across warm invocations.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .rate_limit import TokenBucket, CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+SLEEPER_BASE_URL = 'https://api.sleeper.app/v1'
+
+# (connect, read) seconds; the players dump needs a longer read timeout
+DEFAULT_TIMEOUT = (3.05, 15)
+PLAYERS_TIMEOUT = (3.05, 30)
+
+# Requests per second and burst size per endpoint group, plus an overall cap
+# well under Sleeper's documented ~1000 calls/minute. Override with the
+# SLEEPER_RATE_LIMITS env var, e.g. {"matchups": {"rate": 2, "burst": 4}}.
+DEFAULT_RATE_LIMITS = {
+    'total': {'rate': 10, 'burst': 20},
+    'matchups': {'rate': 5, 'burst': 10},
+    'league': {'rate': 5, 'burst': 10},
+    'state': {'rate': 1, 'burst': 5},
+    'players': {'rate': 0.1, 'burst': 3},  # ~5MB dump; Sleeper asks for it at most daily
+}
+
+
+def endpoint_group(path):
+    """Rate limit group for an API path"""
+    parts = path.strip('/').split('/')
+    if parts[0] == 'players':
+        return 'players'
+    if parts[0] == 'state':
+        return 'state'
+    if parts[0] == 'league' and len(parts) > 2 and parts[2] == 'matchups':
+        return 'matchups'
+    return 'league'
+
+
+def rate_limits_from_env():
+    limits = {group: dict(limit) for group, limit in DEFAULT_RATE_LIMITS.items()}
+    configured = os.environ.get('SLEEPER_RATE_LIMITS')
+    if configured:
+        for group, limit in json.loads(configured).items():
+            limits.setdefault(group, {}).update(limit)
+    return limits
+
+
+class SleeperClient:
+    """
+    Sleeper API client over one pooled requests.Session.
+
+    Connections are kept alive between calls, so only the first request pays
+    for the TLS handshake. Idempotent GETs are retried with exponential
+    backoff on connection errors, 429 and 5xx responses (honouring
+    Retry-After). The session is safe to share between threads.
+
+    Every call takes a token from its endpoint group's bucket and from the
+    overall bucket (waiting if needed), so bursts from several leagues or a
+    backfill are smoothed out within the process. After repeated failures
+    (connection errors, 429 or 5xx after retries) the circuit breaker fails
+    calls fast with CircuitOpenError (a RequestException) until Sleeper
+    recovers.
+
+    Args:
+        base_url: API root (defaults to SLEEPER_BASE_URL env var, then the public API)
+        pool_maxsize: Connections kept open to Sleeper (size to the number of concurrent callers)
+        retries: Retry attempts per request
+        backoff_factor: Backoff base in seconds (0.5 -> 0.5s, 1s, 2s, ...)
+        timeout: Default (connect, read) timeout in seconds
+        rate_limits: {group: {'rate': per_second, 'burst': n}} (defaults to rate_limits_from_env())
+        breaker: CircuitBreaker (defaults to 5 failures / 30s)
+    """
+
+    def __init__(self, base_url=None, pool_maxsize=10, retries=3, backoff_factor=0.5, timeout=DEFAULT_TIMEOUT,
+                 rate_limits=None, breaker=None):
+        self.base_url = (base_url or os.environ.get('SLEEPER_BASE_URL') or SLEEPER_BASE_URL).rstrip('/')
+        self.timeout = timeout
+        self.buckets = {
+            group: TokenBucket(limit['rate'], limit['burst'])
+            for group, limit in (rate_limits or rate_limits_from_env()).items()
+        }
+        self.breaker = breaker or CircuitBreaker()
+        # Optional callable(path, response) seeing every response, e.g. to record traffic for replays
+        self.recorder = None
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            respect_retry_after_header=True,
+            raise_on_status=False  # Hand the final response to raise_for_status()
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def get(self, path, timeout=None):
+        """
+        GET a Sleeper API path and return the decoded JSON.
+
+        Args:
+            path: Path below the API root, e.g. '/state/nfl'
+            timeout: Override the default timeout
+
+        Raises:
+            requests.RequestException: On connection errors or non-2xx responses after retries
+        """
+        group = endpoint_group(path)
+        self.breaker.before_call('Sleeper')
+        waited = 0.0
+        for bucket_name in (group, 'total'):
+            bucket = self.buckets.get(bucket_name)
+            if bucket is not None:
+                waited += bucket.acquire()
+        if waited > 0.5:
+            logger.info(f"Rate limited Sleeper {group} request for {waited:.1f}s")
+
+        try:
+            response = self.session.get(f'{self.base_url}{path}', timeout=timeout or self.timeout)
+        except requests.RequestException:
+            self.breaker.record_failure()
+            raise
+        if response.status_code == 429 or response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        if self.recorder is not None:
+            self.recorder(path, response)
+        response.raise_for_status()
+        return response.json()
+
+    def stats(self):
+        """Limiter and breaker counters, for metrics endpoints and logs"""
+        return {
+            'buckets': {
+                group: {
+                    'tokens': bucket.tokens,
+                    'acquired': bucket.acquired,
+                    'throttled': bucket.throttled,
+                    'wait_seconds': bucket.wait_seconds,
+                }
+                for group, bucket in self.buckets.items()
+            },
+            'breaker': {
+                'state': self.breaker.state,
+                'consecutive_failures': self.breaker.consecutive_failures,
+                'times_opened': self.breaker.times_opened,
+                'rejected': self.breaker.rejected,
+                'retry_in': self.breaker.retry_in(),
+            },
+        }
+
+    def get_nfl_state(self, timeout=None):
+        return self.get('/state/nfl', timeout)
+
+    def get_league(self, league_id):
+        return self.get(f'/league/{league_id}')
+
+    def get_league_users(self, league_id):
+        return self.get(f'/league/{league_id}/users')
+
+    def get_league_rosters(self, league_id):
+        return self.get(f'/league/{league_id}/rosters')
+
+    def get_matchups(self, league_id, week):
+        return self.get(f'/league/{league_id}/matchups/{week}')
+
+    def get_players(self):
+        return self.get('/players/nfl', PLAYERS_TIMEOUT)
+
+    def close(self):
+        self.session.close()
+
+
+class ResponseRecorder:
+    """
+    SleeperClient recorder appending one JSON line per response.
+
+    Set as client.recorder (the polling service does this when
+    SLEEPER_RECORD_PATH is set); recordings feed the polling replay harness.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+        logger.info(f"Recording Sleeper responses to {path}")
+
+    def __call__(self, path, response):
+        line = json.dumps({
+            't': time.time(),
+            'path': path,
+            'status': response.status_code,
+            'body': response.text,
+        })
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_sleeper_client():
+    """
+    Process-wide client, reused across warm Lambda invocations.
+
+    Pool size can be tuned with the SLEEPER_POOL_SIZE environment variable.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = SleeperClient(pool_maxsize=int(os.environ.get('SLEEPER_POOL_SIZE', '10')))
+        return _client
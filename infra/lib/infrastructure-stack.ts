@@ -7,6 +7,8 @@ import * as ecs from 'aws-cdk-lib/aws-ecs';
 import * as ec2 from 'aws-cdk-lib/aws-ec2';
 import * as ecr from 'aws-cdk-lib/aws-ecr';
 import * as logs from 'aws-cdk-lib/aws-logs';
+import * as events from 'aws-cdk-lib/aws-events';
+import * as targets from 'aws-cdk-lib/aws-events-targets';
 import { Construct } from 'constructs';
 
 export class InfrastructureStack extends cdk.Stack {
@@ -148,7 +150,10 @@ export class InfrastructureStack extends cdk.Stack {
         OVERALL_STANDINGS_TABLE: overallStandingsTable.tableName,
         LEAGUE_DATA_TABLE: leagueDataTable.tableName,
         POLLING_STATE_TABLE: pollingStateTable.tableName,
+        SHUTDOWN_BUDGET_SECONDS: '45',
       },
+      // SIGKILL only after the service has had its full drain budget
+      stopTimeout: cdk.Duration.seconds(60),
       logging: ecs.LogDrivers.awsLogs({
         streamPrefix: 'polling',
         logGroup: pollingLogGroup
@@ -276,6 +281,33 @@ export class InfrastructureStack extends cdk.Stack {
       layers: [requestsLayer, commonUtilsLayer]
     });
 
+    // Starts the polling task shortly before NFL game windows and stops it after they end
+    const pollingSchedulerFunction = new lambda.Function(this, 'PollingSchedulerFunction', {
+      functionName: 'ff-polling-scheduler',
+      runtime: lambda.Runtime.PYTHON_3_11,
+      handler: 'lambda_function.lambda_handler',
+      code: lambda.Code.fromAsset('lambda/polling-scheduler'),
+      environment: {
+        POLLING_STATE_TABLE: pollingStateTable.tableName,
+        ECS_CLUSTER_ARN: cluster.clusterArn,
+        POLLING_TASK_DEFINITION_ARN: pollingTaskDefinition.taskDefinitionArn,
+        SUBNET_IDS: vpc.publicSubnets.map(subnet => subnet.subnetId).join(','),
+        SECURITY_GROUP_ID: ecsTaskSecurityGroup.securityGroupId,
+        POLLING_START_LEAD_MINUTES: '15',
+        POLLING_STOP_GRACE_MINUTES: '30'
+      },
+      timeout: cdk.Duration.seconds(60),
+      reservedConcurrentExecutions: 1,  // Never two scheduler runs deciding at once
+      layers: [requestsLayer, commonUtilsLayer]
+    });
+
+    new events.Rule(this, 'PollingScheduleRule', {
+      ruleName: 'ff-polling-scheduler',
+      description: 'Start/stop the polling task around NFL game windows',
+      schedule: events.Schedule.rate(cdk.Duration.minutes(5)),
+      targets: [new targets.LambdaFunction(pollingSchedulerFunction)]
+    });
+
     // Grant DynamoDB permissions to Lambda functions
 
     weeklyStandingsTable.grantReadWriteData(historicalBackfillFunction);
@@ -286,6 +318,7 @@ export class InfrastructureStack extends cdk.Stack {
     overallStandingsTable.grantReadData(apiFunction);
     leagueDataTable.grantReadData(apiFunction);
     pollingStateTable.grantReadWriteData(apiFunction);
+    pollingStateTable.grantReadWriteData(pollingSchedulerFunction);
 
     weeklyStandingsTable.grantReadData(monteCarloFunction);
     overallStandingsTable.grantReadWriteData(monteCarloFunction);
@@ -293,33 +326,44 @@ export class InfrastructureStack extends cdk.Stack {
 
     // Grant Lambda invoke permissions
     historicalBackfillFunction.grantInvoke(apiFunction);
-    monteCarloFunction.grantInvoke(apiFunction);
-
-    // Grant ECS permissions to API handler
-    apiFunction.addToRolePolicy(new iam.PolicyStatement({
+    // Backfill continuations and fan-out workers invoke the backfill itself (by name, to avoid a role/function cycle)
+    historicalBackfillFunction.addToRolePolicy(new iam.PolicyStatement({
       effect: iam.Effect.ALLOW,
-      actions: [
-        'ecs:RunTask',
-        'ecs:StopTask',
-        'ecs:DescribeTasks',
-        'ecs:ListTasks',
-        'ecs:TagResource'
-      ],
-      resources: [
-        pollingTaskDefinition.taskDefinitionArn,
-        `${cluster.clusterArn}/*`,
-        `arn:aws:ecs:${this.region}:${this.account}:task/${cluster.clusterName}/*`
-      ]
+      actions: ['lambda:InvokeFunction'],
+      resources: ['arn:aws:lambda:*:*:function:ff-historical-backfill']
     }));
+    monteCarloFunction.grantInvoke(apiFunction);
 
-    apiFunction.addToRolePolicy(new iam.PolicyStatement({
-      effect: iam.Effect.ALLOW,
-      actions: ['iam:PassRole'],
-      resources: [
-        fargateTaskRole.roleArn,
-        fargateExecutionRole.roleArn
-      ]
-    }));
+    // Grant ECS permissions to the API handler and polling scheduler (both start and stop the polling task)
+    const pollingTaskStatements = [
+      new iam.PolicyStatement({
+        effect: iam.Effect.ALLOW,
+        actions: [
+          'ecs:RunTask',
+          'ecs:StopTask',
+          'ecs:DescribeTasks',
+          'ecs:ListTasks',
+          'ecs:TagResource'
+        ],
+        resources: [
+          pollingTaskDefinition.taskDefinitionArn,
+          `${cluster.clusterArn}/*`,
+          `arn:aws:ecs:${this.region}:${this.account}:task/${cluster.clusterName}/*`
+        ]
+      }),
+      new iam.PolicyStatement({
+        effect: iam.Effect.ALLOW,
+        actions: ['iam:PassRole'],
+        resources: [
+          fargateTaskRole.roleArn,
+          fargateExecutionRole.roleArn
+        ]
+      })
+    ];
+    for (const statement of pollingTaskStatements) {
+      apiFunction.addToRolePolicy(statement);
+      pollingSchedulerFunction.addToRolePolicy(statement);
+    }
 
     apiFunction.role?.addManagedPolicy(
       iam.ManagedPolicy.fromAwsManagedPolicyName('AmazonDynamoDBFullAccess')
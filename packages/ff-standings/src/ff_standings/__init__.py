@@ -6,7 +6,27 @@ from .service import StandingsService
 from .calculator import StandingsCalculator
 from .data_cache import DataCache
 from .storage import StandingsStorage
+from .backends import StorageBackend, DynamoDBBackend, InMemoryBackend, SQLiteBackend, create_backend_from_env
+from .digests import stable_digest, matchup_digests, changed_teams
+from .metrics import StandingsMetrics, MetricsSink, InMemorySink, LoggingSink, EMFSink, metrics_from_env
 
-__all__ = ["StandingsService", "StandingsCalculator", "DataCache", "StandingsStorage"]
-
-
+__all__ = [
+    "StandingsService",
+    "StandingsCalculator",
+    "DataCache",
+    "StandingsStorage",
+    "StorageBackend",
+    "DynamoDBBackend",
+    "InMemoryBackend",
+    "SQLiteBackend",
+    "create_backend_from_env",
+    "StandingsMetrics",
+    "MetricsSink",
+    "InMemorySink",
+    "LoggingSink",
+    "EMFSink",
+    "metrics_from_env",
+    "stable_digest",
+    "matchup_digests",
+    "changed_teams",
+]
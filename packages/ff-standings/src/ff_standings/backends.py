@@ -0,0 +1,607 @@
+"""
+Pluggable storage backends for standings and league data
+"""
+
+import copy
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from decimal import Decimal
+from typing import List, Dict, Any, Optional, Iterable, Tuple, Callable
+
+import boto3
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+_DESERIALIZER = TypeDeserializer()
+
+# Logical table name -> (partition key, sort key)
+TABLE_KEYS = {
+    'league_data': ('data_type', 'id'),
+    'weekly_standings': ('season_week', 'team_id'),
+    'overall_standings': ('season', 'team_id'),
+    'polling_state': ('id', None),
+}
+
+
+def _key_values(table: str, item: Dict[str, Any]) -> Tuple[str, str]:
+    partition_key, sort_key = TABLE_KEYS[table]
+    return str(item[partition_key]), str(item[sort_key]) if sort_key else ''
+
+
+def _convert_floats_to_decimal(obj):
+    if isinstance(obj, float):
+        return Decimal(str(obj))
+    elif isinstance(obj, dict):
+        return {key: _convert_floats_to_decimal(value) for key, value in obj.items()}
+    elif isinstance(obj, list):
+        return [_convert_floats_to_decimal(item) for item in obj]
+    else:
+        return obj
+
+
+def _lease_available(item: Optional[Dict[str, Any]], holder: str, now: float) -> bool:
+    """True if a lease item is free, expired or already held by holder"""
+    return (
+        item is None
+        or not item.get('holder')
+        or item.get('holder') == holder
+        or float(item.get('expires_at', 0)) < now
+    )
+
+
+def _lease_values(holder: str, duration: float, now: float) -> Dict[str, Any]:
+    return {'holder': holder, 'expires_at': now + duration, 'renewed_at': now, 'lease_seconds': duration}
+
+
+class StorageBackend(ABC):
+    """
+    Minimal key/value interface over the DynamoDB tables used by the app.
+
+    Tables are addressed by logical name (see TABLE_KEYS) so the same calling
+    code runs against DynamoDB, an in-memory store or a local SQLite file.
+
+    If observer is set, it is called as
+    observer(operation, table, capacity_units, latency_ms) once per underlying
+    storage request (capacity and latency are 0 outside DynamoDB).
+    """
+
+    observer: Optional[Callable[[str, str, float, float], None]] = None
+
+    def _observe(self, operation: str, table: str, capacity_units: float = 0.0, latency_ms: float = 0.0) -> None:
+        if self.observer is not None:
+            self.observer(operation, table, capacity_units, latency_ms)
+
+    def view(self, table_names: Optional[Dict[str, str]] = None) -> 'StorageBackend':
+        """
+        Another handle on the same storage with its own observer.
+
+        Lets several consumers (e.g. per-league StandingsMetrics) instrument a
+        shared backend without replacing each other's observer. table_names
+        points logical tables of the view at other stored tables.
+        """
+        backend = copy.copy(self)
+        backend.observer = None
+        if table_names:
+            backend._use_table_names(table_names)
+        return backend
+
+    def _use_table_names(self, table_names: Dict[str, str]) -> None:
+        raise ValueError(f"{type(self).__name__} does not support table_names")
+
+    @abstractmethod
+    def get_item(self, table: str, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the item for key, or None if it does not exist"""
+
+    @abstractmethod
+    def put_item(self, table: str, item: Dict[str, Any]) -> None:
+        """Create or fully replace an item"""
+
+    def batch_put_items(self, table: str, items: Iterable[Dict[str, Any]]) -> None:
+        """Create or replace many items (backends may group the writes)"""
+        for item in items:
+            self.put_item(table, item)
+
+    @abstractmethod
+    def update_item(
+        self,
+        table: str,
+        key: Dict[str, Any],
+        values: Dict[str, Any],
+        defaults: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Set attributes on an item (creating it if needed) and return the new item.
+
+        Attributes in defaults are only written when the item doesn't have them yet.
+        """
+
+    @abstractmethod
+    def acquire_lease(
+        self, table: str, key: Dict[str, Any], holder: str, duration: float, now: Optional[float] = None
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Take or renew the lease stored at key for holder, atomically.
+
+        Succeeds when the lease is free, expired (expires_at, epoch seconds,
+        before now) or already held by holder, and extends it to now + duration.
+        Returns (acquired, lease item); when not acquired the item is the
+        current holder's lease.
+        """
+
+    @abstractmethod
+    def release_lease(self, table: str, key: Dict[str, Any], holder: str) -> bool:
+        """Expire the lease at key if holder still has it; returns whether it did"""
+
+    @abstractmethod
+    def query(self, table: str, partition_value: str, sort_prefix: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return all items in a partition, optionally restricted to a sort key prefix"""
+
+    @abstractmethod
+    def scan(self, table: str, attribute: Optional[str] = None, prefix: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return all items in a table, optionally where attribute begins with prefix"""
+
+
+class DynamoDBBackend(StorageBackend):
+    """Backend over boto3 DynamoDB Table resources"""
+
+    BATCH_SIZE = 25
+    MAX_BATCH_RETRIES = 8
+
+    def __init__(self, tables: Dict[str, Any], dynamodb=None):
+        self.tables = tables
+        # boto3 resource the tables came from, reusable for more tables on the same connection pool
+        self.dynamodb = dynamodb
+
+    def _capacity_kwargs(self) -> Dict[str, Any]:
+        return {'ReturnConsumedCapacity': 'TOTAL'} if self.observer is not None else {}
+
+    def _observe_response(self, operation: str, table: str, response: Dict[str, Any], started: float) -> None:
+        if self.observer is None:
+            return
+        latency_ms = (time.perf_counter() - started) * 1000
+        consumed = response.get('ConsumedCapacity') or {}
+        if isinstance(consumed, list):
+            units = sum(float(entry.get('CapacityUnits', 0)) for entry in consumed)
+        else:
+            units = float(consumed.get('CapacityUnits', 0))
+        self._observe(operation, table, units, latency_ms)
+
+    def _use_table_names(self, table_names: Dict[str, str]) -> None:
+        if self.dynamodb is None:
+            raise ValueError("table_names needs the boto3 resource the tables came from")
+        self.tables = {**self.tables, **{table: self.dynamodb.Table(name) for table, name in table_names.items()}}
+
+    def _table(self, table: str):
+        try:
+            return self.tables[table]
+        except KeyError:
+            raise ValueError(f"No DynamoDB table configured for '{table}'")
+
+    def get_item(self, table: str, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        started = time.perf_counter()
+        response = self._table(table).get_item(Key=key, **self._capacity_kwargs())
+        self._observe_response('get_item', table, response, started)
+        return response.get('Item')
+
+    def put_item(self, table: str, item: Dict[str, Any]) -> None:
+        item = _convert_floats_to_decimal(item)
+        started = time.perf_counter()
+        response = self._table(table).put_item(Item=item, **self._capacity_kwargs())
+        self._observe_response('put_item', table, response, started)
+
+    def batch_put_items(self, table: str, items: Iterable[Dict[str, Any]]) -> None:
+        # Later items win for duplicate keys (BatchWriteItem rejects duplicates in one request)
+        unique_items = {_key_values(table, item): item for item in items}
+        requests = [{'PutRequest': {'Item': _convert_floats_to_decimal(item)}} for item in unique_items.values()]
+        dynamodb_table = self._table(table)
+        for start in range(0, len(requests), self.BATCH_SIZE):
+            pending = {dynamodb_table.name: requests[start:start + self.BATCH_SIZE]}
+            for attempt in range(self.MAX_BATCH_RETRIES + 1):
+                started = time.perf_counter()
+                response = dynamodb_table.meta.client.batch_write_item(RequestItems=pending, **self._capacity_kwargs())
+                self._observe_response('batch_write_item', table, response, started)
+                pending = response.get('UnprocessedItems') or {}
+                if not pending:
+                    break
+                if attempt == self.MAX_BATCH_RETRIES:
+                    raise RuntimeError(f"Unprocessed items remained after {self.MAX_BATCH_RETRIES} retries writing to {table}")
+                time.sleep(min(0.05 * (2 ** attempt), 2.0))
+
+    def update_item(
+        self,
+        table: str,
+        key: Dict[str, Any],
+        values: Dict[str, Any],
+        defaults: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        names = {}
+        expression_values = {}
+        assignments = []
+        for i, (name, value) in enumerate(values.items()):
+            names[f'#v{i}'] = name
+            expression_values[f':v{i}'] = value
+            assignments.append(f'#v{i} = :v{i}')
+        for i, (name, value) in enumerate((defaults or {}).items()):
+            names[f'#d{i}'] = name
+            expression_values[f':d{i}'] = value
+            assignments.append(f'#d{i} = if_not_exists(#d{i}, :d{i})')
+        if not assignments:
+            return self.get_item(table, key) or {}
+
+        started = time.perf_counter()
+        response = self._table(table).update_item(
+            Key=key,
+            UpdateExpression='SET ' + ', '.join(assignments),
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=_convert_floats_to_decimal(expression_values),
+            ReturnValues='ALL_NEW',
+            **self._capacity_kwargs()
+        )
+        self._observe_response('update_item', table, response, started)
+        return response.get('Attributes', {})
+
+    def acquire_lease(
+        self, table: str, key: Dict[str, Any], holder: str, duration: float, now: Optional[float] = None
+    ) -> Tuple[bool, Dict[str, Any]]:
+        now = time.time() if now is None else now
+        values = _lease_values(holder, duration, now)
+        names = {f'#{name}': name for name in values}
+        expression_values = {f':{name}': value for name, value in values.items()}
+        expression_values[':now'] = now
+        started = time.perf_counter()
+        try:
+            response = self._table(table).update_item(
+                Key=key,
+                UpdateExpression='SET ' + ', '.join(f'#{name} = :{name}' for name in values),
+                ConditionExpression='attribute_not_exists(#holder) OR #holder = :holder OR #expires_at < :now',
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=_convert_floats_to_decimal(expression_values),
+                ReturnValues='ALL_NEW',
+                ReturnValuesOnConditionCheckFailure='ALL_OLD',
+                **self._capacity_kwargs()
+            )
+        except ClientError as e:
+            self._observe('update_item', table, 0.0, (time.perf_counter() - started) * 1000)
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            # Failed condition errors carry the current item in low-level (typed) form
+            current = e.response.get('Item')
+            if current is None:
+                return False, self.get_item(table, key) or {}
+            return False, {name: _DESERIALIZER.deserialize(value) for name, value in current.items()}
+        self._observe_response('update_item', table, response, started)
+        return True, response.get('Attributes', {})
+
+    def release_lease(self, table: str, key: Dict[str, Any], holder: str) -> bool:
+        started = time.perf_counter()
+        try:
+            response = self._table(table).update_item(
+                Key=key,
+                UpdateExpression='SET #expires_at = :zero',
+                ConditionExpression='#holder = :holder',
+                ExpressionAttributeNames={'#expires_at': 'expires_at', '#holder': 'holder'},
+                ExpressionAttributeValues={':zero': 0, ':holder': holder},
+                **self._capacity_kwargs()
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            return False
+        self._observe_response('update_item', table, response, started)
+        return True
+
+    def query(self, table: str, partition_value: str, sort_prefix: Optional[str] = None) -> List[Dict[str, Any]]:
+        partition_key, sort_key = TABLE_KEYS[table]
+        condition = boto3.dynamodb.conditions.Key(partition_key).eq(partition_value)
+        if sort_prefix is not None:
+            condition = condition & boto3.dynamodb.conditions.Key(sort_key).begins_with(sort_prefix)
+        return self._paginate('query', table, KeyConditionExpression=condition)
+
+    def scan(self, table: str, attribute: Optional[str] = None, prefix: Optional[str] = None) -> List[Dict[str, Any]]:
+        kwargs = {}
+        if attribute is not None:
+            kwargs['FilterExpression'] = boto3.dynamodb.conditions.Attr(attribute).begins_with(prefix or '')
+        return self._paginate('scan', table, **kwargs)
+
+    def _paginate(self, operation: str, table: str, **kwargs) -> List[Dict[str, Any]]:
+        method = getattr(self._table(table), operation)
+        kwargs.update(self._capacity_kwargs())
+        items = []
+        while True:
+            started = time.perf_counter()
+            response = method(**kwargs)
+            self._observe_response(operation, table, response, started)
+            items.extend(response.get('Items', []))
+            last_key = response.get('LastEvaluatedKey')
+            if not last_key:
+                return items
+            kwargs['ExclusiveStartKey'] = last_key
+
+
+class InMemoryBackend(StorageBackend):
+    """
+    Dict-backed backend for tests, offline replays and load tests.
+
+    table_names maps logical tables to stored names, so several leagues with
+    their own tables can share one store without overwriting each other.
+    """
+
+    def __init__(self, table_names: Optional[Dict[str, str]] = None):
+        self.table_names = dict(table_names or {})
+        self._tables: Dict[str, Dict[Tuple[str, str], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _use_table_names(self, table_names: Dict[str, str]) -> None:
+        self.table_names = {**self.table_names, **table_names}
+
+    def _table(self, table: str) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        return self._tables.setdefault(self.table_names.get(table, table), {})
+
+    def get_item(self, table: str, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        self._observe('get_item', table)
+        with self._lock:
+            item = self._table(table).get(_key_values(table, key))
+            return copy.deepcopy(item) if item is not None else None
+
+    def put_item(self, table: str, item: Dict[str, Any]) -> None:
+        self._observe('put_item', table)
+        with self._lock:
+            self._table(table)[_key_values(table, item)] = copy.deepcopy(item)
+
+    def batch_put_items(self, table: str, items: Iterable[Dict[str, Any]]) -> None:
+        self._observe('batch_write_item', table)
+        with self._lock:
+            for item in items:
+                self._table(table)[_key_values(table, item)] = copy.deepcopy(item)
+
+    def update_item(
+        self,
+        table: str,
+        key: Dict[str, Any],
+        values: Dict[str, Any],
+        defaults: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        self._observe('update_item', table)
+        with self._lock:
+            item = self._table(table).setdefault(_key_values(table, key), copy.deepcopy(key))
+            for name, value in (defaults or {}).items():
+                item.setdefault(name, copy.deepcopy(value))
+            item.update(copy.deepcopy(values))
+            return copy.deepcopy(item)
+
+    def acquire_lease(
+        self, table: str, key: Dict[str, Any], holder: str, duration: float, now: Optional[float] = None
+    ) -> Tuple[bool, Dict[str, Any]]:
+        self._observe('update_item', table)
+        now = time.time() if now is None else now
+        with self._lock:
+            item = self._table(table).get(_key_values(table, key))
+            if not _lease_available(item, holder, now):
+                return False, copy.deepcopy(item)
+            item = self._table(table).setdefault(_key_values(table, key), copy.deepcopy(key))
+            item.update(_lease_values(holder, duration, now))
+            return True, copy.deepcopy(item)
+
+    def release_lease(self, table: str, key: Dict[str, Any], holder: str) -> bool:
+        self._observe('update_item', table)
+        with self._lock:
+            item = self._table(table).get(_key_values(table, key))
+            if item is None or item.get('holder') != holder:
+                return False
+            item['expires_at'] = 0
+            return True
+
+    def query(self, table: str, partition_value: str, sort_prefix: Optional[str] = None) -> List[Dict[str, Any]]:
+        self._observe('query', table)
+        partition_value = str(partition_value)
+        with self._lock:
+            return [
+                copy.deepcopy(item)
+                for (pk, sk), item in sorted(self._table(table).items())
+                if pk == partition_value and (sort_prefix is None or sk.startswith(sort_prefix))
+            ]
+
+    def scan(self, table: str, attribute: Optional[str] = None, prefix: Optional[str] = None) -> List[Dict[str, Any]]:
+        self._observe('scan', table)
+        with self._lock:
+            return [
+                copy.deepcopy(item)
+                for item in self._table(table).values()
+                if attribute is None or str(item.get(attribute, '')).startswith(prefix or '')
+            ]
+
+
+class _DecimalJSONEncoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return float(o)
+        return super().default(o)
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    SQLite-backed backend for local runs that need to survive restarts.
+
+    Items are stored as JSON documents; numbers are read back as Decimal to
+    match what boto3 returns from DynamoDB. table_names maps logical tables
+    to the stored table_name, as for InMemoryBackend.
+    """
+
+    def __init__(self, path: str = ':memory:', table_names: Optional[Dict[str, str]] = None):
+        self.path = path
+        self.table_names = dict(table_names or {})
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS items ('
+                'table_name TEXT NOT NULL, pk TEXT NOT NULL, sk TEXT NOT NULL, data TEXT NOT NULL, '
+                'PRIMARY KEY (table_name, pk, sk))'
+            )
+
+    def _use_table_names(self, table_names: Dict[str, str]) -> None:
+        self.table_names = {**self.table_names, **table_names}
+
+    def _table_name(self, table: str) -> str:
+        return self.table_names.get(table, table)
+
+    @staticmethod
+    def _dumps(item: Dict[str, Any]) -> str:
+        return json.dumps(item, cls=_DecimalJSONEncoder)
+
+    @staticmethod
+    def _loads(data: str) -> Dict[str, Any]:
+        return json.loads(data, parse_float=Decimal)
+
+    def get_item(self, table: str, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        self._observe('get_item', table)
+        name = self._table_name(table)
+        pk, sk = _key_values(table, key)
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data FROM items WHERE table_name = ? AND pk = ? AND sk = ?', (name, pk, sk)
+            ).fetchone()
+        return self._loads(row[0]) if row else None
+
+    def put_item(self, table: str, item: Dict[str, Any]) -> None:
+        self._write_rows('put_item', table, [item])
+
+    def batch_put_items(self, table: str, items: Iterable[Dict[str, Any]]) -> None:
+        self._write_rows('batch_write_item', table, items)
+
+    def _write_rows(self, operation: str, table: str, items: Iterable[Dict[str, Any]]) -> None:
+        self._observe(operation, table)
+        name = self._table_name(table)
+        rows = [(name, *_key_values(table, item), self._dumps(item)) for item in items]
+        with self._lock, self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?)', rows)
+
+    def update_item(
+        self,
+        table: str,
+        key: Dict[str, Any],
+        values: Dict[str, Any],
+        defaults: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        self._observe('update_item', table)
+        name = self._table_name(table)
+        pk, sk = _key_values(table, key)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                'SELECT data FROM items WHERE table_name = ? AND pk = ? AND sk = ?', (name, pk, sk)
+            ).fetchone()
+            item = self._loads(row[0]) if row else dict(key)
+            for attribute, value in (defaults or {}).items():
+                item.setdefault(attribute, value)
+            item.update(values)
+            data = self._dumps(item)
+            self._conn.execute('INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?)', (name, pk, sk, data))
+        return self._loads(data)
+
+    def acquire_lease(
+        self, table: str, key: Dict[str, Any], holder: str, duration: float, now: Optional[float] = None
+    ) -> Tuple[bool, Dict[str, Any]]:
+        self._observe('update_item', table)
+        now = time.time() if now is None else now
+        name = self._table_name(table)
+        pk, sk = _key_values(table, key)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                'SELECT data FROM items WHERE table_name = ? AND pk = ? AND sk = ?', (name, pk, sk)
+            ).fetchone()
+            item = self._loads(row[0]) if row else None
+            if not _lease_available(item, holder, now):
+                return False, item
+            item = item or dict(key)
+            item.update(_lease_values(holder, duration, now))
+            data = self._dumps(item)
+            self._conn.execute('INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?)', (name, pk, sk, data))
+        return True, self._loads(data)
+
+    def release_lease(self, table: str, key: Dict[str, Any], holder: str) -> bool:
+        self._observe('update_item', table)
+        name = self._table_name(table)
+        pk, sk = _key_values(table, key)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                'SELECT data FROM items WHERE table_name = ? AND pk = ? AND sk = ?', (name, pk, sk)
+            ).fetchone()
+            item = self._loads(row[0]) if row else None
+            if item is None or item.get('holder') != holder:
+                return False
+            item['expires_at'] = 0
+            self._conn.execute(
+                'INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?)', (name, pk, sk, self._dumps(item))
+            )
+        return True
+
+    def query(self, table: str, partition_value: str, sort_prefix: Optional[str] = None) -> List[Dict[str, Any]]:
+        sql = 'SELECT data FROM items WHERE table_name = ? AND pk = ?'
+        params = [self._table_name(table), str(partition_value)]
+        if sort_prefix is not None:
+            sql += ' AND substr(sk, 1, ?) = ?'
+            params += [len(sort_prefix), sort_prefix]
+        self._observe('query', table)
+        with self._lock:
+            rows = self._conn.execute(sql + ' ORDER BY sk', params).fetchall()
+        return [self._loads(row[0]) for row in rows]
+
+    def scan(self, table: str, attribute: Optional[str] = None, prefix: Optional[str] = None) -> List[Dict[str, Any]]:
+        self._observe('scan', table)
+        name = self._table_name(table)
+        with self._lock:
+            rows = self._conn.execute('SELECT data FROM items WHERE table_name = ?', (name,)).fetchall()
+        items = [self._loads(row[0]) for row in rows]
+        if attribute is None:
+            return items
+        return [item for item in items if str(item.get(attribute, '')).startswith(prefix or '')]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_backend_from_env(
+    max_pool_connections: Optional[int] = None,
+    table_names: Optional[Dict[str, str]] = None,
+    dynamodb=None,
+) -> StorageBackend:
+    """
+    Build a backend from environment variables.
+
+    STORAGE_BACKEND selects 'dynamodb' (default), 'memory' or 'sqlite'
+    (SQLITE_PATH, default ff-local.db). DynamoDB table names come from the
+    same *_TABLE variables the services already use, overridden per logical
+    table by table_names (the memory and sqlite backends store those tables
+    under the given names). max_pool_connections bounds the DynamoDB HTTP
+    connection pool for concurrent I/O; pass an existing boto3 resource as
+    dynamodb to share one pool between backends.
+    """
+    backend_type = os.environ.get('STORAGE_BACKEND', 'dynamodb').lower()
+    if backend_type == 'memory':
+        return InMemoryBackend(table_names)
+    if backend_type == 'sqlite':
+        return SQLiteBackend(os.environ.get('SQLITE_PATH', 'ff-local.db'), table_names)
+    if backend_type != 'dynamodb':
+        raise ValueError(f"Unknown STORAGE_BACKEND '{backend_type}'")
+
+    if dynamodb is None:
+        config = Config(max_pool_connections=max_pool_connections) if max_pool_connections else None
+        dynamodb = boto3.resource('dynamodb', config=config)
+    env_names = {
+        'league_data': 'LEAGUE_DATA_TABLE',
+        'weekly_standings': 'WEEKLY_STANDINGS_TABLE',
+        'overall_standings': 'OVERALL_STANDINGS_TABLE',
+        'polling_state': 'POLLING_STATE_TABLE',
+    }
+    names = {table: os.environ[env_name] for table, env_name in env_names.items() if env_name in os.environ}
+    names.update(table_names or {})
+    return DynamoDBBackend({table: dynamodb.Table(name) for table, name in names.items()}, dynamodb=dynamodb)
@@ -46,6 +46,10 @@ class StandingsCalculator:
         return roster
     
     def calculate_weekly_vs_everyone(self, matchups: List[Dict[str, Any]], team_names: Dict[str, str], players_data: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        team_scores = self.build_team_scores(matchups, team_names, players_data)
+        return self.rank_team_scores(team_scores)
+    
+    def build_team_scores(self, matchups: List[Dict[str, Any]], team_names: Dict[str, str], players_data: Optional[Dict[str, Any]] = None) -> Dict[str, Dict[str, Any]]:
         team_scores = {}
         for matchup in matchups:
             roster_id = str(matchup['roster_id'])
@@ -57,6 +61,9 @@ class StandingsCalculator:
                 'points': points,
                 'roster': roster
             }
+        return team_scores
+    
+    def rank_team_scores(self, team_scores: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
         sorted_teams = sorted(team_scores.values(), key=itemgetter('points'), reverse=True)
         total_teams = len(sorted_teams)
         weekly_results = []
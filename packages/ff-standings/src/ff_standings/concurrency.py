@@ -0,0 +1,41 @@
+"""
+Helpers for the optional thread-pool I/O mode
+"""
+
+import contextvars
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Iterable, List, Optional
+
+
+def submit_or_run(executor: Optional[Executor], fn: Callable[..., Any], *args, **kwargs) -> Future:
+    """Submit fn to the executor, or run it inline and return an already-completed Future"""
+    if executor is not None:
+        # Copy the caller's context so tasks inherit e.g. the active metrics stage
+        return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+    future = Future()
+    try:
+        future.set_result(fn(*args, **kwargs))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def run_concurrently(executor: Optional[Executor], calls: List[Callable[[], Any]]) -> List[Any]:
+    """
+    Run independent zero-argument calls and return their results in order.
+
+    Calls run on the executor when one is given. They must be leaf I/O calls
+    that don't themselves wait on the same executor, or a bounded pool can deadlock.
+    """
+    if executor is None:
+        return [call() for call in calls]
+    futures = [executor.submit(contextvars.copy_context().run, call) for call in calls]
+    return [future.result() for future in futures]
+
+
+def map_concurrently(executor: Optional[Executor], fn: Callable[[Any], Any], items: Iterable[Any]) -> List[Any]:
+    """Apply fn to each item, fanning out over the executor when one is given"""
+    if executor is None:
+        return [fn(item) for item in items]
+    futures = [executor.submit(contextvars.copy_context().run, fn, item) for item in items]
+    return [future.result() for future in futures]
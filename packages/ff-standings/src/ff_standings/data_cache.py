@@ -3,49 +3,77 @@ Data caching for players and team names
 """
 
 import logging
+import threading
 import time
-import boto3
-from typing import Dict, Any
+from concurrent.futures import Executor
+from typing import Dict, Any, List, Optional
+
+from .backends import StorageBackend, DynamoDBBackend
+from .concurrency import run_concurrently, submit_or_run
 
 logger = logging.getLogger(__name__)
 
 
 class DataCache:
-    def __init__(self, league_data_table, enable_persistent_cache: bool = False):
+    def __init__(
+        self,
+        league_data_table=None,
+        enable_persistent_cache: bool = False,
+        backend: Optional[StorageBackend] = None,
+        executor: Optional[Executor] = None,
+        players_cache: Optional['DataCache'] = None,
+    ):
         self.league_data_table = league_data_table
+        self.backend = backend or DynamoDBBackend({'league_data': league_data_table})
+        self.executor = executor
         self.enable_persistent_cache = enable_persistent_cache
+        # Another DataCache to take players data from (e.g. one shared by several leagues)
+        self.players_cache = players_cache
+        self._players_lock = threading.Lock()
         self._players_data = None
+        self.players_version = None  # last_updated of the loaded players item
         self._team_names = None
         self._cache_timestamp = 0
         self.cache_ttl = 3600 if enable_persistent_cache else 0
+        self.cache_stats = {'hits': 0, 'misses': 0}
     
-    def _is_cache_valid(self) -> bool:
-        if not self.enable_persistent_cache:
-            return False
-        if self._players_data is None or self._team_names is None:
-            return False
-        return (time.time() - self._cache_timestamp) < self.cache_ttl
+    def _is_cache_valid(self, cached: Any) -> bool:
+        valid = (
+            self.enable_persistent_cache
+            and cached is not None
+            and (time.time() - self._cache_timestamp) < self.cache_ttl
+        )
+        self.cache_stats['hits' if valid else 'misses'] += 1
+        return valid
     
     def get_players_data(self) -> Dict[str, Any]:
         """Get players data with caching (single-item filtered format only)"""
-        if self._is_cache_valid():
+        if self.players_cache is not None:
+            self._players_data = self.players_cache.get_players_data()
+            self.players_version = self.players_cache.players_version
+            return self._players_data
+        
+        # Concurrent callers wait for one load instead of each reading the item
+        with self._players_lock:
+            return self._load_players_data()
+    
+    def _load_players_data(self) -> Dict[str, Any]:
+        if self._is_cache_valid(self._players_data):
             logger.debug("Using cached players data")
             return self._players_data
         
         logger.info("Loading players data from DynamoDB...")
         try:
-            response = self.league_data_table.get_item(
-                Key={
-                    'data_type': 'players',
-                    'id': 'nfl_players'
-                }
-            )
+            item = self.backend.get_item('league_data', {
+                'data_type': 'players',
+                'id': 'nfl_players'
+            })
             
-            if 'Item' not in response:
+            if item is None:
                 raise ValueError("No players data found in DynamoDB. Run 'Fetch Players Data' first.")
             
-            item = response['Item']
             self._players_data = item['data']
+            self.players_version = item.get('last_updated')
             
             # Log info about the data we loaded
             storage_strategy = item.get('storage_strategy', 'unknown')
@@ -66,55 +94,58 @@ class DataCache:
             logger.error(f"Error loading players data: {e}")
             raise
     
+    @staticmethod
+    def build_team_names(rosters: List[Dict[str, Any]], users: List[Dict[str, Any]]) -> Dict[str, str]:
+        """Map roster_id -> team name from Sleeper roster and user objects"""
+        roster_to_user = {}
+        for roster_data in rosters:
+            roster_id = str(roster_data['roster_id'])
+            user_id = roster_data.get('owner_id')
+            if user_id:
+                roster_to_user[roster_id] = user_id
+        
+        user_to_name = {}
+        for user_data in users:
+            user_id = user_data['user_id']
+            # Use display_name if available, otherwise username, otherwise "Team {user_id}"
+            metadata = user_data.get('metadata', {})
+            display_name = (
+                metadata.get('team_name') or 
+                user_data.get('display_name') or 
+                user_data.get('username') or 
+                f"Team {user_id}"
+            )
+            user_to_name[user_id] = display_name
+        
+        # Build final mapping
+        team_names = {}
+        for roster_id, user_id in roster_to_user.items():
+            if user_id in user_to_name:
+                team_names[roster_id] = user_to_name[user_id]
+            else:
+                team_names[roster_id] = f"Team {roster_id}"
+        return team_names
+    
     def get_team_names(self) -> Dict[str, str]:
         """Get team names mapping with caching"""
-        if self._is_cache_valid():
+        if self._is_cache_valid(self._team_names):
             logger.debug("Using cached team names")
             return self._team_names
         
         logger.info("Loading team names from DynamoDB...")
-        team_names = {}
         
         try:
-            # Get rosters (roster_id -> user_id mapping)
-            rosters_response = self.league_data_table.query(
-                KeyConditionExpression=boto3.dynamodb.conditions.Key('data_type').eq('rosters')
-            )
+            # Rosters (roster_id -> user_id) and users (user_id -> display_name) are independent reads
+            rosters, users = run_concurrently(self.executor, [
+                lambda: self.backend.query('league_data', 'rosters'),
+                lambda: self.backend.query('league_data', 'users')
+            ])
             
-            roster_to_user = {}
-            for item in rosters_response['Items']:
-                roster_data = item['data']
-                roster_id = str(roster_data['roster_id'])
-                user_id = roster_data.get('owner_id')
-                if user_id:
-                    roster_to_user[roster_id] = user_id
-            
-            # Get users (user_id -> display_name mapping)
-            users_response = self.league_data_table.query(
-                KeyConditionExpression=boto3.dynamodb.conditions.Key('data_type').eq('users')
+            team_names = self.build_team_names(
+                [item['data'] for item in rosters],
+                [item['data'] for item in users]
             )
             
-            user_to_name = {}
-            for item in users_response['Items']:
-                user_data = item['data']
-                user_id = user_data['user_id']
-                # Use display_name if available, otherwise username, otherwise "Team {user_id}"
-                metadata = user_data.get('metadata', {})
-                display_name = (
-                    metadata.get('team_name') or 
-                    user_data.get('display_name') or 
-                    user_data.get('username') or 
-                    f"Team {user_id}"
-                )
-                user_to_name[user_id] = display_name
-            
-            # Build final mapping
-            for roster_id, user_id in roster_to_user.items():
-                if user_id in user_to_name:
-                    team_names[roster_id] = user_to_name[user_id]
-                else:
-                    team_names[roster_id] = f"Team {roster_id}"
-            
             self._team_names = team_names
             
             if self.enable_persistent_cache:
@@ -130,13 +161,16 @@ class DataCache:
     def load_all_cache(self) -> None:
         """Load both players and team names into cache (for Fargate startup)"""
         logger.info("Loading all cached data...")
-        self.get_players_data()
+        # Players load on the pool while team names (which fan out their own reads) load here
+        players_future = submit_or_run(self.executor, self.get_players_data)
         self.get_team_names()
+        players_future.result()
         logger.info("Cache loading complete")
     
     def clear_cache(self) -> None:
         """Clear all cached data"""
         self._players_data = None
+        self.players_version = None
         self._team_names = None
         self._cache_timestamp = 0
         logger.info("Cache cleared")
\ No newline at end of file
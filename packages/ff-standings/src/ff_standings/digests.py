@@ -0,0 +1,56 @@
+"""
+Stable content digests for change detection
+"""
+
+import hashlib
+import json
+from decimal import Decimal
+from typing import List, Dict, Any, Optional, Set
+
+
+def _normalize(obj):
+    if isinstance(obj, (float, Decimal)):
+        # 1, 1.0 and Decimal('1.0') all describe the same score
+        value = float(obj)
+        return int(value) if value.is_integer() else repr(value)
+    if isinstance(obj, dict):
+        return {str(key): _normalize(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_normalize(value) for value in obj]
+    return obj
+
+
+def stable_digest(obj: Any) -> str:
+    """SHA-256 of a canonical JSON rendering; identical across processes and restarts"""
+    canonical = json.dumps(_normalize(obj), sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def team_digest(matchup: Dict[str, Any]) -> str:
+    """Digest of everything in a team's matchup that feeds its standings row"""
+    return stable_digest({
+        'points': matchup.get('points', 0),
+        'starters': matchup.get('starters') or [],
+        'players_points': matchup.get('players_points') or {},
+    })
+
+
+def matchup_digests(matchups: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Map roster_id -> team digest for a week of matchups"""
+    return {str(matchup['roster_id']): team_digest(matchup) for matchup in matchups}
+
+
+def changed_teams(previous: Optional[Dict[str, str]], current: Dict[str, str]) -> Optional[Set[str]]:
+    """
+    Roster ids whose digest differs between two digest maps.
+
+    Returns None when there is no previous map to compare against, meaning
+    every team must be treated as changed.
+    """
+    if not previous:
+        return None
+    return {
+        roster_id
+        for roster_id in set(previous) | set(current)
+        if previous.get(roster_id) != current.get(roster_id)
+    }
@@ -0,0 +1,201 @@
+"""
+Per-stage timing and storage call metrics with pluggable sinks
+"""
+
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager, nullcontext
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+_current_stage: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('ff_standings_stage', default=None)
+
+UNSTAGED = 'other'
+
+
+class MetricsSink(ABC):
+    """Receives one flushed metrics record per operation"""
+
+    @abstractmethod
+    def emit(self, record: Dict[str, Any]) -> None:
+        """Publish one record (operation, timestamp, duration_ms, stages, properties)"""
+
+
+class InMemorySink(MetricsSink):
+    """Keeps flushed records in a list (for tests and local benchmarks)"""
+
+    def __init__(self):
+        self.records: List[Dict[str, Any]] = []
+
+    def emit(self, record: Dict[str, Any]) -> None:
+        self.records.append(record)
+
+
+class LoggingSink(MetricsSink):
+    """Writes a one-line stage summary through the standard logger"""
+
+    def emit(self, record: Dict[str, Any]) -> None:
+        summary = ', '.join(
+            f"{name}={stage['duration_ms']:.1f}ms/{stage['calls']}calls"
+            for name, stage in record['stages'].items()
+        )
+        logger.info(f"{record['operation']} took {record['duration_ms']:.1f}ms ({summary})")
+
+
+class EMFSink(MetricsSink):
+    """
+    Writes CloudWatch Embedded Metric Format lines to stdout.
+
+    Lambda extracts these into metrics automatically; the raw JSON line is
+    written directly because log formatters would break the EMF envelope.
+    """
+
+    def __init__(self, namespace: str = 'FFStandings', stream=None):
+        self.namespace = namespace
+        self.stream = stream or sys.stdout
+
+    def emit(self, record: Dict[str, Any]) -> None:
+        document = {'Operation': record['operation'], 'duration_ms': record['duration_ms']}
+        metric_definitions = [{'Name': 'duration_ms', 'Unit': 'Milliseconds'}]
+        for name, stage in record['stages'].items():
+            document[f'{name}.duration_ms'] = stage['duration_ms']
+            document[f'{name}.calls'] = stage['calls']
+            document[f'{name}.capacity_units'] = stage['capacity_units']
+            document[f'{name}.storage_ms'] = stage['storage_ms']
+            metric_definitions += [
+                {'Name': f'{name}.duration_ms', 'Unit': 'Milliseconds'},
+                {'Name': f'{name}.calls', 'Unit': 'Count'},
+                {'Name': f'{name}.capacity_units', 'Unit': 'Count'},
+                {'Name': f'{name}.storage_ms', 'Unit': 'Milliseconds'},
+            ]
+        document.update(record.get('properties', {}))
+        document['_aws'] = {
+            'Timestamp': int(record['timestamp'] * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': self.namespace,
+                'Dimensions': [['Operation']],
+                'Metrics': metric_definitions
+            }]
+        }
+        self.stream.write(json.dumps(document, default=str) + '\n')
+        self.stream.flush()
+
+
+class StandingsMetrics:
+    """
+    Collects stage durations plus storage call counts and consumed capacity.
+
+    Storage calls are attributed to whichever stage is active in the calling
+    context (thread-pool tasks inherit it). Each operation() keeps its own
+    record in a context variable, so one instance can serve concurrent
+    operations on different threads; calls made outside any operation go to
+    a shared record emitted by flush(). Recording is a few dict updates under
+    a lock, and sinks only run once per flush.
+    """
+
+    def __init__(self, sinks: Optional[List[MetricsSink]] = None):
+        self.sinks = sinks if sinks is not None else [LoggingSink()]
+        self._lock = threading.Lock()
+        self._operation_record: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+            f'ff_standings_operation_{id(self)}', default=None
+        )
+        self._unscoped = self._new_record()
+
+    @staticmethod
+    def _new_record() -> Dict[str, Any]:
+        return {'stages': {}, 'started_at': time.perf_counter()}
+
+    def _active_record(self) -> Dict[str, Any]:
+        return self._operation_record.get() or self._unscoped
+
+    @staticmethod
+    def _stage_entry(record: Dict[str, Any], name: str) -> Dict[str, Any]:
+        entry = record['stages'].get(name)
+        if entry is None:
+            entry = record['stages'][name] = {'duration_ms': 0.0, 'calls': 0, 'capacity_units': 0.0, 'storage_ms': 0.0}
+        return entry
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block and attribute storage calls made inside it to name"""
+        record = self._active_record()
+        token = _current_stage.set(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            _current_stage.reset(token)
+            with self._lock:
+                self._stage_entry(record, name)['duration_ms'] += elapsed_ms
+
+    @contextmanager
+    def operation(self, name: str, **properties):
+        """Time a whole operation and flush one record for it when it ends"""
+        token = self._operation_record.set(self._new_record())
+        try:
+            yield
+        finally:
+            try:
+                self.flush(name, **properties)
+            finally:
+                self._operation_record.reset(token)
+
+    def record_storage_call(
+        self, operation: str, table: str, capacity_units: float = 0.0, latency_ms: float = 0.0
+    ) -> None:
+        """Backend observer hook: count one storage call for the active stage"""
+        stage = _current_stage.get() or UNSTAGED
+        record = self._active_record()
+        with self._lock:
+            entry = self._stage_entry(record, stage)
+            entry['calls'] += 1
+            entry['capacity_units'] += capacity_units
+            entry['storage_ms'] += latency_ms
+
+    def flush(self, operation: str, **properties) -> Dict[str, Any]:
+        """Emit everything recorded in the active operation (or outside any) since the last flush, and reset it"""
+        active = self._active_record()
+        with self._lock:
+            record = {
+                'operation': operation,
+                'timestamp': time.time(),
+                'duration_ms': (time.perf_counter() - active['started_at']) * 1000,
+                'stages': active['stages'],
+                'properties': properties,
+            }
+            active.update(self._new_record())
+        for sink in self.sinks:
+            try:
+                sink.emit(record)
+            except Exception as e:
+                logger.warning(f"Metrics sink {type(sink).__name__} failed: {e}")
+        return record
+
+
+def stage(metrics: Optional[StandingsMetrics], name: str):
+    """metrics.stage(name), or a no-op context when metrics are disabled"""
+    return metrics.stage(name) if metrics is not None else nullcontext()
+
+
+def metrics_from_env(default: str = 'log') -> Optional[StandingsMetrics]:
+    """
+    Build metrics from STANDINGS_METRICS: a comma-separated list of sinks
+    ('log', 'emf') or 'off'. EMF output is extracted automatically on Lambda;
+    on ECS it needs the CloudWatch agent or FireLens.
+    """
+    sink_names = [name.strip().lower() for name in os.environ.get('STANDINGS_METRICS', default).split(',') if name.strip()]
+    if not sink_names or sink_names == ['off']:
+        return None
+    sink_types = {'log': LoggingSink, 'emf': EMFSink}
+    unknown = [name for name in sink_names if name not in sink_types]
+    if unknown:
+        raise ValueError(f"Unknown STANDINGS_METRICS sink(s): {', '.join(unknown)}")
+    return StandingsMetrics([sink_types[name]() for name in sink_names])
@@ -0,0 +1,51 @@
+"""
+Offline recompute of a season's standings from stored matchups.
+
+    python -m ff_standings.recompute 2025 --dry-run
+
+Storage comes from create_backend_from_env (STORAGE_BACKEND and the *_TABLE
+variables); Sleeper is never called. Prints the change report as JSON.
+"""
+
+import argparse
+import json
+import logging
+import sys
+from typing import List, Optional
+
+from .backends import create_backend_from_env
+from .service import StandingsService
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('season', help='Season to recompute, e.g. 2025')
+    parser.add_argument('--dry-run', action='store_true', help='Report differing rows without writing them')
+    parser.add_argument('--no-player-details', action='store_true', help='Skip player names in weekly rosters')
+    parser.add_argument('--current-names', action='store_true',
+                        help="Rename teams to the current league's owners (default keeps the stored names)")
+    parser.add_argument('--summary', action='store_true', help='Print counts only, not every changed row')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    service = StandingsService(backend=create_backend_from_env())
+    try:
+        report = service.recompute_season(
+            args.season,
+            dry_run=args.dry_run,
+            include_player_details=not args.no_player_details,
+            use_current_names=args.current_names
+        )
+    finally:
+        service.close()
+
+    if args.summary:
+        report.pop('changes', None)
+    json.dump(report, sys.stdout, indent=2, default=str)
+    sys.stdout.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
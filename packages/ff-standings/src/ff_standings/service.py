@@ -4,10 +4,15 @@ Main service class for Fantasy Football standings calculations
 
 import logging
 import requests
-from typing import List, Dict, Any, Optional
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import List, Dict, Any, Optional, Callable, Set
 
+from .backends import StorageBackend, DynamoDBBackend
 from .calculator import StandingsCalculator
+from .concurrency import submit_or_run
 from .data_cache import DataCache
+from .metrics import StandingsMetrics, stage
 from .storage import StandingsStorage
 
 logger = logging.getLogger(__name__)
@@ -18,16 +23,58 @@ class StandingsService:
     Main service for calculating and storing "vs everyone" fantasy football standings
     """
     
-    def __init__(self, dynamodb_tables: Dict[str, Any], enable_persistent_cache: bool = False):
-        self.league_data_table = dynamodb_tables['league_data']
+    def __init__(
+        self,
+        dynamodb_tables: Optional[Dict[str, Any]] = None,
+        enable_persistent_cache: bool = False,
+        backend: Optional[StorageBackend] = None,
+        nfl_state_provider: Optional[Callable[[], Dict[str, Any]]] = None,
+        max_workers: int = 1,
+        metrics: Optional[StandingsMetrics] = None,
+        executor: Optional[Executor] = None,
+        players_cache: Optional[DataCache] = None,
+    ):
+        if backend is None:
+            if dynamodb_tables is None:
+                raise ValueError("Either dynamodb_tables or backend is required")
+            backend = DynamoDBBackend(dynamodb_tables)
+        self.backend = backend
+        # Per-stage timings plus storage call counts/capacity (None disables instrumentation).
+        # This replaces backend.observer, so give each service its own backend.view() of a shared backend.
+        self.metrics = metrics
+        if metrics is not None:
+            backend.observer = metrics.record_storage_call
+        # max_workers > 1 runs independent reads/writes on a bounded thread pool;
+        # a caller-owned executor can instead be shared by several services
+        self._owns_executor = executor is None and max_workers > 1
+        self.executor = executor or (
+            ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ff-standings-io')
+            if max_workers > 1 else None
+        )
         self.calculator = StandingsCalculator()
-        self.data_cache = DataCache(self.league_data_table, enable_persistent_cache)
-        self.storage = StandingsStorage(
-            dynamodb_tables['weekly_standings'],
-            dynamodb_tables['overall_standings']
+        self.data_cache = DataCache(
+            enable_persistent_cache=enable_persistent_cache,
+            backend=backend,
+            executor=self.executor,
+            players_cache=players_cache
         )
+        self.storage = StandingsStorage(backend=backend, executor=self.executor, metrics=metrics)
         self.enable_persistent_cache = enable_persistent_cache
-        logger.info(f"StandingsService initialized (persistent_cache={enable_persistent_cache})")
+        # Callable returning Sleeper's NFL state (e.g. a shared cached provider)
+        self.nfl_state_provider = nfl_state_provider
+        logger.info(
+            f"StandingsService initialized (backend={type(backend).__name__}, "
+            f"persistent_cache={enable_persistent_cache}, max_workers={max_workers})"
+        )
+    
+    def close(self) -> None:
+        """Shut down the I/O thread pool, if this service created one"""
+        if self.executor is not None:
+            if self._owns_executor:
+                self.executor.shutdown(wait=True)
+            self.executor = None
+            self.data_cache.executor = None
+            self.storage.executor = None
     
     def load_cache(self) -> None:
         if self.enable_persistent_cache:
@@ -37,11 +84,9 @@ class StandingsService:
     
     def get_week_matchups(self, season: str, week: int) -> Optional[List[Dict[str, Any]]]:
         try:
-            response = self.league_data_table.get_item(
-                Key={'data_type': 'matchups', 'id': f'{season}_{week}'}
-            )
-            if 'Item' in response:
-                matchups = response['Item']['data']
+            item = self.backend.get_item('league_data', {'data_type': 'matchups', 'id': f'{season}_{week}'})
+            if item is not None:
+                matchups = item['data']
                 logger.info(f"Retrieved {len(matchups)} matchups for week {week}")
                 return matchups
             return None
@@ -51,9 +96,12 @@ class StandingsService:
     
     def determine_current_week(self) -> int:
         try:
-            response = requests.get('https://api.sleeper.app/v1/state/nfl', timeout=10)
-            response.raise_for_status()
-            nfl_state = response.json()
+            if self.nfl_state_provider is not None:
+                nfl_state = self.nfl_state_provider()
+            else:
+                response = requests.get('https://api.sleeper.app/v1/state/nfl', timeout=10)
+                response.raise_for_status()
+                nfl_state = response.json()
             return nfl_state.get('week', 1)
         except Exception as e:
             logger.error(f"Error determining current week: {e}")
@@ -66,19 +114,158 @@ class StandingsService:
         week: int,
         include_player_details: bool = True,
     ) -> List[Dict[str, Any]]:
+        with stage(self.metrics, 'cache_lookup'):
+            team_names, players_data = self._load_reference_data(include_player_details)
+        with stage(self.metrics, 'roster_build'):
+            team_scores = self.calculator.build_team_scores(matchups, team_names, players_data)
+        with stage(self.metrics, 'ranking'):
+            return self.calculator.rank_team_scores(team_scores)
+    
+    def _operation(self, name: str, **properties):
+        return self.metrics.operation(name, **properties) if self.metrics is not None else nullcontext()
+    
+    def _load_reference_data(self, include_player_details: bool):
+        # Players load on the pool while team names (which fan out their own reads) load here
+        players_future = (
+            submit_or_run(self.executor, self.data_cache.get_players_data)
+            if include_player_details else None
+        )
         team_names = self.data_cache.get_team_names()
-        players_data = self.data_cache.get_players_data() if include_player_details else None
-        return self.calculator.calculate_weekly_vs_everyone(matchups, team_names, players_data)
+        players_data = players_future.result() if players_future else None
+        return team_names, players_data
     
-    def calculate_and_store(self, matchups: List[Dict[str, Any]], season: str, week: int, include_player_details: bool = True) -> List[Dict[str, Any]]:
-        weekly_results = self.calculate_standings(matchups, season, week, include_player_details)
-        if not weekly_results:
-            logger.warning("No weekly results to store")
-            return []
-        self.storage.store_weekly_standings(weekly_results, season, week)
-        self.storage.update_overall_standings(season)
+    def calculate_and_store(
+        self,
+        matchups: List[Dict[str, Any]],
+        season: str,
+        week: int,
+        include_player_details: bool = True,
+        changed_team_ids: Optional[Set[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Calculate a week's standings and store them with the overall standings.
+        
+        changed_team_ids lists roster ids whose matchup changed since the last
+        call for this week. When given, only weekly rows that changed are
+        written and overall rows are updated for the affected teams only;
+        None treats every team as changed.
+        """
+        with self._operation('calculate_and_store', season=season, week=week):
+            weekly_results = self.calculate_standings(matchups, season, week, include_player_details)
+            if not weekly_results:
+                logger.warning("No weekly results to store")
+                return []
+            if changed_team_ids is None:
+                with stage(self.metrics, 'weekly_write'):
+                    self.storage.store_weekly_standings(weekly_results, season, week)
+                self.storage.update_overall_standings(season)
+            else:
+                with stage(self.metrics, 'weekly_write'):
+                    written = self.storage.store_changed_weekly_standings(weekly_results, season, week, changed_team_ids)
+                self.storage.update_overall_standings_for_changes(season, week, written)
         return weekly_results
     
+    def calculate_many(
+        self,
+        weeks_matchups: Dict[int, List[Dict[str, Any]]],
+        include_player_details: bool = True,
+        team_names: Optional[Dict[str, str]] = None,
+    ) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Calculate several weeks in memory with one reference-data load; weeks without results are left out.
+        
+        team_names overrides the stored league's names, e.g. for a past season
+        whose rosters belonged to other users.
+        """
+        with stage(self.metrics, 'cache_lookup'):
+            if team_names is None:
+                team_names, players_data = self._load_reference_data(include_player_details)
+            else:
+                players_data = self.data_cache.get_players_data() if include_player_details else None
+        results_by_week = {}
+        for week in sorted(weeks_matchups):
+            with stage(self.metrics, 'roster_build'):
+                team_scores = self.calculator.build_team_scores(weeks_matchups[week], team_names, players_data)
+            with stage(self.metrics, 'ranking'):
+                weekly_results = self.calculator.rank_team_scores(team_scores)
+            if weekly_results:
+                results_by_week[week] = weekly_results
+            else:
+                logger.warning(f"No weekly results to store for week {week}")
+        return results_by_week
+    
+    def calculate_and_store_many(
+        self,
+        weeks_matchups: Dict[int, List[Dict[str, Any]]],
+        season: str,
+        include_player_details: bool = True,
+    ) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Calculate and batch-store several weeks, then aggregate overall standings once.
+        
+        Overall standings combine the in-memory results with the stored weekly
+        rows of any other weeks of the season.
+        """
+        with self._operation('calculate_and_store_many', season=season, weeks=len(weeks_matchups)):
+            results_by_week = self.calculate_many(weeks_matchups, include_player_details)
+            if not results_by_week:
+                return {}
+            with stage(self.metrics, 'weekly_write'):
+                self.storage.store_weekly_standings_batch(results_by_week, season)
+            self.storage.update_overall_standings_from_results(season, results_by_week)
+        return results_by_week
+    
+    def recompute_season(
+        self,
+        season: str,
+        dry_run: bool = False,
+        include_player_details: bool = True,
+        team_names: Optional[Dict[str, str]] = None,
+        use_current_names: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Recompute a season's standings from the matchups stored in league_data, without calling Sleeper.
+        
+        Reads every stored matchups item of the season in one paginated query,
+        recalculates all weeks in memory and writes only the weekly and overall
+        rows whose values differ (nothing with dry_run). Use after changing
+        calculator logic. Returns StandingsStorage.sync_season's report plus
+        the weeks recomputed.
+        
+        Team names are kept from the season's stored weekly rows, since past
+        seasons' owners are not stored anywhere else; teams without stored rows
+        get the current league's names. use_current_names renames every team
+        to the current league's names instead; team_names overrides both.
+        """
+        with self._operation('recompute_season', season=season):
+            if team_names is None and not use_current_names:
+                stored_names = self.storage.season_team_names(season)
+                if stored_names:
+                    team_names = {**self.data_cache.get_team_names(), **stored_names}
+            items = self.backend.query('league_data', 'matchups', sort_prefix=f'{season}_')
+            weeks_matchups = {
+                int(item['id'].split('_', 1)[1]): item['data']
+                for item in items
+                if item.get('data')
+            }
+            if not weeks_matchups:
+                logger.warning(f"No stored matchups for season {season}")
+                return {'season': season, 'dry_run': dry_run, 'weeks': [], 'changes': []}
+            logger.info(f"Recomputing season {season} from {len(weeks_matchups)} stored weeks")
+            results_by_week = self.calculate_many(weeks_matchups, include_player_details, team_names)
+            report = self.storage.sync_season(season, results_by_week, dry_run=dry_run)
+        report['weeks'] = sorted(results_by_week)
+        return report
+    
+    def process_weeks(self, season: str, weeks: List[int], include_player_details: bool = True) -> Dict[int, List[Dict[str, Any]]]:
+        """Process stored matchups for several weeks with a single overall aggregation"""
+        weeks_matchups = {}
+        for week in weeks:
+            matchups = self.get_week_matchups(season, week)
+            if matchups:
+                weeks_matchups[week] = matchups
+        return self.calculate_and_store_many(weeks_matchups, season, include_player_details)
+    
     def process_week_from_db(self, season: str, week: int, include_player_details: bool = True) -> Optional[List[Dict[str, Any]]]:
         matchups = self.get_week_matchups(season, week)
         if not matchups:
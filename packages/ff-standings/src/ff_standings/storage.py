@@ -1,19 +1,47 @@
 """
-DynamoDB storage operations for standings data
+Storage operations for standings data
 """
 
 import logging
-import boto3
+import time
+from concurrent.futures import Executor
 from decimal import Decimal
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+from .backends import StorageBackend, DynamoDBBackend
+from .concurrency import map_concurrently
+from .digests import stable_digest
+from .metrics import StandingsMetrics, stage
 
 logger = logging.getLogger(__name__)
 
 
 class StandingsStorage:
-    def __init__(self, weekly_standings_table, overall_standings_table):
+    # How long cached season rows are trusted for incremental overall updates
+    # before falling back to a full scan (picks up writes from other processes)
+    OVERALL_RESCAN_SECONDS = 600
+    
+    def __init__(
+        self,
+        weekly_standings_table=None,
+        overall_standings_table=None,
+        backend: Optional[StorageBackend] = None,
+        executor: Optional[Executor] = None,
+        metrics: Optional[StandingsMetrics] = None,
+    ):
         self.weekly_standings_table = weekly_standings_table
         self.overall_standings_table = overall_standings_table
+        self.backend = backend or DynamoDBBackend({
+            'weekly_standings': weekly_standings_table,
+            'overall_standings': overall_standings_table
+        })
+        self.executor = executor
+        self.metrics = metrics
+        # season -> {(team_id, season_week): summary row}, filled by full overall scans
+        self._season_rows: Dict[str, Dict[Tuple[str, str], Dict[str, Any]]] = {}
+        self._season_rows_loaded_at: Dict[str, float] = {}
+        # Weekly rows written vs skipped as unchanged by store_changed_weekly_standings
+        self.write_counts = {'written': 0, 'skipped': 0}
     
     def convert_floats_to_decimal(self, obj):
         if isinstance(obj, float):
@@ -25,80 +53,330 @@ class StandingsStorage:
         else:
             return obj
     
+    def _weekly_item(self, result: Dict[str, Any], season_week: str) -> Dict[str, Any]:
+        return self.convert_floats_to_decimal({
+            'season_week': season_week,
+            'team_id': result['roster_id'],
+            'rank': result['rank'],
+            'team_name': result['team_name'],
+            'points': result['points'],
+            'wins': result['wins'],
+            'losses': result['losses'],
+            'roster': result['roster']
+        })
+    
     def store_weekly_standings(self, weekly_results: List[Dict[str, Any]], season: str, week: int) -> None:
         season_week = f"{season}_{week}"
-        for result in weekly_results:
+        
+        def store_result(result):
             try:
-                self.weekly_standings_table.put_item(Item=self.convert_floats_to_decimal({
-                    'season_week': season_week,
-                    'team_id': result['roster_id'],
-                    'rank': result['rank'],
-                    'team_name': result['team_name'],
-                    'points': result['points'],
-                    'wins': result['wins'],
-                    'losses': result['losses'],
-                    'roster': result['roster']
-                }))
+                self.backend.put_item('weekly_standings', self._weekly_item(result, season_week))
             except Exception as e:
                 logger.error(f"Error storing weekly result for {result['team_name']}: {e}")
+        
+        map_concurrently(self.executor, store_result, weekly_results)
         logger.info(f"Stored weekly standings for week {week}")
     
+    def store_weekly_standings_batch(self, results_by_week: Dict[int, List[Dict[str, Any]]], season: str) -> None:
+        """Store several weeks of standings with batched writes"""
+        items = [
+            self._weekly_item(result, f"{season}_{week}")
+            for week, weekly_results in results_by_week.items()
+            for result in weekly_results
+        ]
+        self.backend.batch_put_items('weekly_standings', items)
+        logger.info(f"Stored weekly standings for weeks {sorted(results_by_week)} ({len(items)} rows)")
+    
+    @staticmethod
+    def _summary_row(team_id: str, team_name: str, wins, losses, points, rank) -> Dict[str, Any]:
+        return {
+            'team_id': team_id,
+            'team_name': team_name,
+            'wins': float(wins),
+            'losses': float(losses),
+            'points': float(points),
+            'rank': float(rank)
+        }
+    
+    def _result_summary(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        return self._summary_row(
+            result['roster_id'], result['team_name'], result['wins'], result['losses'], result['points'], result['rank']
+        )
+    
+    def _cached_season_rows(self, season: str) -> Optional[Dict[Tuple[str, str], Dict[str, Any]]]:
+        loaded_at = self._season_rows_loaded_at.get(season)
+        if loaded_at is None or time.monotonic() - loaded_at > self.OVERALL_RESCAN_SECONDS:
+            return None
+        return self._season_rows.get(season)
+    
+    def _load_season_rows(self, season: str) -> List[Dict[str, Any]]:
+        """Scan a season's weekly rows and refresh the cached summaries from them"""
+        all_weeks = self.backend.scan('weekly_standings', 'season_week', f'{season}_')
+        self._season_rows[season] = {
+            (item['team_id'], item['season_week']): self._summary_row(
+                item['team_id'], item['team_name'], item['wins'], item['losses'], item['points'], item['rank']
+            )
+            for item in all_weeks
+        }
+        self._season_rows_loaded_at[season] = time.monotonic()
+        return all_weeks
+    
+    def season_team_names(self, season: str) -> Dict[str, str]:
+        """Map team_id -> team name from a season's stored weekly rows (the latest week's name wins)"""
+        items = self.backend.scan('weekly_standings', 'season_week', f'{season}_')
+        team_names = {}
+        for item in sorted(items, key=lambda item: int(item['season_week'].split('_', 1)[1])):
+            team_names[item['team_id']] = item['team_name']
+        return team_names
+    
+    def store_changed_weekly_standings(
+        self,
+        weekly_results: List[Dict[str, Any]],
+        season: str,
+        week: int,
+        changed_team_ids: Set[str],
+    ) -> List[Dict[str, Any]]:
+        """
+        Store only rows for teams whose matchup changed or whose standing moved.
+        
+        Stored rows are compared against the cached season rows, which are
+        rescanned first when missing or stale (e.g. right after a restart).
+        Returns the results that were written.
+        """
+        season_week = f"{season}_{week}"
+        cached = self._cached_season_rows(season)
+        if cached is None:
+            with stage(self.metrics, 'overall_scan'):
+                self._load_season_rows(season)
+            cached = self._season_rows[season]
+        to_write = [
+            result for result in weekly_results
+            if result['roster_id'] in changed_team_ids
+            or cached.get((result['roster_id'], season_week)) != self._result_summary(result)
+        ]
+        if to_write:
+            self.store_weekly_standings(to_write, season, week)
+        self.write_counts['written'] += len(to_write)
+        self.write_counts['skipped'] += len(weekly_results) - len(to_write)
+        logger.info(f"Wrote {len(to_write)} of {len(weekly_results)} weekly rows for week {week}")
+        return to_write
+    
+    def update_overall_standings_for_changes(self, season: str, week: int, changed_results: List[Dict[str, Any]]) -> None:
+        """
+        Update overall standings for only the teams in changed_results.
+        
+        Uses the season rows cached by the last full update; performs a full
+        update instead when that cache is missing or older than OVERALL_RESCAN_SECONDS.
+        """
+        cached = self._cached_season_rows(season)
+        if cached is None:
+            self.update_overall_standings(season)
+            return
+        
+        season_week = f"{season}_{week}"
+        affected = set()
+        for result in changed_results:
+            summary = self._result_summary(result)
+            key = (result['roster_id'], season_week)
+            if cached.get(key) != summary:
+                cached[key] = summary
+                affected.add(result['roster_id'])
+        if not affected:
+            logger.info("Overall standings unchanged")
+            return
+        
+        try:
+            rows = [row for (team_id, _), row in sorted(cached.items()) if team_id in affected]
+            self._write_overall_standings(season, self._aggregate_team_totals(rows))
+        except Exception as e:
+            logger.error(f"Error updating overall standings: {e}")
+            # Cache may no longer match the table; force a full rebuild next time
+            self._season_rows_loaded_at.pop(season, None)
+            raise
+    
     def update_overall_standings(self, season: str) -> None:
         try:
-            all_weeks = self.weekly_standings_table.scan(
-                FilterExpression=boto3.dynamodb.conditions.Attr('season_week').begins_with(f'{season}_')
-            )
-            team_totals = {}
-            for item in all_weeks['Items']:
-                team_id = item['team_id']
-                team_name = item['team_name']
-                wins = float(item['wins'])      # Keep fractional wins
-                losses = float(item['losses'])  # Keep fractional losses
-                points = float(item['points'])
-                rank = float(item['rank'])      # Keep fractional ranks too
-                if team_id not in team_totals:
-                    team_totals[team_id] = {
-                        'team_name': team_name,
-                        'total_wins': 0.0,      # Use float to support fractional wins
-                        'total_losses': 0.0,    # Use float to support fractional losses
-                        'total_points': 0.0,
-                        'top_finishes': 0
-                    }
-                team_totals[team_id]['total_wins'] += wins
-                team_totals[team_id]['total_losses'] += losses
-                team_totals[team_id]['total_points'] += points
-                if rank == 1:
-                    team_totals[team_id]['top_finishes'] += 1
-            for team_id, totals in team_totals.items():
-                total_games = totals['total_wins'] + totals['total_losses']
-                win_percentage = totals['total_wins'] / total_games if total_games > 0 else 0
-                # Store earnings as a numeric value; frontend can render currency
-                earnings_numeric = totals['top_finishes'] * 25
-                
-                # Preserve existing playoff percentage (don't reset to 0)
-                try:
-                    existing_item = self.overall_standings_table.get_item(
-                        Key={'season': season, 'team_id': team_id}
-                    )
-                    existing_playoff_percentage = existing_item.get('Item', {}).get('playoff_percentage', Decimal('0'))
-                except Exception as e:
-                    logger.warning(f"Could not retrieve existing playoff percentage for {team_id}: {e}")
-                    existing_playoff_percentage = Decimal('0')
-                
-                self.overall_standings_table.put_item(Item=self.convert_floats_to_decimal({
-                    'season': season,
-                    'team_id': team_id,
-                    'team_name': totals['team_name'],
-                    'total_wins': totals['total_wins'],
-                    'total_losses': totals['total_losses'],
-                    'total_points': Decimal(str(totals['total_points'])),
-                    'win_percentage': Decimal(str(round(win_percentage, 4))),
-                    'earnings': earnings_numeric,
-                    'playoff_percentage': existing_playoff_percentage  # Preserve existing value
-                }))
-            logger.info(f"Updated overall standings for {len(team_totals)} teams")
+            with stage(self.metrics, 'overall_scan'):
+                all_weeks = self._load_season_rows(season)
+                team_totals = self._aggregate_team_totals(all_weeks)
+            self._write_overall_standings(season, team_totals)
+        except Exception as e:
+            logger.error(f"Error updating overall standings: {e}")
+            raise
+    
+    def update_overall_standings_from_results(self, season: str, results_by_week: Dict[int, List[Dict[str, Any]]]) -> None:
+        """
+        Update overall standings from in-memory weekly results merged over the stored weekly rows.
+        
+        Weeks in results_by_week count with their in-memory results (which may
+        not be readable from the table yet); every other stored week of the
+        season still counts, e.g. the current week written by the live poller.
+        """
+        try:
+            with stage(self.metrics, 'overall_scan'):
+                self._load_season_rows(season)
+            season_rows = self._season_rows[season]
+            for week, weekly_results in results_by_week.items():
+                season_week = f"{season}_{week}"
+                for result in weekly_results:
+                    season_rows[(result['roster_id'], season_week)] = self._result_summary(result)
+            rows = [row for _, row in sorted(season_rows.items())]
+            self._write_overall_standings(season, self._aggregate_team_totals(rows))
         except Exception as e:
             logger.error(f"Error updating overall standings: {e}")
+            # Cache may no longer match the table; force a full rebuild next time
+            self._season_rows_loaded_at.pop(season, None)
             raise
+    
+    def _aggregate_team_totals(self, weekly_rows: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        team_totals = {}
+        for item in weekly_rows:
+            team_id = item['team_id']
+            team_name = item['team_name']
+            wins = float(item['wins'])      # Keep fractional wins
+            losses = float(item['losses'])  # Keep fractional losses
+            points = float(item['points'])
+            rank = float(item['rank'])      # Keep fractional ranks too
+            if team_id not in team_totals:
+                team_totals[team_id] = {
+                    'team_name': team_name,
+                    'total_wins': 0.0,      # Use float to support fractional wins
+                    'total_losses': 0.0,    # Use float to support fractional losses
+                    'total_points': 0.0,
+                    'top_finishes': 0
+                }
+            team_totals[team_id]['total_wins'] += wins
+            team_totals[team_id]['total_losses'] += losses
+            team_totals[team_id]['total_points'] += points
+            if rank == 1:
+                team_totals[team_id]['top_finishes'] += 1
+        return team_totals
+    
+    def _overall_values(self, totals: Dict[str, Any]) -> Dict[str, Any]:
+        total_games = totals['total_wins'] + totals['total_losses']
+        win_percentage = totals['total_wins'] / total_games if total_games > 0 else 0
+        # Store earnings as a numeric value; frontend can render currency
+        earnings_numeric = totals['top_finishes'] * 25
+        return self.convert_floats_to_decimal({
+            'team_name': totals['team_name'],
+            'total_wins': totals['total_wins'],
+            'total_losses': totals['total_losses'],
+            'total_points': Decimal(str(totals['total_points'])),
+            'win_percentage': Decimal(str(round(win_percentage, 4))),
+            'earnings': earnings_numeric
+        })
+    
+    def _write_overall_standings(self, season: str, team_totals: Dict[str, Dict[str, Any]]) -> None:
+        def write_team(entry):
+            team_id, totals = entry
+            # Preserve existing playoff percentage (don't reset to 0)
+            self.backend.update_item(
+                'overall_standings',
+                {'season': season, 'team_id': team_id},
+                self._overall_values(totals),
+                defaults={'playoff_percentage': Decimal('0')}
+            )
+        
+        with stage(self.metrics, 'overall_write'):
+            map_concurrently(self.executor, write_team, list(team_totals.items()))
+        logger.info(f"Updated overall standings for {len(team_totals)} teams")
+    
+    def sync_season(
+        self,
+        season: str,
+        results_by_week: Dict[int, List[Dict[str, Any]]],
+        dry_run: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Write only the weekly and overall rows whose values differ from the stored ones.
+        
+        Stored weekly rows without a recomputed counterpart are reported as
+        orphaned, never deleted; those in weeks that were not recomputed still
+        count toward the overall totals.
+        With dry_run nothing is written; the report lists what would change.
+        """
+        with stage(self.metrics, 'overall_scan'):
+            stored_weekly = {
+                (item['team_id'], item['season_week']): item
+                for item in self.backend.scan('weekly_standings', 'season_week', f'{season}_')
+            }
+            stored_overall = {item['team_id']: item for item in self.backend.query('overall_standings', season)}
+        
+        changes = []
+        weekly_items = []
+        for week in sorted(results_by_week):
+            for result in results_by_week[week]:
+                item = self._weekly_item(result, f"{season}_{week}")
+                stored = stored_weekly.pop((item['team_id'], item['season_week']), None)
+                fields = _changed_fields(stored, item)
+                if fields:
+                    weekly_items.append(item)
+                    changes.append({
+                        'table': 'weekly_standings', 'season_week': item['season_week'], 'team_id': item['team_id'],
+                        'team_name': item['team_name'], 'new': stored is None, 'fields': fields
+                    })
+        
+        rows = [self._result_summary(result) for week in sorted(results_by_week) for result in results_by_week[week]]
+        recomputed_weeks = {f"{season}_{week}" for week in results_by_week}
+        kept_rows = [
+            self._summary_row(item['team_id'], item['team_name'], item['wins'], item['losses'], item['points'], item['rank'])
+            for (_, season_week), item in sorted(stored_weekly.items())
+            if season_week not in recomputed_weeks
+        ]
+        team_totals = self._aggregate_team_totals(rows + kept_rows)
+        changed_totals = {}
+        for team_id, totals in team_totals.items():
+            stored = stored_overall.get(team_id)
+            fields = _changed_fields(stored, self._overall_values(totals))
+            if fields:
+                changed_totals[team_id] = totals
+                changes.append({
+                    'table': 'overall_standings', 'season': season, 'team_id': team_id,
+                    'team_name': totals['team_name'], 'new': stored is None, 'fields': fields
+                })
+        
+        if not dry_run:
+            if weekly_items:
+                with stage(self.metrics, 'weekly_write'):
+                    self.backend.batch_put_items('weekly_standings', weekly_items)
+            if changed_totals:
+                self._write_overall_standings(season, changed_totals)
+            # Cached season rows predate these writes
+            self._season_rows_loaded_at.pop(season, None)
+        
+        logger.info(
+            f"{'Would write' if dry_run else 'Wrote'} {len(weekly_items)} of {len(rows)} weekly rows and "
+            f"{len(changed_totals)} of {len(team_totals)} overall rows for season {season}"
+        )
+        return {
+            'season': season,
+            'dry_run': dry_run,
+            'weekly': {'compared': len(rows), 'changed': len(weekly_items), 'orphaned': sorted(stored_weekly)},
+            'overall': {'compared': len(team_totals), 'changed': len(changed_totals)},
+            'changes': changes,
+        }
+
 
+def _plain(value):
+    """Decimal -> int/float for reports"""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return value
 
+
+def _changed_fields(stored: Optional[Dict[str, Any]], item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fields of item whose value differs from the stored row (all of them when
+    there is no stored row), as field -> [old, new]; nested values such as
+    rosters are reported as 'changed' rather than in full.
+    """
+    stored = stored or {}
+    fields = {}
+    for field, value in item.items():
+        if stable_digest(value) == stable_digest(stored.get(field)):
+            continue
+        if isinstance(value, (dict, list)):
+            fields[field] = 'changed'
+        else:
+            fields[field] = [_plain(stored.get(field)), _plain(value)]
+    return fields
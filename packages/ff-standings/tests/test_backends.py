@@ -0,0 +1,102 @@
+"""
+Round trips through every StorageBackend: the same calls must read back the same items
+"""
+
+import pytest
+
+from ff_standings.backends import TABLE_KEYS, DynamoDBBackend, InMemoryBackend, SQLiteBackend
+
+LEAGUE_TABLES = {'weekly_standings': 'weekly_other', 'overall_standings': 'overall_other'}
+
+
+def _dynamodb_backend():
+    moto = pytest.importorskip('moto')
+    import boto3
+
+    mock = moto.mock_aws()
+    mock.start()
+    dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+    names = {table: table for table in TABLE_KEYS}
+    names.update({name: table for table, name in LEAGUE_TABLES.items()})
+    tables = {}
+    for name, table in names.items():
+        partition_key, sort_key = TABLE_KEYS[table]
+        key_schema = [{'AttributeName': partition_key, 'KeyType': 'HASH'}]
+        attributes = [{'AttributeName': partition_key, 'AttributeType': 'S'}]
+        if sort_key:
+            key_schema.append({'AttributeName': sort_key, 'KeyType': 'RANGE'})
+            attributes.append({'AttributeName': sort_key, 'AttributeType': 'S'})
+        dynamodb.create_table(
+            TableName=name, KeySchema=key_schema, AttributeDefinitions=attributes, BillingMode='PAY_PER_REQUEST'
+        )
+        if name in TABLE_KEYS:
+            tables[name] = dynamodb.Table(name)
+    return DynamoDBBackend(tables, dynamodb=dynamodb), mock.stop
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'dynamodb'])
+def backend(request, tmp_path):
+    if request.param == 'memory':
+        yield InMemoryBackend()
+    elif request.param == 'sqlite':
+        backend = SQLiteBackend(str(tmp_path / 'ff-test.db'))
+        yield backend
+        backend.close()
+    else:
+        backend, stop = _dynamodb_backend()
+        yield backend
+        stop()
+
+
+def _overall_key(team_id):
+    return {'season': '2025', 'team_id': team_id}
+
+
+def test_put_get_and_batch(backend):
+    backend.put_item('weekly_standings', {'season_week': '2025_1', 'team_id': '1', 'wins': 3})
+    backend.batch_put_items('weekly_standings', [
+        {'season_week': '2025_1', 'team_id': str(team_id), 'wins': team_id} for team_id in range(2, 5)
+    ])
+    assert backend.get_item('weekly_standings', {'season_week': '2025_1', 'team_id': '1'})['wins'] == 3
+    assert backend.get_item('weekly_standings', {'season_week': '2025_1', 'team_id': '9'}) is None
+    assert [item['team_id'] for item in backend.query('weekly_standings', '2025_1')] == ['1', '2', '3', '4']
+
+
+def test_update_item_with_defaults(backend):
+    created = backend.update_item('overall_standings', _overall_key('1'), {'wins': 5}, defaults={'playoff_percentage': 0})
+    assert created['wins'] == 5 and created['playoff_percentage'] == 0
+    updated = backend.update_item('overall_standings', _overall_key('1'), {'wins': 6}, defaults={'playoff_percentage': 1})
+    assert updated['wins'] == 6 and updated['playoff_percentage'] == 0
+    stored = backend.get_item('overall_standings', _overall_key('1'))
+    assert stored['wins'] == 6 and stored['playoff_percentage'] == 0
+    assert [item['team_id'] for item in backend.query('overall_standings', '2025')] == ['1']
+
+
+def test_query_prefix_and_scan(backend):
+    for item_id in ('2024_17', '2025_1', '2025_2'):
+        backend.put_item('league_data', {'data_type': 'matchups', 'id': item_id, 'data': []})
+    backend.put_item('league_data', {'data_type': 'players', 'id': 'nfl_players', 'data': {}})
+    assert [item['id'] for item in backend.query('league_data', 'matchups', sort_prefix='2025_')] == ['2025_1', '2025_2']
+    assert len(backend.scan('league_data')) == 4
+    assert {item['id'] for item in backend.scan('league_data', 'id', '2025_')} == {'2025_1', '2025_2'}
+
+
+def test_leases(backend):
+    key = {'id': 'lease#L1'}
+    assert backend.acquire_lease('polling_state', key, 'a', 60, now=1000)[0]
+    assert not backend.acquire_lease('polling_state', key, 'b', 60, now=1010)[0]
+    assert backend.release_lease('polling_state', key, 'a')
+    assert backend.acquire_lease('polling_state', key, 'b', 60, now=1020)[0]
+
+
+def test_view_with_table_names_keeps_tables_apart(backend):
+    calls = []
+    backend.observer = lambda *args: calls.append(args)
+    other = backend.view(LEAGUE_TABLES)
+    backend.update_item('overall_standings', _overall_key('1'), {'wins': 1}, defaults={'playoff_percentage': 0})
+    other.update_item('overall_standings', _overall_key('1'), {'wins': 2}, defaults={'playoff_percentage': 0})
+    other.put_item('league_data', {'data_type': 'players', 'id': 'nfl_players', 'data': {}})
+    assert backend.get_item('overall_standings', _overall_key('1'))['wins'] == 1
+    assert other.get_item('overall_standings', _overall_key('1'))['wins'] == 2
+    assert backend.get_item('league_data', {'data_type': 'players', 'id': 'nfl_players'}) is not None
+    assert other.observer is None and len(calls) == 3